@@ -0,0 +1,166 @@
+import bisect
+import tempfile
+from array import array
+
+SPILLED_MARK = "spilled"
+
+
+class BoundedConsole:
+    """Ring-buffer mode for the main Text widget.
+
+    Only the last max_lines lines live in the widget. Everything that was ever
+    written is appended to a spill file on disk, and older pages are read back
+    from it when the user scrolls to the top, so memory use and redraw cost stay
+    flat however long the solver runs. max_lines = 0 turns the bound off.
+    """
+
+    def __init__(self, text_box, scrollbar=None, max_lines=5000, page_lines=1000, spill_dir=None):
+        self.text_box = text_box
+        self.scrollbar = scrollbar
+        self.max_lines = max_lines
+        self.page_lines = page_lines
+        self.spill = tempfile.TemporaryFile(mode="w+b", prefix="splash-console-", dir=spill_dir)
+
+        # Sparse index into the spill file: line number and byte offset roughly every page_lines lines
+        self.checkpoint_lines = array("Q", [0])
+        self.checkpoint_offsets = array("Q", [0])
+        self.total_lines = 0  # Complete lines in the spill file
+        self._at_line_start = True  # The spill file ends with a newline (or is empty)
+        self.first_line = 0  # History line shown on the first line of the widget
+        self._spilled_index = None  # Where the "spilled" mark was left by the last write
+        self._paging = False
+
+        # Everything before this mark is in the spill file; text inserted at the end by others lands after it
+        self.text_box.mark_set(SPILLED_MARK, "end-1c")
+        self.text_box.mark_gravity(SPILLED_MARK, "left")
+
+        # Watch the view so older content can be paged in when the top is reached
+        self.text_box["yscrollcommand"] = self._on_yscroll
+
+    @property
+    def bounded(self):
+        return self.max_lines > 0
+
+    # -------------------------------------------------- writing
+    def write(self, text):
+        if not self.bounded:
+            self.text_box.insert("end", text)
+            self.text_box.see("end")
+            return
+
+        self._catch_up()  # Text inserted into the widget directly (e.g. a banner) goes into the history too
+
+        following = self.text_box.yview()[1] >= 1.0
+        self._spill(text)
+        self.text_box.insert("end", text)
+
+        # Keep the widget bounded; be more lenient while the user is reading older output
+        limit = self.max_lines if following else self.max_lines + 2 * self.page_lines
+        excess = self._widget_lines() - limit
+        if excess > 0:
+            self.text_box.delete("1.0", f"{excess + 1}.0")
+            self.first_line += excess
+
+        if following:
+            self.text_box.see("end")
+        self._mark_spilled()
+
+    def clear(self):
+        self.text_box.delete("1.0", "end")
+        self._reset_spill()
+        self._mark_spilled()
+
+    def set_max_lines(self, max_lines):
+        self.max_lines = max(0, int(max_lines))
+        self._spilled_index = None  # The widget was not spilled while unbounded
+
+    def _widget_lines(self):
+        return int(self.text_box.index("end-1c").split(".")[0])
+
+    def _reset_spill(self):
+        self.spill.seek(0)
+        self.spill.truncate()
+        self.checkpoint_lines = array("Q", [0])
+        self.checkpoint_offsets = array("Q", [0])
+        self.total_lines = 0
+        self.first_line = 0
+        self._at_line_start = True
+
+    def _mark_spilled(self):
+        self.text_box.mark_set(SPILLED_MARK, "end-1c")
+        self._spilled_index = self.text_box.index(SPILLED_MARK)
+
+    def _catch_up(self):
+        spilled = self.text_box.index(SPILLED_MARK)
+        if spilled == self._spilled_index:
+            # Only appended to: spill what came after the mark
+            appended = self.text_box.get(SPILLED_MARK, "end-1c")
+            if appended:
+                self._spill(appended)
+            return
+        # Something before the mark was deleted or rewritten: the widget starts a new stretch of the history,
+        # appended after what is already on disk
+        if not self._at_line_start:
+            self._spill("\n")
+        self.first_line = self.total_lines
+        current = self.text_box.get("1.0", "end-1c")
+        if current:
+            self._spill(current)
+
+    def _spill(self, text):
+        data = text.encode("utf-8", errors="replace")
+        self.spill.seek(0, 2)
+        offset = self.spill.tell()
+        self.spill.write(data)
+
+        # Checkpoint at the first line start of this write when a page boundary has been crossed since the
+        # last one; a write that continues an unfinished line checkpoints after its first newline
+        if self.total_lines - self.checkpoint_lines[-1] >= self.page_lines:
+            if self._at_line_start:
+                self.checkpoint_lines.append(self.total_lines)
+                self.checkpoint_offsets.append(offset)
+            elif b"\n" in data:
+                self.checkpoint_lines.append(self.total_lines + 1)
+                self.checkpoint_offsets.append(offset + data.index(b"\n") + 1)
+        self.total_lines += data.count(b"\n")
+        if data:
+            self._at_line_start = data.endswith(b"\n")
+
+    # -------------------------------------------------- paging
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if float(first) <= 0.0 and self.first_line > 0 and self.bounded and not self._paging:
+            self._paging = True
+            self.text_box.after_idle(self.page_in)
+
+    def read_lines(self, start, stop):
+        """History lines [start, stop) as one string, read back from the spill file."""
+        # Last checkpoint at or before start
+        low = bisect.bisect_right(self.checkpoint_lines, start) - 1
+
+        self.spill.flush()
+        self.spill.seek(self.checkpoint_offsets[low])
+        for _ in range(start - self.checkpoint_lines[low]):
+            self.spill.readline()
+        lines = [self.spill.readline() for _ in range(stop - start)]
+        return b"".join(lines).decode("utf-8", errors="replace")
+
+    def page_in(self):
+        try:
+            if self.first_line <= 0:
+                return
+            start = max(0, self.first_line - self.page_lines)
+            text = self.read_lines(start, self.first_line)
+            self.text_box.insert("1.0", text)
+            added = self.first_line - start
+            self.first_line = start
+
+            # Keep the line the user was looking at in place
+            self.text_box.yview(f"{added + 1}.0")
+            self._mark_spilled()
+        finally:
+            self._paging = False
+
+    def close(self):
+        self.spill.close()
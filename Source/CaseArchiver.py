@@ -0,0 +1,235 @@
+import os
+import gzip
+import shutil
+import tarfile
+import threading
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# What goes into the archive: top-level entries to include (None: everything) and names never packed
+ARCHIVE_PROFILES = {
+    "setup": {"include": ["0", "0.orig", "constant", "system", "Allrun", "Allclean", "Allrun.pre"], "latest_time": False},
+    "setup + latest time": {"include": ["0", "0.orig", "constant", "system", "Allrun", "Allclean", "Allrun.pre"], "latest_time": True},
+    "full": {"include": None, "latest_time": False},
+}
+EXCLUDED_PREFIXES = ("processor", "log.", ".splash")
+EXCLUDED_NAMES = ("dynamicCode", "__pycache__")
+
+# Uncompressed bytes per independently compressed gzip member
+GZIP_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def is_time_name(name):
+    try:
+        float(name)
+        return True
+    except ValueError:
+        return False
+
+
+def case_files(case_dir, profile="setup"):
+    """(path, archive name) of every directory and file the profile packs, in a stable order."""
+    settings = ARCHIVE_PROFILES[profile]
+    top_level = sorted(os.listdir(case_dir))
+    include = set(top_level if settings["include"] is None else settings["include"])
+    if settings["latest_time"]:
+        times = [name for name in top_level if is_time_name(name) and os.path.isdir(os.path.join(case_dir, name))]
+        if times:
+            include.add(max(times, key=float))
+
+    base = os.path.basename(os.path.normpath(case_dir))
+    entries = [(case_dir, base)]
+    for name in top_level:
+        if name not in include or name.startswith(EXCLUDED_PREFIXES) or name in EXCLUDED_NAMES:
+            continue
+        path = os.path.join(case_dir, name)
+        entries.append((path, f"{base}/{name}"))
+        if os.path.isdir(path) and not os.path.islink(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith(EXCLUDED_PREFIXES) and d not in EXCLUDED_NAMES)
+                relative = os.path.relpath(directory, case_dir).replace(os.sep, "/")
+                for entry in dirnames + sorted(f for f in filenames if not f.startswith(EXCLUDED_PREFIXES)):
+                    entries.append((os.path.join(directory, entry), f"{base}/{relative}/{entry}"))
+    return entries
+
+
+def external_compressor(compression, threads):
+    """Command of a multi-threaded compressor on PATH for compression ("zstd" or "gzip"), or None."""
+    if compression == "zstd" and shutil.which("zstd"):
+        return ["zstd", f"-T{threads}", "-q", "-c"]
+    if compression == "gzip" and shutil.which("pigz"):
+        return ["pigz", "-p", str(threads), "-c"]
+    return None
+
+
+class ParallelGzipWriter:
+    """File-like writer compressing fixed-size blocks on a thread pool (zlib releases the GIL).
+
+    Each block becomes its own gzip member; concatenated members are a valid
+    .gz file for gunzip and tar. Compressed blocks are written in order as soon
+    as they are ready, so the output grows while the input is still being read.
+    """
+
+    def __init__(self, sink, threads, compresslevel=6):
+        self.sink = sink
+        self.compresslevel = compresslevel
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        self.max_pending = threads * 2
+        self.pending = deque()
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= GZIP_BLOCK_SIZE:
+            block = bytes(self.buffer[:GZIP_BLOCK_SIZE])
+            del self.buffer[:GZIP_BLOCK_SIZE]
+            self.pending.append(self.pool.submit(gzip.compress, block, self.compresslevel, mtime=0))
+            self._drain(self.max_pending)
+        return len(data)
+
+    def _drain(self, keep):
+        while len(self.pending) > keep:
+            self.sink.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.buffer:
+            self.pending.append(self.pool.submit(gzip.compress, bytes(self.buffer), self.compresslevel, mtime=0))
+            self.buffer.clear()
+        self._drain(0)
+        self.pool.shutdown()
+
+
+class _CountingReader:
+    def __init__(self, file, archiver):
+        self.file = file
+        self.archiver = archiver
+
+    def read(self, size=-1):
+        if self.archiver.cancelled:
+            raise InterruptedError("Archiving cancelled")
+        data = self.file.read(size)
+        self.archiver.bytes_read += len(data)
+        return data
+
+
+class _CountingSink:
+    def __init__(self, sink, archiver):
+        self.sink = sink
+        self.archiver = archiver
+
+    def write(self, data):
+        self.sink.write(data)
+        self.archiver.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        self.sink.flush()
+
+
+class CaseArchiver:
+    """Packs a case into a compressed tar stream on a background thread.
+
+    The tar stream is written entry by entry (tarfile "w|" mode) into a
+    multi-threaded compressor: zstd -T or pigz when installed, otherwise a
+    ParallelGzipWriter. output is a path or any binary file-like sink (the
+    stdin of an upload command, for instance), so the consumer can start on
+    the first blocks while later files are still being read. progress() may
+    be polled from the Tk thread; on_exit(archiver) is called on the worker
+    thread when done, with error set if packing failed.
+    """
+
+    def __init__(self, case_dir, output, profile="setup", files=None, compression="gzip", threads=None, on_exit=None):
+        self.case_dir = case_dir
+        self.output = output
+        self.entries = files if files is not None else case_files(case_dir, profile)
+        self.compression = compression
+        self.threads = threads or os.cpu_count() or 1
+        self.on_exit = on_exit
+        self.total_bytes = sum(os.path.getsize(path) for path, _ in self.entries
+                               if os.path.isfile(path) and not os.path.islink(path))
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.cancelled = False
+        self._thread = None
+
+    @staticmethod
+    def extension(compression):
+        return ".tar.zst" if compression == "zstd" else ".tar.gz"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        """Pack synchronously (start() runs this on a background thread)."""
+        self.started = time.monotonic()
+        own_sink = isinstance(self.output, (str, os.PathLike))
+        sink = open(self.output, "wb") if own_sink else self.output
+        process = None
+        try:
+            command = external_compressor(self.compression, self.threads)
+            if command:
+                process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                pump = threading.Thread(target=shutil.copyfileobj, args=(process.stdout, _CountingSink(sink, self)), daemon=True)
+                pump.start()
+                compressor = process.stdin
+            elif self.compression == "zstd":
+                raise RuntimeError("zstd is not installed; use gzip compression instead")
+            else:
+                compressor = ParallelGzipWriter(_CountingSink(sink, self), self.threads)
+
+            with tarfile.open(fileobj=compressor, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for path, name in self.entries:
+                    if self.cancelled:
+                        raise InterruptedError("Archiving cancelled")
+                    info = tar.gettarinfo(path, arcname=name)
+                    if info.isfile():
+                        with open(path, "rb") as file:
+                            tar.addfile(info, _CountingReader(file, self))
+                    else:
+                        tar.addfile(info)
+            compressor.close()
+            if process is not None:
+                pump.join()
+                if process.wait() != 0:
+                    raise RuntimeError(f"{command[0]} exited with status {process.returncode}")
+        except (OSError, RuntimeError, InterruptedError, tarfile.TarError) as e:
+            self.error = e
+            if process is not None:
+                process.kill()
+        finally:
+            if own_sink:
+                sink.close()
+                if self.error is not None and os.path.exists(self.output):
+                    os.remove(self.output)
+            self.finished = time.monotonic()
+        if self.on_exit is not None:
+            self.on_exit(self)
+
+    def progress(self):
+        elapsed = (self.finished or time.monotonic()) - (self.started or time.monotonic())
+        return {
+            "fraction": self.bytes_read / self.total_bytes if self.total_bytes else 1.0,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "throughput": self.bytes_read / elapsed if elapsed > 0 else 0.0,
+            "ratio": self.bytes_written / self.bytes_read if self.bytes_read else None,
+        }
+
+    def summary(self):
+        stats = self.progress()
+        mb = 1024 * 1024
+        return (f"Packing {stats['fraction']:.0%}  |  {stats['bytes_read'] / mb:.1f} of {self.total_bytes / mb:.1f} MB  |  "
+                f"{stats['throughput'] / mb:.1f} MB/s  |  {stats['bytes_written'] / mb:.1f} MB written")
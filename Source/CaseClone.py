@@ -0,0 +1,175 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ioctl request number of FICLONE (linux/fs.h): share all extents of one file with another
+FICLONE = 0x40049409
+
+# Files above this size are copied as several ranges in parallel when they cannot be shared
+CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class CloneReport:
+    """What clone_tree did: how many bytes were shared (reflinked, hard-linked, symlinked) and how many copied."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes_total = 0
+        self.bytes_by_method = {"reflink": 0, "hardlink": 0, "symlink": 0, "copy": 0}
+        self._lock = threading.Lock()
+
+    def add(self, method, size):
+        with self._lock:
+            self.files += 1
+            self.bytes_total += size
+            self.bytes_by_method[method] += size
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_total - self.bytes_by_method["copy"]
+
+    def summary(self):
+        shared = ", ".join(f"{_format_bytes(size)} {method}" for method, size in self.bytes_by_method.items()
+                           if size and method != "copy")
+        return (f"{self.files} files, {_format_bytes(self.bytes_total)}: {_format_bytes(self.bytes_saved)} saved"
+                + (f" ({shared})" if shared else ""))
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def reflink(source, destination):
+    """Copy-on-write clone of a file (btrfs, XFS, bcachefs...); False where the filesystem cannot do it."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def _copy_range(source, destination, offset, length):
+    with open(source, "rb") as src, open(destination, "r+b") as dst:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        end = offset + length
+        while offset < end:
+            if hasattr(os, "copy_file_range"):
+                try:
+                    copied = os.copy_file_range(src_fd, dst_fd, end - offset, offset, offset)
+                except OSError:
+                    copied = 0
+                if copied:
+                    offset += copied
+                    continue
+            data = os.pread(src_fd, min(end - offset, 8 * 1024 * 1024), offset)
+            if not data:
+                break
+            os.pwrite(dst_fd, data, offset)
+            offset += len(data)
+
+
+def chunked_copy(source, destination, pool=None):
+    """Copy a file, splitting large ones into CHUNK_SIZE ranges copied on the pool."""
+    size = os.path.getsize(source)
+    if size <= CHUNK_SIZE or pool is None:
+        shutil.copy2(source, destination)
+        return
+    with open(destination, "wb") as dst:
+        dst.truncate(size)
+    futures = [pool.submit(_copy_range, source, destination, offset, min(CHUNK_SIZE, size - offset))
+               for offset in range(0, size, CHUNK_SIZE)]
+    for future in futures:
+        future.result()
+    shutil.copystat(source, destination)
+
+
+def clone_file(source, destination, link=False, report=None, pool=None):
+    """Clone one file: reflink if possible, else a hard link when link is set, else a copy; returns the method used.
+
+    Hard links share the inode, so they are only for files nobody writes in place: OpenFOAM truncates and
+    rewrites existing files (e.g. renumberMesh -overwrite), FoamDictionary.save replaces them.
+    """
+    size = os.path.getsize(source)
+    if reflink(source, destination):
+        method = "reflink"
+    else:
+        method = "copy"
+        if link:
+            try:
+                os.link(source, destination)
+                method = "hardlink"
+            except OSError:
+                pass
+        if method == "copy":
+            chunked_copy(source, destination, pool)
+    if report is not None:
+        report.add(method, size)
+    return method
+
+
+def clone_tree(source, destination, ignore=None, link=False, symlink=(), workers=None, replace=False):
+    """Clone a directory tree the cheapest way the filesystem allows; returns a CloneReport.
+
+    ignore works as for shutil.copytree. Directories named in symlink (paths
+    relative to source, e.g. "constant/polyMesh") are symlinked instead of
+    cloned. Files are cloned on a thread pool; replace removes an existing
+    destination first.
+    """
+    report = CloneReport()
+    if replace and os.path.lexists(destination):
+        if os.path.isdir(destination) and not os.path.islink(destination):
+            shutil.rmtree(destination)
+        else:
+            os.remove(destination)
+    symlink = {os.path.normpath(path) for path in symlink}
+    workers = workers or min(8, os.cpu_count() or 1)
+
+    with ThreadPoolExecutor(max_workers=workers) as files_pool, ThreadPoolExecutor(max_workers=workers) as chunks_pool:
+        futures = []
+        for directory, dirnames, filenames in os.walk(source):
+            relative = os.path.relpath(directory, source)
+            target_dir = os.path.normpath(os.path.join(destination, relative))
+            os.makedirs(target_dir, exist_ok=True)
+            skipped = ignore(directory, dirnames + filenames) if ignore is not None else set()
+
+            for name in list(dirnames):
+                path = os.path.normpath(os.path.join(relative, name))
+                if name in skipped:
+                    dirnames.remove(name)
+                elif path in symlink:
+                    dirnames.remove(name)
+                    os.symlink(os.path.abspath(os.path.join(directory, name)), os.path.join(target_dir, name))
+                    report.add("symlink", _tree_size(os.path.join(directory, name)))
+                elif os.path.islink(os.path.join(directory, name)):
+                    dirnames.remove(name)
+                    os.symlink(os.readlink(os.path.join(directory, name)), os.path.join(target_dir, name))
+
+            for name in filenames:
+                if name in skipped:
+                    continue
+                source_path = os.path.join(directory, name)
+                if os.path.islink(source_path):
+                    os.symlink(os.readlink(source_path), os.path.join(target_dir, name))
+                    continue
+                futures.append(files_pool.submit(clone_file, source_path, os.path.join(target_dir, name),
+                                                 link, report, chunks_pool))
+        for future in futures:
+            future.result()
+    return report
+
+
+def _tree_size(path):
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for directory, _, names in os.walk(path) for name in names)
@@ -0,0 +1,159 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from CaseArchiver import case_files, is_time_name
+
+MANIFEST_NAME = ".splashmanifest.json"
+HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MB chunks (hashlib releases the GIL, so a thread pool scales)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CaseManifest:
+    """Content hashes of the files of a case, kept in <case>/.splashmanifest.json.
+
+    scan() only rehashes files whose size or mtime changed since the last
+    scan. The manifest also remembers the hashes of the last successful
+    submission, so changed_files() lists what a repeat submission needs
+    to send.
+    """
+
+    def __init__(self, case_dir):
+        self.case_dir = os.path.normpath(case_dir)
+        self.path = os.path.join(self.case_dir, MANIFEST_NAME)
+        self.files = {}  # relative path -> {"size", "mtime_ns", "sha256"}
+        self.submitted = {}  # relative path -> sha256 at the last successful submission
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    data = json.load(file)
+                self.files = data.get("files", {})
+                self.submitted = data.get("submitted", {})
+            except (OSError, ValueError):
+                pass
+
+    def save(self):
+        # Same write-then-rename as FoamDictionary.save, so an interrupted save never loses the manifest
+        fd, temp_path = tempfile.mkstemp(dir=self.case_dir, prefix=".splash-")
+        with os.fdopen(fd, "w") as file:
+            json.dump({"files": self.files, "submitted": self.submitted}, file)
+        os.replace(temp_path, self.path)
+
+    def scan(self, relative_paths=None, workers=None):
+        """Refresh the entries of the given files (all files of the case by default); returns the rehashed paths."""
+        if relative_paths is None:
+            relative_paths = [os.path.relpath(path, self.case_dir)
+                              for directory, _, names in os.walk(self.case_dir)
+                              if not os.path.relpath(directory, self.case_dir).startswith("processor")
+                              for path in (os.path.join(directory, name) for name in names)
+                              if not os.path.basename(path).startswith(".splash")]
+        stale = []
+        current = {}
+        for relative in relative_paths:
+            path = os.path.join(self.case_dir, relative)
+            if not os.path.isfile(path) or os.path.islink(path):
+                continue
+            st = os.stat(path)
+            entry = self.files.get(relative)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                current[relative] = entry
+            else:
+                current[relative] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": None}
+                stale.append(relative)
+
+        with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+            digests = pool.map(file_digest, (os.path.join(self.case_dir, relative) for relative in stale))
+            for relative, digest in zip(stale, digests):
+                current[relative]["sha256"] = digest
+
+        self.files.update(current)
+        for relative in [relative for relative in self.files if not os.path.exists(os.path.join(self.case_dir, relative))]:
+            del self.files[relative]
+        return stale
+
+    def changed_files(self, relative_paths):
+        """Those of relative_paths whose content differs from the last successful submission."""
+        return [relative for relative in relative_paths
+                if relative in self.files and self.submitted.get(relative) != self.files[relative]["sha256"]]
+
+    def mark_submitted(self, relative_paths):
+        for relative in relative_paths:
+            if relative in self.files:
+                self.submitted[relative] = self.files[relative]["sha256"]
+        self.save()
+
+    def digests(self):
+        return {relative: entry["sha256"] for relative, entry in self.files.items()}
+
+
+def delta_entries(case_dir, profile="setup", manifest=None):
+    """Archive entries (see case_files) of a profile reduced to the files changed since the last submission.
+
+    Returns (entries, changed relative paths, manifest); directories are kept only as parents of changed files.
+    """
+    manifest = manifest or CaseManifest(case_dir)
+    entries = case_files(case_dir, profile)
+    base = os.path.normpath(case_dir)
+    relative = {path: os.path.relpath(path, base) for path, _ in entries if os.path.isfile(path)}
+    manifest.scan(list(relative.values()))
+    changed = set(manifest.changed_files(list(relative.values())))
+    needed_dirs = {os.path.dirname(os.path.normpath(path)) for path, rel in relative.items() if rel in changed}
+    while True:
+        parents = {os.path.dirname(path) for path in needed_dirs if path != base} - needed_dirs
+        if not parents:
+            break
+        needed_dirs |= parents
+    kept = [(path, name) for path, name in entries
+            if relative.get(path) in changed or (os.path.isdir(path) and os.path.normpath(path) in needed_dirs)]
+    return kept, sorted(changed), manifest
+
+
+class LocalDirectoryRemote:
+    """Stand-in for the remote side of a run: a directory holding a copy of the case (a mounted share, or a test folder).
+
+    It has the interface a real remote needs: the digests of what is there,
+    and fetching single files from it.
+    """
+
+    def __init__(self, case_dir):
+        self.case_dir = case_dir
+
+    def digests(self):
+        # The manifest is kept on the remote side too, so the next pull only rehashes files that changed there
+        manifest = CaseManifest(self.case_dir)
+        if manifest.scan():
+            try:
+                manifest.save()
+            except OSError:
+                pass  # Read-only share: hashed again next time
+        return manifest.digests()
+
+    def fetch(self, relative, destination):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copy2(os.path.join(self.case_dir, relative), destination)
+
+
+def pull_results(remote, case_dir, workers=None):
+    """Fetch the files of remote time and postProcessing directories that are missing or different locally."""
+    manifest = CaseManifest(case_dir)
+    manifest.scan()
+    local = manifest.digests()
+    wanted = [relative for relative, digest in remote.digests().items()
+              if (is_time_name(relative.split(os.sep)[0]) or relative.split(os.sep)[0] == "postProcessing")
+              and local.get(relative) != digest]
+    with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+        list(pool.map(lambda relative: remote.fetch(relative, os.path.join(case_dir, relative)), wanted))
+    manifest.scan(wanted)
+    manifest.save()
+    return wanted
@@ -0,0 +1,208 @@
+import os
+import csv
+import itertools
+
+from CaseClone import clone_tree
+from FoamDictionary import FoamDictionary
+from foam_environment import foam_environment
+from JobQueue import Job, JobQueue
+from MeshSweep import parse_range
+from ParallelRun import ParallelRun, physical_core_count, solver_application, write_decomposition
+from ProcessRunner import DiscardOutput, ProcessRunner
+from SolverLogMetrics import SolverLogMetrics
+
+# Common sweep targets: label -> (dictionary file, entry path, value template)
+SWEEP_PRESETS = {
+    "nu": ("constant/transportProperties", "nu", "{}"),
+    "deltaT": ("system/controlDict", "deltaT", "{}"),
+    "endTime": ("system/controlDict", "endTime", "{}"),
+    "inlet velocity": ("0/U", "boundaryField/inlet/value", "uniform ({} 0 0)"),
+}
+
+# Dictionaries that moved between OpenFOAM versions: preset file -> files to try when it is missing
+DICTIONARY_ALTERNATIVES = {
+    "constant/transportProperties": ("constant/physicalProperties",),
+}
+
+RESULT_COLUMNS = ["state", "attempts", "time", "steps", "seconds_per_step", "wall_time", "max_initial_residual"]
+
+
+class SweepParameter:
+    """One axis of the grid: the entry to edit and the values it takes."""
+
+    def __init__(self, label, dictionary, entry, values, template="{}"):
+        self.label = label
+        self.dictionary = dictionary
+        self.entry = entry
+        self.values = list(values)
+        self.template = template
+
+    @classmethod
+    def from_preset(cls, label, text):
+        dictionary, entry, template = SWEEP_PRESETS[label]
+        return cls(label, dictionary, entry, parse_range(text), template)
+
+
+def resolve_dictionary(case_dir, dictionary):
+    """The dictionary file as it is named in this case, e.g. physicalProperties for transportProperties in OF11."""
+    for candidate in (dictionary, *DICTIONARY_ALTERNATIVES.get(dictionary, ())):
+        if os.path.exists(os.path.join(case_dir, candidate)):
+            return candidate
+    return dictionary
+
+
+def clone_case(base_dir, destination, share_mesh=True):
+    """Lightweight copy of a case for one variant: system, constant and the initial time directory.
+
+    With share_mesh constant/polyMesh is symlinked rather than copied; the mesh is shared and read-only
+    for the solver. Cases that rebuild their mesh (an Allrun calling blockMesh) need their own copy.
+    Results, logs, decompositions and later time directories are left behind. Returns the CloneReport.
+    """
+    def ignore(directory, names):
+        skipped = set()
+        for name in names:
+            if name.startswith(("processor", "log.")) or name in ("postProcessing", "dynamicCode"):
+                skipped.add(name)
+            elif directory == base_dir:
+                try:
+                    if float(name) > 0:
+                        skipped.add(name)
+                except ValueError:
+                    pass
+        return skipped
+
+    symlink = (os.path.join("constant", "polyMesh"),) if share_mesh else ()
+    return clone_tree(base_dir, destination, ignore=ignore, symlink=symlink, replace=True)
+
+
+class CaseSweep:
+    """Runs one solver case per point of a parameter grid on a JobQueue.
+
+    Variants are materialised next to the base case in <case>_sweep/ and
+    queued with a cores budget; each gets its own ProcessRunner. A case with
+    an Allrun is run through it, so its pre-steps (0.orig, blockMesh, ...)
+    happen per variant; otherwise the solver is run directly, or as a
+    ParallelRun when cores_per_case > 1. Failed runs are retried, and a
+    summary row per variant is kept from its solver log.
+    """
+
+    def __init__(self, root, console, case_dir, parameters, cores_per_case=1, max_cores=None, retries=0, bashrc=None,
+                 on_variant=None, on_exit=None):
+        self.root = root
+        self.console = console
+        self.case_dir = os.path.normpath(case_dir)
+        self.cores_per_case = max(1, cores_per_case)
+        self.retries = retries
+        self.bashrc = bashrc
+        self.on_variant = on_variant
+        self.on_exit = on_exit
+        self.parameters = [parameter for parameter in parameters if parameter.values]
+        self.sweep_dir = f"{self.case_dir}_sweep"
+        self.application = solver_application(self.case_dir)
+        self.has_allrun = os.path.isfile(os.path.join(self.case_dir, "Allrun"))
+
+        self.variants = [dict(zip((parameter.label for parameter in self.parameters), combination))
+                         for combination in itertools.product(*(parameter.values for parameter in self.parameters))]
+        self.results = [dict.fromkeys(RESULT_COLUMNS, None) for _ in self.variants]
+        self.queue = JobQueue(max_cores or physical_core_count(), on_job_finished=self._on_job_finished, on_idle=self._finish)
+        self.jobs = []
+
+    def variant_dir(self, index):
+        return os.path.join(self.sweep_dir, f"variant_{index:03d}")
+
+    def materialize(self, index):
+        destination = self.variant_dir(index)
+        clone_case(self.case_dir, destination, share_mesh=not self.has_allrun)
+        edits = {}
+        for parameter in self.parameters:
+            edits.setdefault(resolve_dictionary(destination, parameter.dictionary), []).append(
+                (parameter.entry, parameter.template.format(self.variants[index][parameter.label])))
+        for dictionary, entries in edits.items():
+            foam_dict = FoamDictionary.load(os.path.join(destination, dictionary))
+            for entry, value in entries:
+                foam_dict.set(entry, value)
+            foam_dict.save()
+        return destination
+
+    def start(self, priorities=None):
+        """Queue every variant; priorities optionally maps a variant index to its priority (higher first)."""
+        os.makedirs(self.sweep_dir, exist_ok=True)
+        self.console.write(f"\n>>> Case sweep: {len(self.variants)} variants of {os.path.basename(self.case_dir)}, "
+                           f"{self.cores_per_case} core(s) each, {self.queue.max_cores} cores in total\n")
+        for index in range(len(self.variants)):
+            job = Job(f"variant_{index:03d}", lambda on_exit, index=index: self._launch(index, on_exit),
+                      cores=self.cores_per_case, priority=(priorities or {}).get(index, 0), retries=self.retries, data=index)
+            self.jobs.append(self.queue.submit(job))
+        self.queue.dispatch()
+
+    def _launch(self, index, on_exit):
+        try:
+            variant_dir = self.materialize(index)
+            runner = ProcessRunner(self.root, DiscardOutput())
+            if self.has_allrun:
+                # Allrun's runApplication writes log.<solver> itself; the script's own output goes to log.Allrun
+                if self.cores_per_case > 1:
+                    write_decomposition(variant_dir, self.cores_per_case)
+                runner.start(["bash", "./Allrun"], cwd=variant_dir, env=foam_environment(self.bashrc),
+                             log_path=os.path.join(variant_dir, "log.Allrun"), on_exit=on_exit)
+            elif self.cores_per_case > 1:
+                ParallelRun(runner, variant_dir, self.cores_per_case, bashrc=self.bashrc, on_exit=on_exit).start()
+            else:
+                runner.start([self.application], cwd=variant_dir, env=foam_environment(self.bashrc),
+                             log_path=os.path.join(variant_dir, f"log.{self.application}"), on_exit=on_exit)
+        except (OSError, RuntimeError, ValueError) as e:
+            # The queue only sees a failed start; say why before it is retried
+            self.console.write(f"Variant {index:03d}: cannot start: {e}\n")
+            raise
+        return runner
+
+    def _on_job_finished(self, job):
+        index = job.data
+        metrics = SolverLogMetrics()
+        metrics.feed_file(os.path.join(self.variant_dir(index), f"log.{self.application}"))
+        stats = metrics.throughput()
+        residuals = [initial[-1] for _, initial, _, _ in metrics.fields.values() if len(initial)]
+        self.results[index].update({
+            "state": job.state,
+            "attempts": job.attempts,
+            "time": stats["time"] if stats else None,
+            "steps": metrics.steps,
+            "seconds_per_step": round(stats["seconds_per_step"], 6) if stats else None,
+            "wall_time": round(job.duration, 1) if job.duration is not None else None,
+            "max_initial_residual": max(residuals) if residuals else None,
+        })
+        values = ", ".join(f"{name}={value}" for name, value in self.variants[index].items())
+        self.console.write(f"Variant {index:03d} [{values}]: {job.state}" +
+                           (f" after {job.attempts} attempts\n" if job.attempts > 1 else "\n"))
+        if self.on_variant is not None:
+            self.on_variant(index, self.results[index])
+
+    def cancel(self):
+        self.queue.cancel_all()
+
+    @property
+    def is_running(self):
+        return self.queue.is_running
+
+    def rows(self):
+        """One row per variant: index, parameter values, then RESULT_COLUMNS."""
+        for job in self.jobs:
+            if job.state == "cancelled":
+                self.results[job.data]["state"] = "cancelled"
+        return [[index, *variant.values(), *(self.results[index][name] for name in RESULT_COLUMNS)]
+                for index, variant in enumerate(self.variants)]
+
+    def save_csv(self, path=None):
+        path = path or os.path.join(self.sweep_dir, "sweep_results.csv")
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["variant", *(parameter.label for parameter in self.parameters), *RESULT_COLUMNS])
+            writer.writerows(self.rows())
+        return path
+
+    def _finish(self):
+        path = self.save_csv()
+        self.console.write(f">>> Case sweep finished; results in {path}\n")
+        if self.on_exit is not None:
+            self.on_exit(self)
+
@@ -0,0 +1,178 @@
+import os
+import math
+import sqlite3
+import time
+
+from RunHistory import DEFAULT_PATH
+
+# Cells of each octree refinement level kept around the surface before coarsening to the next level
+SHELL_CELLS = 3
+
+# Cells relative to a cartesianMesh of the same sizes (rough; the calibration against past runs corrects them)
+MESH_TYPE_FACTORS = {"Cartesian": 1.0, "Polyhedral": 0.5, "Tetrahedral": 5.0}
+
+# cfMesh needs roughly 1 GB per million cells, plus the surface and the process itself
+BYTES_PER_CELL = 1000
+BASE_MEMORY = 200 * 1024 ** 2
+
+# Mesher throughput before any run was recorded, and how well it scales with threads (time ~ threads ** -0.8)
+CELLS_PER_SECOND = 20000
+THREAD_SCALING = 0.8
+
+# Past runs the correction and the error are taken from
+CALIBRATION_RUNS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mesh_estimates (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded       REAL NOT NULL,
+    mesh_type      TEXT NOT NULL,
+    predicted      REAL NOT NULL,
+    actual         INTEGER NOT NULL,
+    threads        INTEGER,
+    mesher_seconds REAL
+);
+"""
+
+
+def _size(values, name, default=None):
+    try:
+        value = float(values.get(name) or "")
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def _area_below(stats, size):
+    # Surface area whose triangles are smaller than size, from the log-binned area distribution
+    bins, areas = stats.get("size_bins"), stats.get("area_by_size")
+    if not bins:
+        return stats["area"] if stats["feature_size"] < size else 0.0
+    total = 0.0
+    for lower, upper, area in zip(bins, bins[1:], areas):
+        if upper <= size:
+            total += area
+        elif lower < size:
+            total += area * math.log(size / lower) / math.log(upper / lower)
+    return total
+
+
+def predict_cells(stats, values, mesh_type="Cartesian"):
+    """Cell count of a cfMesh run from the surface statistics and the meshDict sizes (uncorrected).
+
+    Octree model: the enclosed volume filled with maxCellSize cells, a shell of SHELL_CELLS cells on every
+    refinement level down to boundaryCellSize along the whole surface, further levels down to minCellSize
+    where the surface has features smaller than the current level, and nLayers boundary layers.
+    """
+    max_cell = _size(values, "maxCellSize")
+    if max_cell is None:
+        raise ValueError("maxCellSize is needed for an estimate")
+    boundary_cell = min(_size(values, "boundaryCellSize", max_cell), max_cell)
+    min_cell = min(_size(values, "minCellSize", boundary_cell), boundary_cell)
+    layers = _size(values, "nLayers", 0)
+
+    size = stats["size"]
+    volume = stats.get("volume") or size[0] * size[1] * size[2]
+    area = stats["area"]
+    cells = volume / max_cell ** 3
+
+    level_size = max_cell
+    while level_size / 2 >= boundary_cell * 0.99:
+        level_size /= 2
+        cells += SHELL_CELLS * area / level_size ** 2
+    while level_size / 2 >= min_cell * 0.99:
+        refined_area = _area_below(stats, level_size)
+        level_size /= 2
+        cells += SHELL_CELLS * refined_area / level_size ** 2
+    cells += layers * area / boundary_cell ** 2
+    return cells * MESH_TYPE_FACTORS.get(mesh_type, 1.0)
+
+
+def physical_memory():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class EstimateHistory:
+    """Predicted against actual (checkMesh) cell counts of past meshes, next to the run history.
+
+    The median ratio of the last runs of a mesh type corrects the model; the median relative error of the
+    corrected predictions is shown with every estimate.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_PATH
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+
+    def record(self, mesh_type, predicted, actual, threads=None, mesher_seconds=None):
+        self.connection.execute(
+            "INSERT INTO mesh_estimates (recorded, mesh_type, predicted, actual, threads, mesher_seconds) VALUES (?, ?, ?, ?, ?, ?)",
+            (time.time(), mesh_type, predicted, actual, threads, mesher_seconds))
+        self.connection.commit()
+
+    def runs(self, mesh_type):
+        rows = self.connection.execute(
+            "SELECT predicted, actual, threads, mesher_seconds FROM mesh_estimates "
+            "WHERE mesh_type = ? AND predicted > 0 AND actual > 0 ORDER BY recorded DESC LIMIT ?",
+            (mesh_type, CALIBRATION_RUNS))
+        return rows.fetchall()
+
+    def calibration(self, mesh_type):
+        """(correction factor, median relative error or None, cells per second per thread, number of runs)."""
+        runs = self.runs(mesh_type)
+        if not runs:
+            return 1.0, None, CELLS_PER_SECOND, 0
+        correction = math.exp(_median([math.log(actual / predicted) for predicted, actual, _, _ in runs]))
+        error = _median([abs(correction * predicted - actual) / actual for predicted, actual, _, _ in runs])
+        rates = [actual / (seconds * (threads or 1) ** THREAD_SCALING)
+                 for _, actual, threads, seconds in runs if seconds and seconds > 0]
+        return correction, error, _median(rates) if rates else CELLS_PER_SECOND, len(runs)
+
+    def close(self):
+        self.connection.close()
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def estimate_mesh(stats, values, mesh_type="Cartesian", threads=1, history=None):
+    """Cells, mesher memory and runtime for the meshDict values, corrected by the recorded runs."""
+    predicted = predict_cells(stats, values, mesh_type)
+    correction, error, rate, runs = history.calibration(mesh_type) if history else (1.0, None, CELLS_PER_SECOND, 0)
+    cells = predicted * correction
+    return {
+        "predicted": predicted,
+        "cells": cells,
+        "memory": BASE_MEMORY + BYTES_PER_CELL * cells,
+        "seconds": cells / (rate * max(threads, 1) ** THREAD_SCALING),
+        "error": error,
+        "runs": runs,
+    }
+
+
+def format_estimate(estimate):
+    text = (f"~{estimate['cells']:,.0f} cells, ~{estimate['memory'] / 1024 ** 3:.1f} GB RAM, "
+            f"~{_duration(estimate['seconds'])}")
+    if estimate["error"] is not None:
+        text += f" (typical error {100 * estimate['error']:.0f}% over {estimate['runs']} past run(s))"
+    else:
+        text += " (not calibrated yet)"
+    memory = physical_memory()
+    if memory and estimate["memory"] > 0.8 * memory:
+        text += f"\nWill not fit: this machine has {memory / 1024 ** 3:.1f} GB"
+    return text
+
+
+def _duration(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f} s"
+    if seconds < 5400:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
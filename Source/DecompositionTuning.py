@@ -0,0 +1,161 @@
+import os
+import re
+import gzip
+import shutil
+import tempfile
+
+from CaseClone import clone_tree
+from FoamDictionary import FoamDictionary
+from ParallelRun import ParallelRun, physical_core_count, write_decomposition
+from SolverLogMetrics import SolverLogMetrics
+
+# Cells-per-core band: below the lower bound communication dominates, above the upper bound cores are starved
+MIN_CELLS_PER_CORE = 10000
+TARGET_CELLS_PER_CORE = 40000
+
+CHECK_MESH_CELLS_RE = re.compile(r"^\s*cells:\s+(\d+)", re.MULTILINE)
+OWNER_CELLS_RE = re.compile(r"nCells:\s*(\d+)")
+
+
+def cell_count(case_dir, mesh_dirs=()):
+    """Cell count from log.checkMesh (case or meshing directory) or the header note of constant/polyMesh/owner."""
+    for directory in (case_dir, *mesh_dirs):
+        log_path = os.path.join(directory, "log.checkMesh") if directory else None
+        if log_path and os.path.exists(log_path):
+            with open(log_path, "r", errors="replace") as file:
+                match = CHECK_MESH_CELLS_RE.search(file.read())
+            if match:
+                return int(match.group(1))
+
+    # The owner file header carries the counts; only the first few KB are read
+    poly_mesh = os.path.join(case_dir, "constant", "polyMesh")
+    for name, opener in (("owner", open), ("owner.gz", gzip.open)):
+        owner_path = os.path.join(poly_mesh, name)
+        if os.path.exists(owner_path):
+            with opener(owner_path, "rb") as file:
+                match = OWNER_CELLS_RE.search(file.read(4096).decode("utf-8", errors="replace"))
+            if match:
+                return int(match.group(1))
+    return None
+
+
+def recommend_subdomains(cells, max_cores=None, min_cells_per_core=MIN_CELLS_PER_CORE,
+                         target_cells_per_core=TARGET_CELLS_PER_CORE):
+    """Subdomain count putting about target_cells_per_core cells on each core, never below min_cells_per_core."""
+    max_cores = max_cores or physical_core_count()
+    subdomains = max(1, round(cells / target_cells_per_core))
+    subdomains = min(subdomains, max_cores, max(1, cells // min_cells_per_core))
+    return max(1, subdomains)
+
+
+def apply_recommendation(case_dir, mesh_dirs=(), max_cores=None, method="scotch", **band):
+    """Recommend a subdomain count from the mesh size and write it into decomposeParDict; returns (cells, subdomains)."""
+    cells = cell_count(case_dir, mesh_dirs)
+    if cells is None:
+        raise FileNotFoundError("No cell count found: run checkMesh or create the mesh first.")
+    subdomains = recommend_subdomains(cells, max_cores, **band)
+    write_decomposition(case_dir, subdomains, method)
+    return cells, subdomains
+
+
+def benchmark_candidates(subdomains, max_cores=None):
+    """Two or three core counts around the recommendation worth timing."""
+    max_cores = max_cores or physical_core_count()
+    candidates = {max(2, subdomains // 2), max(2, subdomains), min(max_cores, max(2, subdomains * 2))}
+    return sorted(n for n in candidates if 2 <= n <= max_cores)
+
+
+class DecompositionBenchmark:
+    """Times a few solver iterations at each candidate core count and reports the fastest.
+
+    Every candidate runs on a throw-away copy of the case (mesh, system,
+    constant and the initial time only) with endTime cut to a handful of
+    time steps, through the same ParallelRun chain as a real run.
+    """
+
+    def __init__(self, runner, case_dir, candidates, iterations=5, method="scotch", bashrc=None, on_exit=None):
+        self.runner = runner
+        self.case_dir = case_dir
+        self.candidates = list(candidates)
+        self.iterations = iterations
+        self.method = method
+        self.bashrc = bashrc
+        self.on_exit = on_exit
+        self.results = {}  # processors -> seconds per time step
+        self.work_dir = None
+        self._current = None
+
+    def start(self):
+        self.work_dir = tempfile.mkdtemp(prefix="splash-decomposition-")
+        self._next()
+
+    def _clone(self, processors):
+        clone = os.path.join(self.work_dir, f"np{processors}")
+
+        def ignore(directory, names):
+            # Results, logs and decompositions of earlier runs are not needed to time a few steps
+            skipped = set()
+            for name in names:
+                if name.startswith(("processor", "log.")) or name in ("postProcessing", "dynamicCode"):
+                    skipped.add(name)
+                elif directory == self.case_dir:
+                    try:
+                        if float(name) > 0:
+                            skipped.add(name)
+                    except ValueError:
+                        pass
+            return skipped
+        # decomposePar only reads the mesh, so every candidate shares the case's polyMesh
+        clone_tree(self.case_dir, clone, ignore=ignore, symlink=(os.path.join("constant", "polyMesh"),))
+
+        control_dict = FoamDictionary.load(os.path.join(clone, "system", "controlDict"))
+        start_time = float(control_dict.get("startTime", "0") or 0)
+        delta_t = float(control_dict.get("deltaT", "1") or 1)
+        control_dict.set("startFrom", "startTime")
+        control_dict.set("endTime", f"{start_time + self.iterations * delta_t:g}")
+        control_dict.set("writeControl", "timeStep")
+        control_dict.set("writeInterval", self.iterations * 10)
+        control_dict.save()
+        return clone
+
+    def _next(self):
+        remaining = [n for n in self.candidates if n not in self.results]
+        if not remaining:
+            self._finish()
+            return
+        processors = remaining[0]
+        try:
+            clone = self._clone(processors)
+            self._current = ParallelRun(self.runner, clone, processors, self.method, bashrc=self.bashrc,
+                                        on_exit=lambda returncode: self._on_candidate_finished(processors, clone, returncode))
+            self._current.start()
+        except (OSError, ValueError) as e:
+            self.runner.message(f"Benchmark on {processors} cores could not start: {e}\n")
+            self.results[processors] = None
+            self._next()
+
+    def _on_candidate_finished(self, processors, clone, returncode):
+        seconds_per_step = None
+        if returncode == 0:
+            metrics = SolverLogMetrics()
+            metrics.feed_file(os.path.join(clone, f"log.{self._current.application}"))
+            # The first step carries start-up cost; time the rest
+            stats = metrics.throughput(window=self.iterations)
+            seconds_per_step = stats["seconds_per_step"] if stats else None
+        self.results[processors] = seconds_per_step
+        self.runner.message(f">>> {processors} cores: " +
+                            (f"{seconds_per_step:.4g} s/step\n" if seconds_per_step else "failed\n"))
+        self._next()
+
+    @property
+    def fastest(self):
+        timed = {n: t for n, t in self.results.items() if t}
+        return min(timed, key=timed.get) if timed else None
+
+    def _finish(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        fastest = self.fastest
+        if fastest is not None:
+            write_decomposition(self.case_dir, fastest, self.method)
+        if self.on_exit is not None:
+            self.on_exit(fastest)
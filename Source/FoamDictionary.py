@@ -0,0 +1,478 @@
+import os
+import tempfile
+import shutil
+import threading
+
+# Parsed dictionaries, keyed by absolute path -> ((mtime_ns, size), FoamDictionary)
+_parsed_cache = {}
+_cache_lock = threading.Lock()
+
+# Characters that always end a word token
+_WORD_STOPPERS = set('{};"')
+
+# Directives whose argument is another dictionary file
+_INCLUDE_DIRECTIVES = ("#include", "#includeIfPresent", "#sinclude")
+
+
+def tokenize(text):
+    """Split an OpenFOAM dictionary into (kind, text, start, end) tokens.
+
+    Comments are skipped, so the offsets are what allows edits to be written
+    back into the original text without touching anything else.
+    """
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            i += 1
+            continue
+
+        # Comments
+        if text.startswith("//", i):
+            j = text.find("\n", i)
+            i = n if j < 0 else j
+            continue
+        if text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+            continue
+
+        # Verbatim code blocks: #{ ... #}
+        if text.startswith("#{", i):
+            j = text.find("#}", i + 2)
+            end = n if j < 0 else j + 2
+            yield ("verbatim", text[i:end], i, end)
+            i = end
+            continue
+
+        # Directives (#include "file", #includeFunc ..., #inputMode merge) run to the end of the line
+        if c == "#":
+            j = text.find("\n", i)
+            end = n if j < 0 else j
+            comment = text.find("//", i, end)
+            if comment >= 0:
+                end = comment
+            line = text[i:end].rstrip()
+            yield ("directive", line, i, i + len(line))
+            i = end
+            continue
+
+        # Quoted strings (keys like "(U|k|epsilon)" or values like "CAD.stl")
+        if c == '"':
+            j = i + 1
+            while j < n and text[j] != '"':
+                j += 2 if text[j] == "\\" else 1
+            end = min(j + 1, n)
+            yield ("string", text[i:end], i, end)
+            i = end
+            continue
+
+        if c in "{}();[]":
+            yield ("punct", c, i, i + 1)
+            i += 1
+            continue
+
+        # Words; balanced parentheses are part of the word, e.g. div(phi,U)
+        j = i
+        depth = 0
+        if text.startswith("${", i):
+            close = text.find("}", i)
+            j = n if close < 0 else close + 1
+        while j < n:
+            ch = text[j]
+            if ch.isspace() or ch in _WORD_STOPPERS:
+                break
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif ch in "[]" and depth == 0:
+                break
+            elif ch == "/" and text.startswith(("//", "/*"), j):
+                break
+            j += 1
+        yield ("word", text[i:j], i, j)
+        i = j
+
+
+class FoamEntry:
+    """One entry of a dictionary: a keyword value, a sub-dictionary or a #directive."""
+
+    def __init__(self, key, kind, parent=None):
+        self.key = key
+        self.kind = kind  # "value", "dict" or "directive"
+        self.parent = parent
+        self.start = 0  # Offset of the keyword
+        self.end = 0  # Offset just past the closing ';' or '}'
+        self.value_start = 0
+        self.value_end = 0
+        self.normalized = ""  # Value tokens joined by single spaces (comments dropped)
+        self.children = {}
+
+    @property
+    def path(self):
+        keys = []
+        entry = self
+        while entry is not None and entry.key is not None:
+            keys.append(entry.key)
+            entry = entry.parent
+        return "/".join(reversed(keys))
+
+    def __repr__(self):
+        return f"FoamEntry({self.path!r}, {self.kind})"
+
+
+class FoamDictionary:
+    """Round-trippable view of an OpenFOAM dictionary file.
+
+    The file is tokenized and parsed once; lookups go through a flat index and
+    edits are staged as text replacements, so save() rewrites only the values
+    that changed and keeps comments, alignment and the banner as they were.
+    """
+
+    def __init__(self, text, path=None):
+        self.path = path
+        self._edits = {}
+        self._inserts = {}
+        self._parse(text)
+
+    # -------------------------------------------------- loading
+    @classmethod
+    def load(cls, path):
+        """Return the parsed dictionary at path, reusing the cached tree while the file is unchanged."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with _cache_lock:
+            cached = _parsed_cache.get(path)
+            if cached and cached[0] == stamp and not cached[1].modified:
+                return cached[1]
+
+        with open(path, "r", newline="") as file:
+            foam_dict = cls(file.read(), path)
+
+        with _cache_lock:
+            _parsed_cache[path] = (stamp, foam_dict)
+        return foam_dict
+
+    @staticmethod
+    def invalidate(path=None):
+        with _cache_lock:
+            if path is None:
+                _parsed_cache.clear()
+            else:
+                _parsed_cache.pop(os.path.abspath(path), None)
+
+    # -------------------------------------------------- parsing
+    def _parse(self, text):
+        self.text = text
+        self.root = FoamEntry(None, "dict")
+        self._index = {}
+        self._by_key = {}
+        tokens = list(tokenize(text))
+        self._parse_block(tokens, 0, self.root, closing=False)
+
+    def _register(self, entry):
+        entry.parent.children[entry.key] = entry
+        self._index[entry.path] = entry
+        self._by_key.setdefault(entry.key, []).append(entry)
+
+    def _parse_block(self, tokens, pos, parent, closing):
+        count = len(tokens)
+        while pos < count:
+            kind, text, start, end = tokens[pos]
+
+            if kind == "punct":
+                if text == "}" and closing:
+                    return pos
+                if text in "([":
+                    # Anonymous list (e.g. the body of a polyMesh file); skip it
+                    pos = self._skip_group(tokens, pos)
+                else:
+                    pos += 1  # Stray ';' after a sub-dictionary, e.g. "};"
+                continue
+
+            if kind == "directive":
+                name = text.split(None, 1)[0]
+                entry = FoamEntry(name, "directive", parent)
+                entry.start, entry.end = start, end
+                entry.value_start, entry.value_end = start + len(name), end
+                entry.normalized = text[len(name):].strip()
+                # Directives can repeat, so they are kept in document order but not indexed by key
+                self._by_key.setdefault(name, []).append(entry)
+                parent.children[text] = entry
+                pos += 1
+                continue
+
+            # Keyword entry
+            key = text
+            pos += 1
+            if pos < count and tokens[pos][0] == "punct" and tokens[pos][1] == "{":
+                entry = FoamEntry(key, "dict", parent)
+                entry.start = start
+                entry.value_start = tokens[pos][2]
+                self._register(entry)
+                close = self._parse_block(tokens, pos + 1, entry, closing=True)
+                if close < count:
+                    entry.value_end = entry.end = tokens[close][3]
+                    pos = close + 1
+                else:
+                    entry.value_end = entry.end = len(self.text)
+                    pos = close
+                continue
+
+            entry = FoamEntry(key, "value", parent)
+            entry.start = start
+            depth = 0
+            first = last = None
+            words = []
+            while pos < count:
+                tkind, ttext, tstart, tend = tokens[pos]
+                if tkind == "punct":
+                    if ttext == ";" and depth == 0:
+                        break
+                    if ttext == "}" and depth == 0:
+                        break  # Missing ';' before the end of the enclosing block
+                    if ttext in "([{":
+                        depth += 1
+                    elif ttext in ")]}":
+                        depth -= 1
+                if first is None:
+                    first = tstart
+                last = tend
+                words.append(ttext)
+                pos += 1
+
+            if pos < count and tokens[pos][1] == ";":
+                entry.end = tokens[pos][3]
+                semicolon = tokens[pos][2]
+                pos += 1
+            else:
+                entry.end = last if last is not None else end
+                semicolon = entry.end
+            entry.value_start = first if first is not None else semicolon
+            entry.value_end = last if last is not None else semicolon
+            entry.normalized = " ".join(words)
+            self._register(entry)
+        return pos
+
+    @staticmethod
+    def _skip_group(tokens, pos):
+        depth = 0
+        while pos < len(tokens):
+            text = tokens[pos][1]
+            if tokens[pos][0] == "punct":
+                if text in "([{":
+                    depth += 1
+                elif text in ")]}":
+                    depth -= 1
+            pos += 1
+            if depth <= 0:
+                break
+        return pos
+
+    # -------------------------------------------------- lookup
+    def entry(self, path):
+        return self._index.get(path)
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def get(self, path, default=None):
+        """Value text of the entry at a '/' separated path (e.g. "PIMPLE/nCorrectors")."""
+        entry = self._index.get(path)
+        if entry is None:
+            return default
+        return self.text[entry.value_start:entry.value_end]
+
+    def lookup(self, path, default=None):
+        """Like get(), but also searches files pulled in with #include."""
+        value = self.get(path)
+        if value is not None:
+            return value
+        for include_path in self.include_paths():
+            if os.path.isfile(include_path):
+                value = FoamDictionary.load(include_path).lookup(path)
+                if value is not None:
+                    return value
+        return default
+
+    def find_all(self, key, include_header=False):
+        """All keyword entries named key, at any depth, in document order."""
+        entries = [entry for entry in self._by_key.get(key, []) if entry.kind != "directive"]
+        if not include_header:
+            entries = [entry for entry in entries if not entry.path.startswith("FoamFile/")]
+        return entries
+
+    def values(self, keys):
+        """Map each key to the value of its last (i.e. effective) occurrence, skipping missing ones."""
+        found = {}
+        for key in keys:
+            entries = [entry for entry in self.find_all(key) if entry.kind == "value"]
+            if entries:
+                found[key] = self.text[entries[-1].value_start:entries[-1].value_end]
+        return found
+
+    def include_paths(self):
+        base = os.path.dirname(self.path) if self.path else os.getcwd()
+        paths = []
+        for directive in _INCLUDE_DIRECTIVES:
+            for entry in self._by_key.get(directive, []):
+                argument = entry.normalized.strip('"')
+                if argument:
+                    paths.append(os.path.normpath(os.path.join(base, os.path.expandvars(argument))))
+        return paths
+
+    def to_data(self, include_header=False):
+        """Nested plain-dict form of the tree with whitespace and comments normalized away."""
+        def convert(entry):
+            data = {}
+            for name, child in entry.children.items():
+                if name == "FoamFile" and entry is self.root and not include_header:
+                    continue
+                if child.kind == "dict":
+                    data[name] = convert(child)
+                elif child.kind == "directive":
+                    data[" ".join(name.split())] = ""
+                else:
+                    data[name] = child.normalized
+            return data
+        return convert(self.root)
+
+    # -------------------------------------------------- editing
+    @property
+    def modified(self):
+        return bool(self._edits or self._inserts)
+
+    def set(self, path, value):
+        """Stage a new value for path, creating the entry (and missing parent dictionaries) if needed."""
+        value = str(value)
+        entry = self._index.get(path)
+        if entry is not None:
+            if entry.kind != "value":
+                raise ValueError(f"'{path}' is a sub-dictionary and cannot be set to a value")
+            self._edits[entry] = ("value", value)
+            return
+
+        # Find the deepest existing ancestor and queue the missing part under it
+        keys = path.split("/")
+        depth = len(keys) - 1
+        while depth > 0 and "/".join(keys[:depth]) not in self._index:
+            depth -= 1
+        anchor = "/".join(keys[:depth])
+        if anchor and self._index[anchor].kind != "dict":
+            raise ValueError(f"'{anchor}' is not a sub-dictionary")
+        pending = self._inserts.setdefault(anchor, {})
+        for key in keys[depth:-1]:
+            pending = pending.setdefault(key, {})
+        pending[keys[-1]] = value
+
+    def set_all(self, key, value):
+        """Stage value for every occurrence of key; returns how many entries were changed."""
+        entries = [entry for entry in self.find_all(key) if entry.kind == "value"]
+        for entry in entries:
+            self._edits[entry] = ("value", str(value))
+        return len(entries)
+
+    def comment_out(self, entry, value=None):
+        """Turn an entry into a '// key value;' comment, optionally with a new value."""
+        if isinstance(entry, str):
+            entry = self._index[entry]
+        if value is None or value == "":
+            value = self.text[entry.value_start:entry.value_end]
+        self._edits[entry] = ("comment", str(value))
+
+    def discard(self):
+        self._edits.clear()
+        self._inserts.clear()
+
+    def _indent_of(self, offset):
+        line_start = self.text.rfind("\n", 0, offset) + 1
+        line = self.text[line_start:offset]
+        return line[:len(line) - len(line.lstrip())]
+
+    def _format_block(self, pending, indent):
+        lines = []
+        for key, value in pending.items():
+            if isinstance(value, dict):
+                lines.append(f"{indent}{key}\n{indent}{{\n")
+                lines.append(self._format_block(value, indent + "    "))
+                lines.append(f"{indent}}}\n")
+            else:
+                lines.append(f"{indent}{key} {value};\n")
+        return "".join(lines)
+
+    def _insertion(self, anchor, pending):
+        if anchor:
+            parent = self._index[anchor]
+            close = parent.end - 1
+            indent = self._indent_of(parent.start) + "    "
+            if parent.children:
+                last = list(parent.children.values())[-1]
+                indent = self._indent_of(last.start)
+            line_start = self.text.rfind("\n", 0, close) + 1
+            if self.text[line_start:close].strip() == "":
+                return line_start, self._format_block(pending, indent)
+            return close, " " + self._format_block(pending, "").replace("\n", " ")
+
+        # Top level: append after the last entry, before the closing banner comment
+        entries = [entry for entry in self.root.children.values()]
+        position = max((entry.end for entry in entries), default=len(self.text))
+        return position, "\n\n" + self._format_block(pending, "").rstrip("\n")
+
+    def render(self):
+        """Text of the file with all staged edits applied."""
+        replacements = []
+        for entry, (operation, value) in self._edits.items():
+            if operation == "value":
+                replacements.append((entry.value_start, entry.value_end, value))
+            else:
+                replacements.append((entry.start, entry.end, f"// {entry.key} {value};"))
+        for anchor, pending in self._inserts.items():
+            position, text = self._insertion(anchor, pending)
+            replacements.append((position, position, text))
+
+        pieces = []
+        cursor = 0
+        for start, end, new_text in sorted(replacements, key=lambda item: (item[0], item[1])):
+            if start < cursor:
+                continue  # Overlaps an edit that was already applied
+            pieces.append(self.text[cursor:start])
+            pieces.append(new_text)
+            cursor = end
+        pieces.append(self.text[cursor:])
+        return "".join(pieces)
+
+    def save(self, path=None):
+        """Write staged edits in one pass; returns False if there was nothing to write."""
+        path = os.path.abspath(path or self.path)
+        if not self.modified and path == self.path:
+            return False
+
+        text = self.render()
+        directory = os.path.dirname(path)
+        # Write to a temporary file and rename it into place, so a crash never leaves a half-written dictionary
+        # (and so hard-linked copies of the file are not modified behind our back)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".splash-")
+        try:
+            with os.fdopen(fd, "w", newline="") as file:
+                file.write(text)
+            if os.path.exists(path):
+                shutil.copymode(path, temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.path = path
+        self.discard()
+        self._parse(text)
+        st = os.stat(path)
+        with _cache_lock:
+            _parsed_cache[path] = ((st.st_mtime_ns, st.st_size), self)
+        return True
@@ -0,0 +1,52 @@
+import os
+import tkinter as tk
+
+
+class ImageCache:
+    """Pre-subsampled thumbnails of the GUI artwork.
+
+    Decoding the full-size PNGs and subsampling them on every start is most of
+    the cost of showing the window. The first start writes each thumbnail to
+    cache_dir; later starts decode the small file directly. Thumbnails are
+    keyed by source mtime and subsample factor, and kept in memory so every
+    widget showing the same picture shares one PhotoImage.
+    """
+
+    def __init__(self, root, cache_dir=None):
+        self.root = root
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".cache", "splashfoam", "thumbnails")
+        self._images = {}
+
+    def _thumbnail_path(self, path, subsample):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{subsample}-{os.stat(path).st_mtime_ns}.png")
+
+    def photo(self, path, subsample=1):
+        key = (os.path.abspath(path), subsample)
+        if key in self._images:
+            return self._images[key]
+
+        thumbnail_path = self._thumbnail_path(path, subsample)
+        if os.path.exists(thumbnail_path):
+            try:
+                image = tk.PhotoImage(master=self.root, file=thumbnail_path)
+                self._images[key] = image
+                return image
+            except tk.TclError:
+                pass  # Corrupt cache entry; rebuild it below
+
+        image = tk.PhotoImage(master=self.root, file=path)
+        if subsample > 1:
+            image = image.subsample(subsample, subsample)
+
+        # Write through a temporary name so a concurrent start never reads a half-written thumbnail
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{thumbnail_path}.{os.getpid()}.tmp"
+            image.write(temp_path, format="png")
+            os.replace(temp_path, thumbnail_path)
+        except (OSError, tk.TclError):
+            pass  # No cache this time; the image itself is fine
+
+        self._images[key] = image
+        return image
@@ -0,0 +1,100 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+STATES = ["", "queued", "running", "done", "failed", "cancelled", "lost"]
+TABLE_COLUMNS = [("id", 50), ("name", 180), ("state", 80), ("returncode", 80), ("started", 140), ("wall s", 80),
+                 ("cpu s", 80), ("peak MB", 80), ("cwd", 260)]
+
+
+class JobHistoryWindow:
+    """Browsable view of the RunHistory: filter by state and text, open a run's log, cancel a job.
+
+    Jobs still waiting in the JobManager's queue have no history row yet; they are listed on top as "queued".
+    """
+
+    def __init__(self, root, job_manager):
+        self.root = root
+        self.job_manager = job_manager
+        self.window = tk.Toplevel(root)
+        self.window.title("Run History")
+
+        filters = ttk.Frame(self.window)
+        filters.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        ttk.Label(filters, text="State").pack(side="left")
+        self.state_var = tk.StringVar(value="")
+        state_box = ttk.Combobox(filters, textvariable=self.state_var, values=STATES, state="readonly", width=10)
+        state_box.pack(side="left", padx=5)
+        state_box.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+        ttk.Label(filters, text="Search").pack(side="left", padx=(10, 0))
+        self.text_var = tk.StringVar()
+        search_entry = ttk.Entry(filters, textvariable=self.text_var, width=30)
+        search_entry.pack(side="left", padx=5)
+        search_entry.bind("<Return>", lambda event: self.refresh())
+        ttk.Button(filters, text="Refresh", command=self.refresh).pack(side="left", padx=5)
+        ttk.Button(filters, text="Open Log", command=self.open_log).pack(side="left", padx=5)
+        ttk.Button(filters, text="Cancel Job", command=self.cancel_job).pack(side="left", padx=5)
+
+        self.table = ttk.Treeview(self.window, columns=[name for name, _ in TABLE_COLUMNS], show="headings", height=20)
+        for name, width in TABLE_COLUMNS:
+            self.table.heading(name, text=name)
+            self.table.column(name, width=width, anchor="w" if name in ("name", "cwd") else "e")
+        scrollbar = ttk.Scrollbar(self.window, orient="vertical", command=self.table.yview)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        self.table.grid(row=1, column=0, sticky="nsew")
+        scrollbar.grid(row=1, column=1, sticky="ns")
+        self.table.bind("<Double-1>", lambda event: self.open_log())
+        self.window.grid_rowconfigure(1, weight=1)
+        self.window.grid_columnconfigure(0, weight=1)
+        self.runs = {}
+        self.queued = {}
+        self.refresh()
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        self.table.delete(*self.table.get_children())
+        self.runs = {}
+        self.queued = {}
+        state, text = self.state_var.get() or None, self.text_var.get().strip() or None
+        if state in (None, "queued"):
+            for number, job in enumerate(self.job_manager.jobs):
+                if job.state == "queued" and (text is None or text.lower() in job.name.lower()):
+                    iid = f"queued-{number}"
+                    self.queued[iid] = job
+                    self.table.insert("", "end", iid=iid, values=["", job.name, "queued", "", "", "", "", "", ""])
+        for run in self.job_manager.history.query(state=state, text=text):
+            self.runs[str(run["id"])] = run
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+            values = [run["id"], run["name"], run["state"], _cell(run["returncode"]), started,
+                      _cell(run["wall_time"], "{:.1f}"), _cell(run["cpu_time"], "{:.1f}"),
+                      _cell(run["peak_rss_kb"] / 1024 if run["peak_rss_kb"] else None, "{:.0f}"), run["cwd"] or ""]
+            self.table.insert("", "end", iid=str(run["id"]), values=values)
+
+    def _selected_run(self):
+        selection = self.table.selection()
+        return self.runs.get(selection[0]) if selection else None
+
+    def open_log(self):
+        from LogViewer import LogViewer
+
+        run = self._selected_run()
+        if run and run["log_path"]:
+            LogViewer(self.root, run["log_path"], title=f"{run['name']} (run {run['id']})", follow=run["state"] == "running")
+
+    def cancel_job(self):
+        selection = self.table.selection()
+        if selection and selection[0] in self.queued:
+            self.job_manager.cancel(self.queued[selection[0]])
+            return
+        run = self._selected_run()
+        if run is None:
+            return
+        for job in self.job_manager.jobs:
+            if job.data and job.data["run_id"] == run["id"]:
+                self.job_manager.cancel(job)
+                break
+
+
+def _cell(value, template="{}"):
+    return "" if value is None else template.format(value)
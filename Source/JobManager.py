@@ -0,0 +1,74 @@
+import os
+import shlex
+
+from JobQueue import Job, JobQueue
+from ParallelRun import physical_core_count
+from ProcessRunner import DiscardOutput, ProcessRunner
+from RunHistory import RunHistory
+
+
+class JobManager:
+    """Runs commands as tracked child processes and records every run in the RunHistory.
+
+    Jobs go through a JobQueue (cores budget, priorities, retries); each
+    attempt gets its own ProcessRunner, its output in a log file next to the
+    history database, and a history row with the exit code, wall and CPU
+    time and peak RSS. on_change() is called whenever a job starts or ends.
+    """
+
+    def __init__(self, root, history=None, max_cores=None, on_change=None):
+        self.root = root
+        self.history = history or RunHistory()
+        self.log_dir = os.path.join(os.path.dirname(self.history.path), "jobs")
+        self.on_change = on_change
+        self.queue = JobQueue(max_cores or physical_core_count())
+
+    @property
+    def jobs(self):
+        return self.queue.jobs
+
+    def submit(self, name, command, cwd=None, env=None, shell=False, cores=1, priority=0, retries=0, output=None, on_exit=None):
+        """Queue command (a list, or a string with shell=True); output receives its lines live (console), default none."""
+        def launch(job_exit):
+            os.makedirs(self.log_dir, exist_ok=True)
+            command_text = command if isinstance(command, str) else shlex.join(command)
+            run_id = self.history.record_start(name, command_text, cwd)
+            log_path = os.path.join(self.log_dir, f"{run_id}.log")
+            try:
+                self.history.set_log_path(run_id, log_path)
+                runner = ProcessRunner(self.root, output or DiscardOutput())
+                job.data = {"run_id": run_id, "log_path": log_path, "runner": runner}
+                runner.start(command, cwd=cwd, env=env, shell=shell, log_path=log_path,
+                             on_exit=lambda returncode: self._on_exit(job, runner, run_id, returncode, job_exit, on_exit))
+            except (OSError, RuntimeError, ValueError):
+                # Same failures JobQueue._start turns into exit code 127; the row must not stay "running"
+                self.history.record_finish(run_id, "failed", 127)
+                if job.attempts > job.retries and on_exit is not None:
+                    on_exit(127)
+                raise
+            self._changed()
+            return runner
+
+        job = Job(name, launch, cores=cores, priority=priority, retries=retries)
+        self.queue.submit(job)
+        self.queue.dispatch()
+        self._changed()  # A job left waiting is listed as queued
+        return job
+
+    def _on_exit(self, job, runner, run_id, returncode, job_exit, on_exit):
+        state = "cancelled" if job.state == "cancelled" else ("done" if returncode == 0 else "failed")
+        self.history.record_finish(run_id, state, returncode, runner.wall_time, runner.cpu_time, runner.peak_rss_kb)
+        # on_exit is not called between retries, only once the job is over
+        final = state != "failed" or job.attempts > job.retries
+        job_exit(returncode)
+        if final and on_exit is not None:
+            on_exit(returncode)
+        self._changed()
+
+    def cancel(self, job):
+        self.queue.cancel(job)
+        self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
@@ -0,0 +1,122 @@
+import itertools
+import time
+
+
+class Job:
+    """A unit of work for the JobQueue.
+
+    launch(on_exit) starts the work without blocking and returns a handle
+    with terminate() (a ProcessRunner, for instance); on_exit(returncode)
+    must be called on the Tk thread when the work is over.
+    """
+
+    def __init__(self, name, launch, cores=1, priority=0, retries=0, data=None):
+        self.name = name
+        self.launch = launch
+        self.cores = max(1, cores)
+        self.priority = priority  # Higher runs first
+        self.retries = retries
+        self.data = data
+        self.state = "queued"  # queued, running, done, failed, cancelled
+        self.attempts = 0
+        self.returncode = None
+        self.started = None
+        self.finished = None
+        self.handle = None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.monotonic()) - self.started
+
+
+class JobQueue:
+    """Runs queued jobs under a budget of cores, highest priority first.
+
+    Jobs of equal priority start in submission order. A job that needs more
+    cores than are free waits (smaller jobs behind it do not overtake it, so
+    large runs are never starved); a job larger than the whole budget runs
+    on its own. A failed job is put back in the queue until its retries are
+    used up.
+    """
+
+    def __init__(self, max_cores, on_job_finished=None, on_idle=None):
+        self.max_cores = max(1, max_cores)
+        self.on_job_finished = on_job_finished
+        self.on_idle = on_idle
+        self.jobs = []
+        self._order = itertools.count()
+        self._sequence = {}
+        self._idle = True
+
+    def submit(self, job):
+        self.jobs.append(job)
+        self._sequence[job] = next(self._order)
+        self._idle = False
+        return job
+
+    @property
+    def cores_in_use(self):
+        return sum(job.cores for job in self.jobs if job.state == "running")
+
+    @property
+    def is_running(self):
+        return any(job.state in ("queued", "running") for job in self.jobs)
+
+    def _waiting(self):
+        return sorted((job for job in self.jobs if job.state == "queued"),
+                      key=lambda job: (-job.priority, self._sequence[job]))
+
+    def dispatch(self):
+        while True:
+            waiting = self._waiting()
+            if not waiting:
+                break
+            job = waiting[0]
+            in_use = self.cores_in_use
+            if in_use and in_use + job.cores > self.max_cores:
+                break
+            self._start(job)
+        if not self.is_running and not self._idle:
+            self._idle = True
+            if self.on_idle is not None:
+                self.on_idle()
+
+    def _start(self, job):
+        job.state = "running"
+        job.attempts += 1
+        job.started = time.monotonic()
+        job.finished = None
+        try:
+            job.handle = job.launch(lambda returncode: self._on_exit(job, returncode))
+        except (OSError, RuntimeError, ValueError):
+            self._on_exit(job, 127, dispatch=False)
+
+    def _on_exit(self, job, returncode, dispatch=True):
+        job.returncode = returncode
+        job.finished = time.monotonic()
+        job.handle = None
+        # A cancelled job stays cancelled; its exit only frees its cores
+        if job.state == "running":
+            if returncode != 0 and job.attempts <= job.retries:
+                job.state = "queued"
+            else:
+                job.state = "done" if returncode == 0 else "failed"
+                if self.on_job_finished is not None:
+                    self.on_job_finished(job)
+        if dispatch:
+            self.dispatch()
+
+    def cancel(self, job):
+        if job.state == "queued":
+            job.state = "cancelled"
+        elif job.state == "running":
+            job.state = "cancelled"
+            if job.handle is not None:
+                job.handle.terminate()
+
+    def cancel_all(self):
+        for job in self.jobs:
+            self.cancel(job)
+        self.dispatch()
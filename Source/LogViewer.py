@@ -0,0 +1,274 @@
+import os
+import mmap
+import struct
+import hashlib
+import threading
+import tkinter as tk
+from array import array
+from tkinter import ttk
+
+import numpy as np
+
+
+class LogIndex:
+    """Sparse line index of a log file: the start offset of every CHECKPOINT_LINES-th line.
+
+    A line is found by scanning forward from the nearest checkpoint, so the index
+    stays a few hundred KB even for a multi-GB log. It is persisted beside the log
+    (".<log>.splashidx") and extended incrementally from the last indexed byte, so
+    reopening or following a growing log only ever scans the new part.
+    """
+
+    MAGIC = b"SPLASHIDX2"
+    HEADER = struct.Struct("<10sQQQQQ32s")  # magic, indexed bytes, newlines, tail offset, signed bytes, checkpoints, signature
+    SIGNATURE_BYTES = 4096
+    CHUNK_BYTES = 64 * 1024 * 1024
+    CHECKPOINT_LINES = 1024
+    SCAN_BYTES = 1024 * 1024
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+        directory, name = os.path.split(os.path.abspath(log_path))
+        self.index_path = os.path.join(directory, f".{name}.splashidx")
+        self._reset()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _reset(self):
+        self.checkpoints = array("Q", [0])  # Start of lines 0, CHECKPOINT_LINES, 2 * CHECKPOINT_LINES, ...
+        self.newlines = 0
+        self.tail_offset = 0  # Just after the last newline
+        self.indexed_bytes = 0
+        self.signed_bytes = 0
+        self.signature = b""
+
+    @property
+    def line_count(self):
+        partial = 1 if self.indexed_bytes > self.tail_offset else 0
+        return self.newlines + partial
+
+    def line_range(self, first, last):
+        """Byte span of lines [first, last), found from the nearest checkpoint."""
+        with self._lock, open(self.log_path, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            checkpoint = min(first // self.CHECKPOINT_LINES, len(self.checkpoints) - 1)
+            start = self._skip_lines(view, self.checkpoints[checkpoint], first - checkpoint * self.CHECKPOINT_LINES)
+            return start, self._skip_lines(view, start, last - first)
+
+    def _skip_lines(self, view, position, lines):
+        # Offset just after the lines-th newline from position (the indexed end if there are fewer)
+        while lines > 0 and position < self.indexed_bytes:
+            end = min(position + self.SCAN_BYTES, self.indexed_bytes)
+            found = np.flatnonzero(np.frombuffer(view[position:end], dtype=np.uint8) == 10)
+            if len(found) >= lines:
+                return position + int(found[lines - 1]) + 1
+            lines -= len(found)
+            position = end
+        return position if lines <= 0 else self.indexed_bytes
+
+    def _file_signature(self, length):
+        with open(self.log_path, "rb") as file:
+            return hashlib.sha256(file.read(length)).digest()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "rb") as file:
+                magic, indexed_bytes, newlines, tail_offset, signed_bytes, count, signature = \
+                    self.HEADER.unpack(file.read(self.HEADER.size))
+                if magic != self.MAGIC:
+                    return
+                checkpoints = array("Q")
+                checkpoints.frombytes(file.read(count * 8))
+        except (OSError, struct.error, ValueError):
+            return
+        if len(checkpoints) == count and count > 0:
+            self.checkpoints, self.indexed_bytes, self.newlines = checkpoints, indexed_bytes, newlines
+            self.tail_offset, self.signed_bytes, self.signature = tail_offset, signed_bytes, signature
+
+    def _save(self, appended_from):
+        # Checkpoints are only ever appended, so just the header and the new tail are written
+        try:
+            mode = "r+b" if appended_from > 0 and os.path.exists(self.index_path) else "wb"
+            with open(self.index_path, mode) as file:
+                file.write(self.HEADER.pack(self.MAGIC, self.indexed_bytes, self.newlines, self.tail_offset,
+                                            self.signed_bytes, len(self.checkpoints), self.signature))
+                file.seek(self.HEADER.size + appended_from * 8)
+                file.write(self.checkpoints[appended_from:].tobytes())
+                file.truncate()
+        except OSError:
+            pass  # Read-only case directory; the index just lives in memory this time
+
+    def update(self):
+        """Index whatever was appended since the last call; returns True if new lines appeared."""
+        with self._lock:
+            size = os.path.getsize(self.log_path)
+
+            # Log truncated or replaced (e.g. a re-run): start over. The signature covers the first
+            # min(size, SIGNATURE_BYTES) bytes seen last time, so short logs are checked as well
+            if size < self.indexed_bytes or (self.signed_bytes and self._file_signature(self.signed_bytes) != self.signature):
+                self._reset()
+            if size == self.indexed_bytes:
+                return False
+
+            appended_from = 0 if self.indexed_bytes == 0 else len(self.checkpoints)
+            with open(self.log_path, "rb") as file, mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as view:
+                position = self.indexed_bytes
+                while position < size:
+                    end = min(position + self.CHUNK_BYTES, size)
+                    newlines = np.flatnonzero(np.frombuffer(view[position:end], dtype=np.uint8) == 10)
+                    # Line n starts after the n-th newline; keep the starts of every CHECKPOINT_LINES-th line
+                    first = -(self.newlines + 1) % self.CHECKPOINT_LINES
+                    starts = newlines[first::self.CHECKPOINT_LINES].astype("<u8") + (position + 1)
+                    self.checkpoints.frombytes(starts.tobytes())
+                    if len(newlines):
+                        self.tail_offset = position + int(newlines[-1]) + 1
+                    self.newlines += len(newlines)
+                    position = end
+
+            self.indexed_bytes = size
+            self.signed_bytes = min(size, self.SIGNATURE_BYTES)
+            self.signature = self._file_signature(self.signed_bytes)
+            self._save(appended_from)
+            return True
+
+
+class LogViewer:
+    """Window onto a (possibly huge, possibly growing) log file.
+
+    Opens at the tail straight away, indexes the file in the background and
+    only ever loads the lines that are visible. With "Follow" on, the view
+    tracks the end of a live log.
+    """
+
+    def __init__(self, root, log_path, title=None, follow=False, visible_lines=45, poll_interval=1000):
+        self.root = root
+        self.log_path = log_path
+        self.visible_lines = visible_lines
+        self.poll_interval = poll_interval
+        self.index = LogIndex(log_path)
+        self.top_line = 0
+        self.indexed = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title or os.path.basename(log_path))
+        self.window.geometry("1000x800")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        toolbar = ttk.Frame(self.window)
+        toolbar.pack(side="top", fill="x")
+        self.follow_var = tk.BooleanVar(value=follow)
+        ttk.Checkbutton(toolbar, text="Follow", variable=self.follow_var, command=self.on_follow_toggled).pack(side="left", padx=5, pady=3)
+        ttk.Button(toolbar, text="Top", command=lambda: self.show(0)).pack(side="left", padx=5, pady=3)
+        ttk.Button(toolbar, text="Tail", command=self.show_tail).pack(side="left", padx=5, pady=3)
+        self.status_label = ttk.Label(toolbar, text="Indexing...")
+        self.status_label.pack(side="right", padx=5)
+
+        body = ttk.Frame(self.window)
+        body.pack(side="top", fill="both", expand=True)
+        self.text = tk.Text(body, wrap=tk.NONE, height=visible_lines, width=120)
+        self.text.configure(foreground="lightblue", background="black", font=("courier", 11))
+        self.scrollbar = tk.Scrollbar(body, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.text.pack(side="left", fill="both", expand=True)
+
+        # All scrolling goes through the index, never through the Text widget itself
+        self.text.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.text.bind("<Button-5>", lambda event: self.scroll(3))
+        self.window.bind("<Prior>", lambda event: self.scroll(-self.visible_lines))
+        self.window.bind("<Next>", lambda event: self.scroll(self.visible_lines))
+        self.window.bind("<Home>", lambda event: self.show(0))
+        self.window.bind("<End>", lambda event: self.show_tail())
+
+        self.show_raw_tail()
+        threading.Thread(target=self._build_index, daemon=True).start()
+        self._poll_id = None
+
+    # -------------------------------------------------- indexing
+    def _build_index(self):
+        try:
+            self.index.update()
+        except OSError as e:
+            self.root.after(0, lambda: self.status_label.config(text=f"Cannot index log: {e}"))
+            return
+        self.root.after(0, self._on_indexed)
+
+    def _on_indexed(self):
+        self.indexed = True
+        self.show_tail()
+        self._poll_id = self.window.after(self.poll_interval, self.poll)
+
+    def poll(self):
+        # Cheap stat + incremental index extension; only re-render when following the tail
+        try:
+            if os.path.getsize(self.log_path) != self.index.indexed_bytes and self.index.update():
+                if self.follow_var.get():
+                    self.show_tail()
+                else:
+                    self.update_scrollbar()
+        except OSError:
+            pass
+        self._poll_id = self.window.after(self.poll_interval, self.poll)
+
+    # -------------------------------------------------- rendering
+    def read_lines(self, first, count):
+        last = min(first + count, self.index.line_count)
+        if last <= first:
+            return ""
+        start, end = self.index.line_range(first, last)
+        with open(self.log_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            data = view[start:end]
+        return data.decode("utf-8", errors="replace")
+
+    def show_raw_tail(self):
+        # Before the index exists, show the last few KB read straight from the end of the file
+        size = os.path.getsize(self.log_path)
+        with open(self.log_path, "rb") as file:
+            file.seek(max(0, size - 200 * self.visible_lines))
+            data = file.read()
+        lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)[-self.visible_lines:]
+        self.render("".join(lines))
+
+    def render(self, content):
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("end", content)
+        self.text.configure(state="disabled")
+
+    def show(self, line):
+        if not self.indexed:
+            return
+        last_top = max(0, self.index.line_count - self.visible_lines)
+        self.top_line = max(0, min(int(line), last_top))
+        self.render(self.read_lines(self.top_line, self.visible_lines))
+        self.update_scrollbar()
+
+    def show_tail(self):
+        self.show(self.index.line_count)
+
+    def scroll(self, lines):
+        if self.follow_var.get() and lines < 0:
+            self.follow_var.set(False)  # Scrolling back stops following
+        self.show(self.top_line + lines)
+        return "break"
+
+    def update_scrollbar(self):
+        total = max(1, self.index.line_count)
+        self.scrollbar.set(self.top_line / total, min(1.0, (self.top_line + self.visible_lines) / total))
+        self.status_label.config(text=f"Lines {self.top_line + 1}-{min(total, self.top_line + self.visible_lines)} of {self.index.line_count}")
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.show(float(amount) * self.index.line_count)
+        elif action == "scroll":
+            step = self.visible_lines if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def on_follow_toggled(self):
+        if self.follow_var.get():
+            self.show_tail()
+
+    def close(self):
+        if self._poll_id is not None:
+            self.window.after_cancel(self._poll_id)
+        self.window.destroy()
@@ -0,0 +1,178 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from CaseClone import clone_file, clone_tree
+from CaseManifest import file_digest
+from FoamDictionary import FoamDictionary
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "splashfoam", "meshes")
+ENTRY_FILE = "entry.json"
+SETTINGS_FILE = "settings.json"
+DEFAULT_BUDGET_GB = 5
+
+# OpenFOAM reads points.gz, faces.gz, ... transparently, so the cached files can be linked into a case as they are
+COMPRESS_LEVEL = 6
+
+
+def mesh_key(mesh_dir, mesh_type, openfoam_version, mpi=False):
+    """Content address of a mesh: the geometry and included files by hash, the meshDict with whitespace and
+    comments normalized away, the mesh type, the OpenFOAM version and whether the mesher ran with MPI."""
+    mesh_dict = FoamDictionary.load(os.path.join(mesh_dir, "system", "meshDict"))
+    surface = (mesh_dict.get("surfaceFile") or "").strip().strip('"')
+    surface_path = os.path.join(mesh_dir, surface)
+    if not surface or not os.path.isfile(surface_path):
+        raise FileNotFoundError(f"The meshDict surfaceFile {surface or '(none)'} does not exist")
+    parts = {
+        "meshDict": mesh_dict.to_data(),
+        "surface": file_digest(surface_path),
+        "includes": {os.path.relpath(path, mesh_dir): file_digest(path)
+                     for path in mesh_dict.include_paths() if os.path.isfile(path)},
+        "mesh_type": mesh_type,
+        "openfoam": openfoam_version,
+        "mpi": bool(mpi),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def _compress(source, destination):
+    if source.endswith(".gz"):
+        shutil.copyfile(source, destination)
+        return
+    with open(source, "rb") as raw, gzip.open(destination + ".gz", "wb", compresslevel=COMPRESS_LEVEL) as packed:
+        shutil.copyfileobj(raw, packed, 1024 * 1024)
+
+
+class MeshCache:
+    """constant/polyMesh of past meshes, content-addressed by mesh_key, with least-recently-used eviction.
+
+    Each entry holds the polyMesh files gzip-compressed (and read-only) plus the mesher and checkMesh logs.
+    restore() reflinks or hard-links the files into the case, so a cache hit costs seconds and no space;
+    the read-only mode keeps a tool that rewrites a mesh file in place from changing the cached copy.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or CACHE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.budget_gb = DEFAULT_BUDGET_GB
+        try:
+            with open(os.path.join(self.directory, SETTINGS_FILE), "r") as file:
+                self.budget_gb = float(json.load(file)["budget_gb"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def set_budget(self, budget_gb):
+        self.budget_gb = float(budget_gb)
+        with open(os.path.join(self.directory, SETTINGS_FILE), "w") as file:
+            json.dump({"budget_gb": self.budget_gb}, file)
+        self.evict()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.directory, key)
+
+    def lookup(self, key):
+        entry_dir = self._entry_dir(key)
+        return entry_dir if os.path.exists(os.path.join(entry_dir, ENTRY_FILE)) else None
+
+    def snapshot(self, mesh_dir, log_names=()):
+        """Link mesh_dir/constant/polyMesh and the logs into a hidden directory in mesh_dir; returns its path.
+
+        Reflinks or hard links on the same filesystem, so this is quick enough for the Tk thread, and store() can
+        compress the snapshot while mesh_dir is cleaned and meshed again (cleaning unlinks, the snapshot keeps
+        the files).
+        """
+        snapshot_dir = tempfile.mkdtemp(dir=mesh_dir, prefix=".splash-mesh-")
+        try:
+            clone_tree(os.path.join(mesh_dir, "constant", "polyMesh"), os.path.join(snapshot_dir, "polyMesh"), link=True)
+            for name in log_names:
+                if os.path.exists(os.path.join(mesh_dir, name)):
+                    clone_file(os.path.join(mesh_dir, name), os.path.join(snapshot_dir, name), link=True)
+        except BaseException:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            raise
+        return snapshot_dir
+
+    def store(self, key, snapshot_dir, workers=None):
+        """Compress a snapshot() into the entry for key and remove the snapshot; returns the entry size in bytes."""
+        poly_mesh = os.path.join(snapshot_dir, "polyMesh")
+        log_names = sorted(name for name in os.listdir(snapshot_dir) if name != "polyMesh")
+        staging = tempfile.mkdtemp(dir=self.directory, prefix=".splash-")
+        try:
+            jobs = []
+            for root, _, files in os.walk(poly_mesh):
+                target = os.path.join(staging, "polyMesh", os.path.relpath(root, poly_mesh))
+                os.makedirs(target, exist_ok=True)
+                jobs += [(os.path.join(root, name), os.path.join(target, name)) for name in files]
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+                list(pool.map(lambda job: _compress(*job), jobs))  # zlib releases the GIL
+            for name in log_names:
+                shutil.copyfile(os.path.join(snapshot_dir, name), os.path.join(staging, name))
+
+            size = 0
+            for root, _, files in os.walk(os.path.join(staging, "polyMesh")):
+                for name in files:
+                    path = os.path.join(root, name)
+                    os.chmod(path, 0o444)
+                    size += os.path.getsize(path)
+            with open(os.path.join(staging, ENTRY_FILE), "w") as file:
+                json.dump({"key": key, "created": time.time(), "size": size, "logs": log_names,
+                           "source": os.path.dirname(os.path.abspath(snapshot_dir))}, file)
+            entry_dir = self._entry_dir(key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(staging, entry_dir)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+        self.evict(keep=key)
+        return size
+
+    def restore(self, key, mesh_dir):
+        """Link the cached polyMesh into mesh_dir/constant and copy the logs back; returns a CloneReport."""
+        entry_dir = self.lookup(key)
+        if entry_dir is None:
+            raise KeyError(key)
+        report = clone_tree(os.path.join(entry_dir, "polyMesh"), os.path.join(mesh_dir, "constant", "polyMesh"),
+                            link=True, replace=True)
+        with open(os.path.join(entry_dir, ENTRY_FILE), "r") as file:
+            entry = json.load(file)
+        for name in entry.get("logs", []):
+            if os.path.exists(os.path.join(entry_dir, name)):
+                clone_file(os.path.join(entry_dir, name), os.path.join(mesh_dir, name))
+        # The entry file's mtime is the last use, for the LRU order
+        os.utime(os.path.join(entry_dir, ENTRY_FILE))
+        return report
+
+    def entries(self):
+        """(key, size, last used) of every entry, least recently used first."""
+        found = []
+        for key in os.listdir(self.directory):
+            entry_path = os.path.join(self.directory, key, ENTRY_FILE)
+            try:
+                with open(entry_path, "r") as file:
+                    size = json.load(file)["size"]
+                found.append((key, size, os.path.getmtime(entry_path)))
+            except (OSError, ValueError, KeyError):
+                continue
+        return sorted(found, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits its budget; returns the removed keys."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for key, size, _ in entries:
+            if total <= self.budget_gb * 1024 ** 3:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+        return removed
@@ -0,0 +1,229 @@
+import os
+import shutil
+import subprocess
+import time
+
+from foam_environment import foam_environment
+from ParallelRun import physical_core_count, write_decomposition
+
+# cfMesh front-end and log file per mesh type (log names as the Allmesh* scripts wrote them)
+MESHERS = {
+    "Cartesian": ("cartesianMesh", "log.cartesianMesh"),
+    "Polyhedral": ("pMesh", "log.polyhedralMesh"),
+    "Tetrahedral": ("tetMesh", "log.tetrahedralMesh"),
+}
+
+# Used when no OpenFOAM version was selected, as the Allmesh* scripts did
+DEFAULT_BASHRC = "/usr/lib/openfoam/openfoam2306/etc/bashrc"
+
+# cfMesh only runs cartesianMesh with MPI; above this maxCellNo the GUI proposes it
+MPI_MESHERS = ("cartesianMesh",)
+MPI_CELL_THRESHOLD = 5000000
+
+
+def default_mesh_threads():
+    """OpenMP threads for cfMesh: one per physical core."""
+    return physical_core_count()
+
+
+class MeshStep:
+    """One process of the pipeline and the steps it waits for."""
+
+    def __init__(self, name, command, log_name=None, after=(), detached=False):
+        self.name = name
+        self.command = command
+        self.log_name = log_name
+        self.after = list(after)
+        self.detached = detached  # Viewer-type steps: launched and left running, nothing waits on them
+        self.state = "pending"  # pending, running, done, failed, skipped
+        self.returncode = None
+        self.error = None  # Why the step could not be started, if it could not
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class MeshPipeline:
+    """Runs a DAG of meshing steps on a pool of ProcessRunners.
+
+    A step starts the moment all the steps it depends on have exited with
+    status 0; a failed step skips everything downstream of it. Start and end
+    times are recorded per step and summarised when the pipeline is done.
+    """
+
+    def __init__(self, runners, case_dir, steps, bashrc=None, env=None, on_exit=None, subdomains=None, keep_mesh=False):
+        self.runners = list(runners)
+        self.case_dir = case_dir
+        self.steps = {step.name: step for step in steps}
+        self.bashrc = bashrc
+        self.env = env
+        self.on_exit = on_exit
+        self.subdomains = subdomains  # MPI meshing: decomposeParDict is written for preparePar
+        self.keep_mesh = keep_mesh  # constant/polyMesh is left alone by clean()
+        self.started = None
+        self._busy = {}  # runner -> step
+
+    @classmethod
+    def for_mesh_type(cls, runners, case_dir, mesh_type, export_vtk=False, export_fluent=False, view=True,
+                      threads=None, mpi_ranks=None, env=None, mesh=True, **kwargs):
+        """mesher -> checkMesh -> optional foamToVTK / foamMeshToFluent, with paraFoam opened once the mesh exists.
+
+        threads sets OMP_NUM_THREADS for the mesher. With mpi_ranks > 1 (cartesianMesh only) the mesher
+        runs as preparePar -> mpirun -np N cartesianMesh -parallel -> reconstructParMesh -constant,
+        one thread per rank. mesh=False keeps the mesh already in constant/polyMesh (restored from the
+        MeshCache) and only runs the exports and the viewer.
+        """
+        mesher, log_name = MESHERS[mesh_type]
+        env = dict(os.environ if env is None else env)
+        if not mesh:
+            steps = []
+            if view:
+                steps.append(MeshStep("paraFoam", ["paraFoam"], detached=True))
+            if export_vtk:
+                steps.append(MeshStep("foamToVTK", ["foamToVTK"], "log.foamToVTK"))
+            if export_fluent:
+                steps.append(MeshStep("foamMeshToFluent", ["foamMeshToFluent"], "log.foamMeshToFluent"))
+            return cls(runners, case_dir, steps, env=env, keep_mesh=True, **kwargs)
+        if mpi_ranks and mpi_ranks > 1:
+            if mesher not in MPI_MESHERS:
+                raise ValueError(f"{mesher} cannot run with MPI; only {', '.join(MPI_MESHERS)} can.")
+            env["OMP_NUM_THREADS"] = "1"
+            steps = [
+                MeshStep("preparePar", ["preparePar"], "log.preparePar"),
+                MeshStep(mesher, ["mpirun", "-np", str(mpi_ranks), mesher, "-parallel"], log_name, after=["preparePar"]),
+                MeshStep("reconstructParMesh", ["reconstructParMesh", "-constant"], "log.reconstructParMesh", after=[mesher]),
+            ]
+            meshed = "reconstructParMesh"
+            kwargs["subdomains"] = mpi_ranks
+        else:
+            env["OMP_NUM_THREADS"] = str(threads or default_mesh_threads())
+            steps = [MeshStep(mesher, [mesher], log_name)]
+            meshed = mesher
+
+        steps.append(MeshStep("checkMesh", ["checkMesh"], "log.checkMesh", after=[meshed]))
+        if view:
+            steps.append(MeshStep("paraFoam", ["paraFoam"], after=[meshed], detached=True))
+        if export_vtk:
+            steps.append(MeshStep("foamToVTK", ["foamToVTK"], "log.foamToVTK", after=["checkMesh"]))
+        if export_fluent:
+            steps.append(MeshStep("foamMeshToFluent", ["foamMeshToFluent"], "log.foamMeshToFluent", after=["checkMesh"]))
+        return cls(runners, case_dir, steps, env=env, **kwargs)
+
+    # -------------------------------------------------- running
+    def clean(self):
+        # Removing old mesh and logs (what the Allmesh* scripts did first)
+        for step in self.steps.values():
+            if step.log_name:
+                path = os.path.join(self.case_dir, step.log_name)
+                if os.path.exists(path):
+                    os.remove(path)
+        if self.keep_mesh:
+            return
+        for directory in (os.path.join("constant", "polyMesh"), "VTK"):
+            shutil.rmtree(os.path.join(self.case_dir, directory), ignore_errors=True)
+        for name in os.listdir(self.case_dir):
+            if name.startswith("processor"):
+                shutil.rmtree(os.path.join(self.case_dir, name), ignore_errors=True)
+
+    def start(self):
+        self.clean()
+        if self.subdomains:
+            write_decomposition(self.case_dir, self.subdomains)
+        self.started = time.monotonic()
+        self._schedule()
+
+    def _ready(self):
+        for step in self.steps.values():
+            if step.state == "pending" and all(self.steps[name].state == "done" for name in step.after):
+                yield step
+
+    def _schedule(self):
+        while True:
+            # Anything downstream of a failure will never become ready
+            for step in self.steps.values():
+                if step.state == "pending" and any(self.steps[name].state in ("failed", "skipped") for name in step.after):
+                    step.state = "skipped"
+
+            launched = False
+            for step in list(self._ready()):
+                if step.detached:
+                    self._launch_detached(step)
+                    launched = True
+                    continue
+                runner = next((runner for runner in self.runners if runner not in self._busy and not runner.is_running), None)
+                if runner is None:
+                    break
+                self._launch(runner, step)
+                launched = True
+            if not launched:
+                break
+
+        if not self._busy:
+            self._finish()
+
+    def _launch(self, runner, step):
+        step.state = "running"
+        step.started = time.monotonic()
+        self._busy[runner] = step
+        runner.message(f"\n>>> {step.name}\n")
+        log_path = os.path.join(self.case_dir, step.log_name) if step.log_name else None
+        try:
+            runner.start(step.command, cwd=self.case_dir, env=foam_environment(self.bashrc, self.env), log_path=log_path,
+                         on_exit=lambda returncode: self._on_step_finished(runner, step, returncode))
+        except (OSError, RuntimeError) as e:
+            runner.message(f"Could not start {step.name}: {e}\n")
+            step.error = str(e)
+            del self._busy[runner]
+            self._complete(step, 127)
+
+    def _launch_detached(self, step):
+        step.started = time.monotonic()
+        try:
+            subprocess.Popen(step.command, cwd=self.case_dir, env=foam_environment(self.bashrc, self.env),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            self._complete(step, 0)
+        except (OSError, RuntimeError) as e:
+            step.error = str(e)
+            self._complete(step, 127)
+
+    def _complete(self, step, returncode):
+        step.finished = time.monotonic()
+        step.returncode = returncode
+        step.state = "done" if returncode == 0 else "failed"
+
+    def _on_step_finished(self, runner, step, returncode):
+        del self._busy[runner]
+        self._complete(step, returncode)
+        self._schedule()
+
+    def terminate(self):
+        for runner in list(self._busy):
+            runner.terminate()
+
+    # -------------------------------------------------- reporting
+    @property
+    def succeeded(self):
+        return all(step.state == "done" for step in self.steps.values())
+
+    def timing_summary(self):
+        lines = ["Mesh pipeline timings:"]
+        for step in self.steps.values():
+            if step.detached:
+                continue
+            duration = f"{step.duration:8.1f} s" if step.duration is not None else f"{'-':>8}  "
+            lines.append(f"  {step.name:<18}{duration}  {step.state}")
+        if self.started is not None:
+            lines.append(f"  {'total':<18}{time.monotonic() - self.started:8.1f} s")
+        return "\n".join(lines) + "\n"
+
+    def _finish(self):
+        if self.runners:
+            self.runners[0].message("\n" + self.timing_summary())
+        if self.on_exit is not None:
+            failed = [step for step in self.steps.values() if step.state == "failed"]
+            self.on_exit(failed[0].returncode if failed else 0)
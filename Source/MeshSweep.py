@@ -0,0 +1,179 @@
+import os
+import re
+import csv
+import itertools
+
+from CaseClone import clone_tree
+from FoamDictionary import FoamDictionary
+from MeshPipeline import MeshPipeline
+from ParallelRun import physical_core_count
+from ProcessRunner import DiscardOutput, ProcessRunner
+
+SWEEP_DIR_NAME = "meshSweep"
+
+CHECK_MESH_PATTERNS = {
+    "cells": re.compile(r"^\s*cells:\s+(\d+)", re.MULTILINE),
+    "faces": re.compile(r"^\s*faces:\s+(\d+)", re.MULTILINE),
+    "points": re.compile(r"^\s*points:\s+(\d+)", re.MULTILINE),
+    "max_aspect_ratio": re.compile(r"Max aspect ratio = ([-+.\deE]+)"),
+    "max_non_orthogonality": re.compile(r"Mesh non-orthogonality Max: ([-+.\deE]+)"),
+    "max_skewness": re.compile(r"Max skewness = ([-+.\deE]+)"),
+}
+FAILED_CHECKS_RE = re.compile(r"Failed (\d+) mesh checks")
+
+RESULT_COLUMNS = ["cells", "faces", "points", "max_aspect_ratio", "max_non_orthogonality", "max_skewness", "failed_checks"]
+
+
+def parse_range(text):
+    """Values of one swept parameter: "a, b, c" or "start:stop:step" (stop included); empty means not swept."""
+    text = text.strip()
+    if not text:
+        return []
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        if step <= 0:
+            raise ValueError(f"Step must be positive in '{text}'")
+        count = int(round((stop - start) / step)) + 1
+        integer = all(part.strip().lstrip("-").isdigit() for part in text.split(":"))
+        return [int(start + i * step) if integer else round(start + i * step, 12) for i in range(count)]
+    return [part.strip() for part in text.split(",") if part.strip()]
+
+
+def parse_check_mesh(log_path):
+    """Cell counts and quality figures from a log.checkMesh; missing figures are None."""
+    results = dict.fromkeys(RESULT_COLUMNS)
+    if not os.path.exists(log_path):
+        return results
+    with open(log_path, "r", errors="replace") as file:
+        text = file.read()
+    for name, pattern in CHECK_MESH_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            results[name] = float(match.group(1)) if "." in match.group(1) or "e" in match.group(1).lower() else int(match.group(1))
+    failed = FAILED_CHECKS_RE.search(text)
+    results["failed_checks"] = int(failed.group(1)) if failed else (0 if "Mesh OK" in text else None)
+    return results
+
+
+class MeshSweep:
+    """Meshes every combination of swept meshDict values and tabulates checkMesh results.
+
+    Each variant is a copy of the meshing directory under meshSweep/ (the
+    geometry is hard-linked, not copied). Variants run concurrently, each
+    with its own ProcessRunner and MeshPipeline; the number of concurrent
+    jobs times threads_per_job never exceeds total_cores.
+    """
+
+    def __init__(self, root, console, mesh_dir, mesh_type, ranges, threads_per_job=1, total_cores=None, bashrc=None,
+                 on_variant=None, on_exit=None):
+        self.root = root
+        self.console = console
+        self.mesh_dir = mesh_dir
+        self.mesh_type = mesh_type
+        self.bashrc = bashrc
+        self.on_variant = on_variant
+        self.on_exit = on_exit
+        self.threads_per_job = max(1, threads_per_job)
+        self.total_cores = total_cores or physical_core_count()
+        self.max_jobs = max(1, self.total_cores // self.threads_per_job)
+        self.sweep_dir = os.path.join(mesh_dir, SWEEP_DIR_NAME)
+
+        self.parameters = [name for name, values in ranges.items() if values]
+        self.variants = [dict(zip(self.parameters, combination))
+                         for combination in itertools.product(*(ranges[name] for name in self.parameters))]
+        self.results = [None] * len(self.variants)
+        self._queue = list(range(len(self.variants)))
+        self._running = {}  # variant index -> MeshPipeline
+        self._cancelled = False
+        self._finished = False
+
+    def variant_dir(self, index):
+        return os.path.join(self.sweep_dir, f"variant_{index:03d}")
+
+    def _clone(self, index):
+        destination = self.variant_dir(index)
+
+        def ignore(directory, names):
+            return {name for name in names
+                    if name in (SWEEP_DIR_NAME, "VTK", "polyMesh") or name.startswith(("processor", "log.", ".splash-mesh-"))}
+
+        # Geometry can be hundreds of MB; dictionaries are rewritten atomically, so sharing the inode is safe
+        clone_tree(self.mesh_dir, destination, ignore=ignore, link=True, replace=True)
+        mesh_dict = FoamDictionary.load(os.path.join(destination, "system", "meshDict"))
+        for name, value in self.variants[index].items():
+            if not mesh_dict.set_all(name, value):
+                mesh_dict.set(name, value)
+        mesh_dict.save()
+        return destination
+
+    def start(self):
+        os.makedirs(self.sweep_dir, exist_ok=True)
+        self.console.write(f"\n>>> Mesh sweep: {len(self.variants)} variants, {self.max_jobs} at a time, "
+                           f"{self.threads_per_job} thread(s) each\n")
+        self._fill()
+
+    def _fill(self):
+        while self._queue and len(self._running) < self.max_jobs and not self._cancelled:
+            index = self._queue.pop(0)
+            try:
+                variant_dir = self._clone(index)
+                runner = ProcessRunner(self.root, DiscardOutput())
+                pipeline = MeshPipeline.for_mesh_type([runner], variant_dir, self.mesh_type, view=False,
+                                                      threads=self.threads_per_job, bashrc=self.bashrc,
+                                                      on_exit=lambda returncode, index=index: self._on_variant_finished(index, returncode))
+                self._running[index] = pipeline
+                pipeline.start()
+            except (OSError, ValueError) as e:
+                self._running.pop(index, None)
+                self.console.write(f"Variant {index}: could not start ({e})\n")
+                self.results[index] = dict.fromkeys(RESULT_COLUMNS)
+        if not self._running and (not self._queue or self._cancelled):
+            self._finish()
+
+    def _on_variant_finished(self, index, returncode):
+        pipeline = self._running.pop(index, None)
+        results = parse_check_mesh(os.path.join(self.variant_dir(index), "log.checkMesh"))
+        self.results[index] = results
+        values = ", ".join(f"{name}={value}" for name, value in self.variants[index].items())
+        status = f"{results['cells']} cells" if returncode == 0 else f"failed ({returncode})"
+        # The variant's own output is discarded, so a step that could not even start is explained here
+        failed = [step for step in (pipeline.steps.values() if pipeline else ()) if step.state == "failed"]
+        if returncode != 0 and failed:
+            status += f" in {failed[0].name}" + (f": {failed[0].error}" if failed[0].error else "")
+        self.console.write(f"Variant {index:03d} [{values}]: {status}\n")
+        if self.on_variant is not None:
+            self.on_variant(index, results)
+        # Not called directly: a pipeline that fails while starting reports back from inside _fill()
+        self.root.after(0, self._fill)
+
+    @property
+    def is_running(self):
+        return bool(self._running)
+
+    def cancel(self):
+        self._cancelled = True
+        self._queue.clear()
+        for pipeline in list(self._running.values()):
+            pipeline.terminate()
+
+    def rows(self):
+        """One row per variant: index, swept values, then RESULT_COLUMNS."""
+        return [[index, *variant.values(), *((self.results[index] or {}).get(name) for name in RESULT_COLUMNS)]
+                for index, variant in enumerate(self.variants)]
+
+    def save_csv(self, path=None):
+        path = path or os.path.join(self.sweep_dir, "sweep_results.csv")
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["variant", *self.parameters, *RESULT_COLUMNS])
+            writer.writerows(self.rows())
+        return path
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        path = self.save_csv()
+        self.console.write(f">>> Mesh sweep finished; results in {path}\n")
+        if self.on_exit is not None:
+            self.on_exit(self)
@@ -0,0 +1,211 @@
+import os
+import re
+import gzip
+
+from FoamDictionary import FoamDictionary
+from foam_environment import foam_environment
+
+DECOMPOSITION_METHODS = ["scotch", "simple", "hierarchical"]
+
+DECOMPOSE_PAR_DICT_TEMPLATE = """\
+/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+   \\\\    /   O peration     |
+    \\\\  /    A nd           |
+     \\\\/     M anipulation  |
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{
+    format      ascii;
+    class       dictionary;
+    location    "system";
+    object      decomposeParDict;
+}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+
+numberOfSubdomains 1;
+
+method          scotch;
+
+
+// ************************************************************************* //
+"""
+
+
+def physical_core_count():
+    """Number of physical cores (hyper-threads do not help an MPI solver), falling back to os.cpu_count()."""
+    try:
+        cores = set()
+        physical_id = core_id = None
+        with open("/proc/cpuinfo") as file:
+            for line in file:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id":
+                    core_id = value.strip()
+                elif not key and core_id is not None:
+                    cores.add((physical_id, core_id))
+                    physical_id = core_id = None
+        if core_id is not None:
+            cores.add((physical_id, core_id))
+        if cores:
+            return len(cores)
+    except OSError:
+        pass
+    return os.cpu_count() or 1
+
+
+def _read_points(poly_mesh):
+    # constant/polyMesh/points (ascii or binary, optionally gzipped) as an (n, 3) array
+    import numpy as np  # deferred, like every numpy user
+
+    for name, opener in (("points", open), ("points.gz", gzip.open)):
+        path = os.path.join(poly_mesh, name)
+        if os.path.exists(path):
+            with opener(path, "rb") as file:
+                data = file.read()
+            break
+    else:
+        raise FileNotFoundError(f"No points file in {poly_mesh}")
+    header_end = data.index(b"}", data.index(b"FoamFile")) + 1
+    match = re.compile(rb"(\d+)\s*\(").search(data, header_end)
+    count, start = int(match.group(1)), match.end()
+    if re.search(rb"format\s+binary", data[:header_end]):
+        dtype = "<f4" if re.search(rb"scalar=32", data[:header_end]) else "<f8"
+        return np.frombuffer(data, dtype, 3 * count, start).reshape(-1, 3)
+    values = data[start:data.rindex(b")")].translate(None, b"()").split()
+    return np.array(values, dtype=np.float64).reshape(-1, 3)
+
+
+def empty_directions(case_dir):
+    """Axes (0 = x, 1 = y, 2 = z) a 2D case is one cell thick in: those its empty patches are normal to.
+
+    Read only when constant/polyMesh/boundary has an empty patch; the points of a 2D mesh then lie on just two
+    planes along the empty direction.
+    """
+    poly_mesh = os.path.join(case_dir, "constant", "polyMesh")
+    boundary_path = os.path.join(poly_mesh, "boundary")
+    if not os.path.exists(boundary_path):
+        return ()
+    with open(boundary_path, "r", errors="replace") as file:
+        if not re.search(r"\btype\s+empty\s*;", file.read()):
+            return ()
+    points = _read_points(poly_mesh)
+    if not len(points):
+        return ()
+    low, high = points.min(axis=0), points.max(axis=0)
+    tolerance = 1e-6 * float((high - low).max())
+    return tuple(axis for axis in range(3)
+                 if ((abs(points[:, axis] - low[axis]) <= tolerance) | (abs(points[:, axis] - high[axis]) <= tolerance)).all())
+
+
+def split_subdomains(processors, empty=()):
+    """Split processors into an (nx ny nz) product for the simple/hierarchical methods, largest factor first.
+
+    Directions in empty (a 2D case's empty direction) keep a single subdomain.
+    """
+    factors = []
+    remaining = processors
+    divisor = 2
+    while divisor * divisor <= remaining:
+        while remaining % divisor == 0:
+            factors.append(divisor)
+            remaining //= divisor
+        divisor += 1
+    if remaining > 1:
+        factors.append(remaining)
+
+    # Hand the largest prime factors out to the currently smallest direction
+    axes = [axis for axis in range(3) if axis not in empty] or [0, 1, 2]
+    split = [1] * len(axes)
+    for factor in sorted(factors, reverse=True):
+        split[split.index(min(split))] *= factor
+    result = [1, 1, 1]
+    for axis, count in zip(axes, sorted(split, reverse=True)):
+        result[axis] = count
+    return tuple(result)
+
+
+def write_decomposition(case_dir, processors, method="scotch"):
+    """Write numberOfSubdomains/method (and the simple/hierarchical split) into system/decomposeParDict."""
+    dict_path = os.path.join(case_dir, "system", "decomposeParDict")
+    if not os.path.exists(dict_path):
+        with open(dict_path, "w") as file:
+            file.write(DECOMPOSE_PAR_DICT_TEMPLATE)
+
+    decompose_dict = FoamDictionary.load(dict_path)
+    decompose_dict.set("numberOfSubdomains", processors)
+    decompose_dict.set("method", method)
+    if method in ("simple", "hierarchical"):
+        try:
+            empty = empty_directions(case_dir)
+        except (OSError, ValueError, AttributeError):
+            empty = ()  # No readable mesh yet: split all three directions
+        nx, ny, nz = split_subdomains(processors, empty)
+        decompose_dict.set(f"{method}Coeffs/n", f"({nx} {ny} {nz})")
+        if method == "hierarchical" and "hierarchicalCoeffs/order" not in decompose_dict:
+            decompose_dict.set("hierarchicalCoeffs/order", "xyz")
+    decompose_dict.save()
+    return dict_path
+
+
+def solver_application(case_dir):
+    """Solver named by the application entry of system/controlDict."""
+    control_dict_path = os.path.join(case_dir, "system", "controlDict")
+    application = FoamDictionary.load(control_dict_path).get("application")
+    if not application:
+        raise ValueError(f"No application entry in {control_dict_path}")
+    return application
+
+
+class ParallelRun:
+    """decomposePar -force, then mpirun -np N <solver> -parallel, on a ProcessRunner.
+
+    Each step is started from the previous step's on_exit, so the GUI never
+    waits on a child process. The solver output (the master rank) is streamed
+    to the console and written to log.<solver>. reconstruct() runs
+    reconstructPar once the user asks for it.
+    """
+
+    def __init__(self, runner, case_dir, processors, method="scotch", bashrc=None, on_exit=None):
+        self.runner = runner
+        self.case_dir = case_dir
+        self.processors = processors
+        self.method = method
+        self.bashrc = bashrc
+        self.on_exit = on_exit
+        self.application = solver_application(case_dir)
+
+    def start(self):
+        if not os.path.isdir(os.path.join(self.case_dir, "constant", "polyMesh")):
+            raise FileNotFoundError("No mesh in constant/polyMesh. Create the mesh (or run Allrun once) before a parallel run.")
+        write_decomposition(self.case_dir, self.processors, self.method)
+        self.runner.message(f"\n>>> decomposePar -force ({self.processors} subdomains, {self.method})\n")
+        self.runner.start(["decomposePar", "-force"], cwd=self.case_dir, env=foam_environment(self.bashrc),
+                          log_path=os.path.join(self.case_dir, "log.decomposePar"), on_exit=self._on_decomposed)
+
+    def _on_decomposed(self, returncode):
+        if returncode != 0:
+            self._finish(returncode)
+            return
+        command = ["mpirun", "-np", str(self.processors), self.application, "-parallel"]
+        self.runner.message(f"\n>>> {' '.join(command)}\n")
+        try:
+            self.runner.start(command, cwd=self.case_dir, env=foam_environment(self.bashrc),
+                              log_path=os.path.join(self.case_dir, f"log.{self.application}"), on_exit=self._finish,
+                              new_session=True)  # mpirun and its ranks in one group, for SimulationStop
+        except (OSError, RuntimeError) as e:
+            self.runner.message(f"Could not start mpirun: {e}\n")
+            self._finish(127)
+
+    def reconstruct(self, on_exit=None):
+        self.runner.message("\n>>> reconstructPar\n")
+        self.runner.start(["reconstructPar"], cwd=self.case_dir, env=foam_environment(self.bashrc),
+                          log_path=os.path.join(self.case_dir, "log.reconstructPar"), on_exit=on_exit)
+
+    def _finish(self, returncode):
+        if self.on_exit is not None:
+            self.on_exit(returncode)
@@ -0,0 +1,212 @@
+import os
+import queue
+import subprocess
+import threading
+import time
+
+
+class OutputPump:
+    """Carries lines of text from worker threads into the GUI console.
+
+    Producers call push() from any thread. The Tk side drains the bounded queue
+    at a fixed frame rate and hands each batch to output.write() in one go, so a
+    chatty process can never stall the event loop.
+    """
+
+    def __init__(self, root, output, fps=25, max_lines=20000, max_batch=5000, put_timeout=0.05):
+        self.root = root
+        self.output = output
+        self.interval = max(1, int(1000 / fps))
+        self.max_batch = max_batch
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(maxsize=max_lines)
+        self.dropped_lines = 0
+        self._reported_dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._after_id = None
+
+    def push(self, line):
+        # Backpressure: wait briefly for the GUI to catch up, then drop and count the line
+        try:
+            self.queue.put(line, timeout=self.put_timeout)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped_lines += 1
+
+    def flush(self):
+        lines = []
+        try:
+            while len(lines) < self.max_batch:
+                lines.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        with self._dropped_lock:
+            dropped = self.dropped_lines - self._reported_dropped
+            self._reported_dropped = self.dropped_lines
+        if dropped:
+            lines.append(f"[... {dropped} lines dropped, display could not keep up ...]\n")
+
+        if lines:
+            self.output.write("".join(lines))
+        return not self.queue.empty()
+
+    def reset(self):
+        with self._dropped_lock:
+            self.dropped_lines = 0
+            self._reported_dropped = 0
+
+    # Self-scheduling mode, for producers that are not a single ProcessRunner
+    def start(self):
+        if self._after_id is None:
+            self._tick()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.flush()
+
+    def _tick(self):
+        self.flush()
+        self._after_id = self.root.after(self.interval, self._tick)
+
+
+class DiscardOutput:
+    # For background jobs running side by side: their output would interleave in the console, it only goes to their logs
+    def write(self, text):
+        pass
+
+
+class ProcessRunner:
+    """Runs a child process and streams its output into the GUI without blocking it.
+
+    A reader thread feeds the process output into an OutputPump; completion is
+    reported back on the Tk thread through on_exit(returncode).
+    """
+
+    def __init__(self, root, output, fps=25, max_queue_lines=20000):
+        self.root = root
+        self.pump = OutputPump(root, output, fps=fps, max_lines=max_queue_lines)
+        self.process = None
+        self.returncode = None
+        # Resource usage of the last process: wall and CPU seconds, peak resident set size in KB
+        self.wall_time = None
+        self.cpu_time = None
+        self.peak_rss_kb = None
+        self._started = None
+        self._reader = None
+        self._on_exit = None
+
+    @property
+    def is_running(self):
+        return self._reader is not None
+
+    @property
+    def dropped_lines(self):
+        return self.pump.dropped_lines
+
+    def message(self, text):
+        """Write text of our own (e.g. the command about to run) straight into the output."""
+        self.pump.output.write(text)
+
+    def start(self, command, cwd=None, env=None, on_exit=None, on_line=None, log_path=None, shell=False, new_session=False):
+        """Launch command; on_line(line) runs on the reader thread, on_exit(returncode) on the Tk thread.
+
+        With new_session the child leads its own process group, so signal_group() reaches everything it
+        starts (the solver under Allrun, every mpirun rank).
+        """
+        if self.is_running:
+            raise RuntimeError("A process is already running in this runner.")
+
+        self.process = subprocess.Popen(command, cwd=cwd, env=env, shell=shell, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1,
+                                        start_new_session=new_session)
+        self.returncode = None
+        self.wall_time = self.cpu_time = self.peak_rss_kb = None
+        self._started = time.monotonic()
+        self._on_exit = on_exit
+        self.pump.reset()
+
+        self._reader = threading.Thread(target=self._read_output, args=(self.process, on_line, log_path), daemon=True)
+        self._reader.start()
+        self.root.after(self.pump.interval, self._watch)
+        return self.process
+
+    def _read_output(self, process, on_line, log_path):
+        log_file = open(log_path, "w") if log_path else None
+        try:
+            for line in process.stdout:
+                if on_line is not None:
+                    on_line(line)
+                if log_file is not None:
+                    log_file.write(line)
+                self.pump.push(line)
+        finally:
+            if log_file is not None:
+                log_file.close()
+            process.stdout.close()
+            self.returncode = self._wait(process)
+            self.wall_time = time.monotonic() - self._started
+
+    def _wait(self, process):
+        # wait4 instead of Popen.wait: the exit status comes with the child's CPU time and peak RSS
+        if not hasattr(os, "wait4"):
+            return process.wait()
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            return process.wait()  # Already reaped by a poll() from terminate()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        self.cpu_time = usage.ru_utime + usage.ru_stime
+        self.peak_rss_kb = usage.ru_maxrss
+        return process.returncode
+
+    def _watch(self):
+        pending = self.pump.flush()
+        if self._reader.is_alive() or pending:
+            self.root.after(self.pump.interval, self._watch)
+            return
+
+        # Process finished and every line has been shown
+        self.pump.flush()
+        self._reader = None
+        if self._on_exit is not None:
+            self._on_exit(self.returncode)
+
+    def terminate(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+    def group_processes(self):
+        """(pid, command name) of the live processes in the process group of a child started with new_session (Linux)."""
+        if self.process is None or self.returncode is not None:
+            return []
+        found = []
+        try:
+            names = os.listdir("/proc")
+        except OSError:
+            return []
+        for name in names:
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat", "r") as file:
+                    stat = file.read()
+            except OSError:
+                continue  # Exited meanwhile
+            # The command name is in parentheses and may contain spaces; the process group is the 3rd field after it
+            command, fields = stat[stat.index("(") + 1:stat.rindex(")")], stat[stat.rindex(")") + 2:].split()
+            if int(fields[2]) == self.process.pid:
+                found.append((int(name), command))
+        return found
+
+    def signal_group(self, signal_number):
+        """Send a signal to the process group of a child started with new_session; False if it has already exited."""
+        if self.process is None or self.returncode is not None:
+            return False
+        try:
+            os.killpg(self.process.pid, signal_number)
+        except ProcessLookupError:
+            return False
+        return True
@@ -1,13 +1,22 @@
 import tkinter as tk
 import re
 import shutil
-import tarfile
 import os 
-from tkinter import ttk, simpledialog
+from tkinter import ttk, simpledialog, filedialog
 import subprocess
+import threading
 import pexpect
 import time
 
+from FoamDictionary import FoamDictionary
+from ParallelRun import DECOMPOSITION_METHODS, physical_core_count
+from DecompositionTuning import (DecompositionBenchmark, apply_recommendation, benchmark_candidates, cell_count,
+                                 recommend_subdomains)
+from CaseArchiver import ARCHIVE_PROFILES, CaseArchiver, case_files
+from CaseManifest import CaseManifest, LocalDirectoryRemote, delta_entries, pull_results
+from CaseSweep import SWEEP_PRESETS, SweepParameter, resolve_dictionary
+from MeshSweep import parse_range
+
 class ReplaceControlDictParameters:
     def __init__(self, parent, control_dict_params, existing_values):
         self.parent = parent
@@ -18,7 +27,7 @@ class ReplaceControlDictParameters:
 
         self.popup = tk.Toplevel(parent.root)
         self.popup.title("Update ControlDict Parameters")
-        self.popup.geometry("350x900")
+        self.popup.geometry("350x1050")
 
         # Create a label for the "ControlDict Parameters" group
         control_dict_label = ttk.Label(self.popup, text="ControlDict Parameters", font=("TkDefaultFont", 15, "bold"),
@@ -42,16 +51,46 @@ class ReplaceControlDictParameters:
         update_button = ttk.Button(self.popup, text="Update", command=self.update_control_dict_parameters)
         update_button.pack(pady=10)
         
+        # Parallel run options: decomposePar + mpirun instead of ./Allrun
+        parallel_frame = ttk.LabelFrame(self.popup, text="Parallel Run", padding=(10, 5))
+        parallel_frame.pack(pady=5, padx=10, fill="x")
+        self.parallel_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(parallel_frame, text="Run in parallel", variable=self.parallel_var).grid(row=0, column=0, columnspan=2, sticky="w")
+        ttk.Label(parallel_frame, text="Cores").grid(row=1, column=0, sticky="w")
+        # A parallel run needs two ranks at least, also on a single-core machine
+        self.processors_var = tk.IntVar(value=max(2, physical_core_count()))
+        ttk.Spinbox(parallel_frame, from_=2, to=max(2, os.cpu_count() or 2), textvariable=self.processors_var, width=6).grid(row=1, column=1, sticky="w", pady=2)
+        ttk.Label(parallel_frame, text="Method").grid(row=2, column=0, sticky="w")
+        self.method_var = tk.StringVar(value="scotch")
+        ttk.Combobox(parallel_frame, textvariable=self.method_var, values=DECOMPOSITION_METHODS, state="readonly", width=12).grid(row=2, column=1, sticky="w", pady=2)
+        ttk.Button(parallel_frame, text="Suggest", style="Small.TButton", command=self.suggest_decomposition).grid(row=3, column=0, sticky="ew", pady=2)
+        ttk.Button(parallel_frame, text="Benchmark", style="Small.TButton", command=self.benchmark_decomposition).grid(row=3, column=1, sticky="ew", pady=2)
+
         # Create a "Launch" button immediately starts the simulation 
         style = ttk.Style()
         style.configure("TButton", padding=20, relief="flat", background="lightblue", foreground="black", font=(12))  
         launch_button = ttk.Button(self.popup, text="Run Locally", command=self.launch_simulation_and_close)
         launch_button.pack(pady=10)
+
+        sweep_button = ttk.Button(self.popup, text="Parameter Sweep", command=self.open_sweep_dialog)
+        sweep_button.pack(pady=10)
         
         # Create a "Send to Cluster" button
         style.configure("Black.TButton", padding=20, relief="flat", background="black", foreground="white", font=(12))
         send_button = ttk.Button(self.popup, text="Cloud HPC", style="Black.TButton", command=self.send_to_cluster)
         send_button.pack(pady=10)
+        archive_frame = ttk.Frame(self.popup)
+        archive_frame.pack(pady=(0, 10))
+        ttk.Label(archive_frame, text="Pack").pack(side="left", padx=5)
+        self.archive_profile_var = tk.StringVar(value="setup")
+        ttk.Combobox(archive_frame, textvariable=self.archive_profile_var, values=list(ARCHIVE_PROFILES),
+                     state="readonly", width=20).pack(side="left")
+        self.delta_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.popup, text="Only files changed since last submission", variable=self.delta_var).pack()
+        ttk.Button(self.popup, text="Pull Results", style="Small.TButton", command=self.pull_results).pack(pady=5)
+        self.archiver = None
+        self.packing = False
+        self.pack_error = None
         
         # Giving the user the possibility to re-run the simulation
         self.parent.simulation_running = False
@@ -69,21 +108,192 @@ class ReplaceControlDictParameters:
         if not self.parent.openfoam_sourced:
             tk.messagebox.showerror("Error", "OpenFOAM is not sourced. Please source matching OpenFOAM version first.")
             return
+        try:
+            processors = int(self.processors_var.get()) if self.parallel_var.get() else None
+        except (tk.TclError, ValueError):
+            tk.messagebox.showerror("Error", "Please enter a valid number of cores.")
+            return
+        method = self.method_var.get()
+
         # Close the popup window
         self.popup.destroy()
         
         # Now, run the simulation
-        self.parent.run_openfoam_simulation()
+        if processors and processors > 1:
+            self.parent.run_parallel_simulation(processors, method)
+        else:
+            self.parent.run_openfoam_simulation()
+
+    def suggest_decomposition(self):
+        # Subdomain count from the mesh size (log.checkMesh or the polyMesh/owner header), written to decomposeParDict
+        try:
+            cells, subdomains = apply_recommendation(self.parent.selected_file_path, mesh_dirs=(self.parent.geometry_dest_path,),
+                                                     method=self.method_var.get())
+        except (OSError, ValueError) as e:
+            tk.messagebox.showerror("Error", f"Could not recommend a decomposition: {e}")
+            return
+        self.processors_var.set(max(2, subdomains))
+        self.parallel_var.set(subdomains > 1)
+        tk.messagebox.showinfo("Decomposition", f"{cells} cells: {subdomains} subdomain(s) recommended and written to decomposeParDict.")
+
+    def benchmark_decomposition(self):
+        if self.parent.case_runner.is_running:
+            tk.messagebox.showinfo("Busy", "Please wait for the running process to finish first.")
+            return
+        try:
+            cells = cell_count(self.parent.selected_file_path, (self.parent.geometry_dest_path,))
+            subdomains = recommend_subdomains(cells) if cells else int(self.processors_var.get())
+        except (tk.TclError, ValueError, OSError):  # OSError: unreadable log or polyMesh/owner(.gz)
+            subdomains = physical_core_count()
+        candidates = benchmark_candidates(subdomains)
+        if not candidates:
+            tk.messagebox.showinfo("Benchmark", "Not enough cores on this machine to compare parallel runs.")
+            return
+
+        self.parent.console.write(f"\n>>> Timing a few iterations on {', '.join(map(str, candidates))} cores\n")
+        benchmark = DecompositionBenchmark(self.parent.case_runner, self.parent.selected_file_path, candidates,
+                                           method=self.method_var.get(), bashrc=self.parent.selected_openfoam_path,
+                                           on_exit=self.on_benchmark_finished)
+        benchmark.start()
+
+    def on_benchmark_finished(self, fastest):
+        if fastest is None:
+            tk.messagebox.showerror("Benchmark", "None of the benchmark runs completed. Check the console output.")
+            return
+        if self.popup.winfo_exists():
+            self.processors_var.set(fastest)
+            self.parallel_var.set(True)
+        tk.messagebox.showinfo("Benchmark", f"Fastest on {fastest} cores; written to decomposeParDict.")
+
+    def open_sweep_dialog(self):
+        # Grid of solver parameters; every combination runs as its own copy of the case
+        dialog = tk.Toplevel(self.popup)
+        dialog.title("Parameter Sweep")
+        ttk.Label(dialog, text="Values as 'a, b, c' or 'start:stop:step'; leave empty to keep the case value").grid(
+            row=0, column=0, columnspan=3, padx=10, pady=(10, 5), sticky="w")
+        ttk.Label(dialog, text="Dictionary").grid(row=1, column=1, padx=5, sticky="w")
+        ttk.Label(dialog, text="Values").grid(row=1, column=2, padx=5, sticky="w")
+
+        rows = {}
+        for index, (label, (dictionary, entry, template)) in enumerate(SWEEP_PRESETS.items()):
+            ttk.Label(dialog, text=label).grid(row=index + 2, column=0, padx=10, sticky="w")
+            target_var = tk.StringVar(value=f"{resolve_dictionary(self.parent.selected_file_path, dictionary)}:{entry}")
+            values_var = tk.StringVar()
+            ttk.Entry(dialog, textvariable=target_var, width=34).grid(row=index + 2, column=1, padx=5, pady=2)
+            ttk.Entry(dialog, textvariable=values_var, width=24).grid(row=index + 2, column=2, padx=5, pady=2)
+            rows[label] = (target_var, values_var, template)
+
+        row = len(SWEEP_PRESETS) + 2
+        budget_frame = ttk.Frame(dialog)
+        budget_frame.grid(row=row, column=0, columnspan=3, padx=10, pady=5, sticky="w")
+        cores_per_case_var = tk.IntVar(value=1)
+        max_cores_var = tk.IntVar(value=physical_core_count())
+        retries_var = tk.IntVar(value=1)
+        for column, (text, var) in enumerate((("Cores per case", cores_per_case_var), ("Cores in total", max_cores_var),
+                                              ("Retries", retries_var))):
+            ttk.Label(budget_frame, text=text).grid(row=0, column=2 * column, padx=(0, 5), sticky="w")
+            ttk.Spinbox(budget_frame, from_=0 if var is retries_var else 1, to=os.cpu_count() or 1, textvariable=var,
+                        width=5).grid(row=0, column=2 * column + 1, padx=(0, 15), sticky="w")
+
+        def start():
+            try:
+                parameters = []
+                for label, (target_var, values_var, template) in rows.items():
+                    dictionary, _, entry = target_var.get().partition(":")
+                    parameters.append(SweepParameter(label, dictionary.strip(), entry.strip(), parse_range(values_var.get()), template))
+                cores_per_case, max_cores, retries = (int(var.get()) for var in (cores_per_case_var, max_cores_var, retries_var))
+            except (tk.TclError, ValueError) as e:
+                tk.messagebox.showerror("Parameter Sweep", f"Invalid input: {e}", parent=dialog)
+                return
+            dialog.destroy()
+            self.parent.start_case_sweep(parameters, cores_per_case=cores_per_case, max_cores=max_cores, retries=retries)
+
+        ttk.Button(dialog, text="Start", style="Small.TButton", command=start).grid(row=row + 1, column=0, padx=10, pady=10, sticky="w")
+        ttk.Button(dialog, text="Cancel", style="Small.TButton", command=dialog.destroy).grid(row=row + 1, column=1, padx=10, pady=10, sticky="w")
 
 # ======================================================> 
     def send_to_cluster(self):
-        # Zip the simulation directory
+        if self.packing:
+            tk.messagebox.showinfo("Busy", "The case is still being packed.")
+            return
+
+        # Hash and pack the simulation directory on a background thread (multi-threaded compression,
+        # progress in the status bar); with delta_var only files changed since the last submission are packed
         simulation_dir = self.parent.selected_file_path
-        tar_path = f"{simulation_dir}.tar.gz"
-        
-        with tarfile.open(tar_path, "w:gz") as tar:
-            tar.add(simulation_dir, arcname=os.path.basename(simulation_dir))
+        tar_path = f"{simulation_dir}{CaseArchiver.extension('gzip')}"
+        self.packing = True
+        self.archiver = self.pack_error = None
+        self.manifest = self.submitted_files = None
+        worker = threading.Thread(target=self.prepare_archive,
+                                  args=(simulation_dir, tar_path, self.archive_profile_var.get(), self.delta_var.get()), daemon=True)
+        worker.start()
+        self.poll_archiver(tar_path)
 
+    def prepare_archive(self, simulation_dir, tar_path, profile, delta):
+        try:
+            manifest = CaseManifest(simulation_dir)
+            if delta:
+                entries, changed, manifest = delta_entries(simulation_dir, profile, manifest)
+            else:
+                entries = case_files(simulation_dir, profile)
+                changed = [os.path.relpath(path, simulation_dir) for path, _ in entries if os.path.isfile(path)]
+                manifest.scan(changed)
+            manifest.save()
+            self.manifest, self.submitted_files = manifest, changed
+            if changed:
+                self.archiver = CaseArchiver(simulation_dir, tar_path, files=entries)
+                self.archiver.run()
+                self.pack_error = self.archiver.error
+        except Exception as e:
+            # Anything raised on the worker thread is reported by poll_archiver, never lost with the thread
+            self.pack_error = e
+        finally:
+            self.packing = False
+
+    def poll_archiver(self, tar_path):
+        if self.packing:
+            self.parent.status_label.config(text=self.archiver.summary() if self.archiver else "Hashing case files...")
+            self.parent.root.after(500, self.poll_archiver, tar_path)
+            return
+        if self.pack_error is not None:
+            self.parent.status_label.config(text="Packing the case failed.")
+            tk.messagebox.showerror("Error", f"Failed to pack the case: {self.pack_error}")
+            return
+        if not self.submitted_files:
+            self.parent.status_label.config(text="Nothing changed since the last submission.")
+            tk.messagebox.showinfo("Cloud HPC", "No file changed since the last submission; nothing to send.")
+            return
+        self.parent.status_label.config(text=f"{len(self.submitted_files)} files packed  |  " + self.archiver.summary())
+        manifest, submitted_files = self.manifest, self.submitted_files
+        self.submit_archive(tar_path, on_success=lambda: manifest.mark_submitted(submitted_files))
+
+    def pull_results(self):
+        # Only new or changed time directories (and postProcessing) are copied back from the remote copy of the case
+        remote_dir = filedialog.askdirectory(title="Select the remote copy of the case (mounted share)")
+        if not remote_dir:
+            return
+        self.pulled = None
+        worker = threading.Thread(target=lambda: setattr(self, "pulled", self._pull(remote_dir)), daemon=True)
+        worker.start()
+        self.parent.status_label.config(text="Comparing remote results...")
+        self.poll_pull(worker)
+
+    def _pull(self, remote_dir):
+        try:
+            return pull_results(LocalDirectoryRemote(remote_dir), self.parent.selected_file_path)
+        except OSError as e:
+            return e
+
+    def poll_pull(self, worker):
+        if worker.is_alive():
+            self.parent.root.after(500, self.poll_pull, worker)
+        elif isinstance(self.pulled, Exception):
+            tk.messagebox.showerror("Error", f"Failed to pull results: {self.pulled}")
+        else:
+            self.parent.status_label.config(text=f"{len(self.pulled)} result files fetched.")
+
+    def submit_archive(self, tar_path, on_success=None):
+        simulation_dir = self.parent.selected_file_path
         print(f"Simulation directory has been zipped to {tar_path}")
         print(f"#======================================================================>")
         
@@ -93,55 +303,45 @@ class ReplaceControlDictParameters:
         # Get the directory one level up from the selected file path
         parent_dir = os.path.dirname(self.parent.selected_file_path)
         
-        # Command to be executed
-        export_path_command = 'export PATH="/usr/local/bin:$PATH"'
-        command = f'{export_path_command} && cloudHPCexec {tar_path}'
-        
-        # Execute the command in a new terminal
-        try:
-            # The following command is for Unix-based systems. Adjust if needed for other operating systems.
-            subprocess.Popen(['gnome-terminal', '--', 'bash', '-c', f'cd {parent_dir} && {command}; exec bash'])
-            print(f"Simulation tar file {tar_path} is being sent to the cluster.")
-        except Exception as e:
-            tk.messagebox.showerror("Error", f"Failed to execute command: {e}")
+        # Upload as a tracked job (output in the console, outcome in the run history)
+        command = ["bash", "-c", 'export PATH="/usr/local/bin:$PATH" && exec cloudHPCexec "$1"', "bash", tar_path]
+
+        def on_exit(returncode):
+            if returncode == 0:
+                self.parent.status_label.config(text=f"Simulation tar file {os.path.basename(tar_path)} was sent to the cluster.")
+                if on_success is not None:
+                    on_success()
+            else:
+                tk.messagebox.showerror("Error", f"cloudHPCexec failed ({returncode}); see the console or the run history.")
+
+        self.parent.get_job_manager().submit(f"cloudHPCexec {os.path.basename(tar_path)}", command, cwd=parent_dir,
+                                             output=self.parent.console, on_exit=on_exit)
+        print(f"Simulation tar file {tar_path} is being sent to the cluster.")
+
 # ======================================================<       
 
     def replace_control_dict_parameters(self, new_values):
-        controlDict_start = 'FoamFile\n{'
-        controlDict_end = '}'
-        
-        # Extract the FoamFile block content
-        controlDict_content = re.search(f'{controlDict_start}(.*?){controlDict_end}', self.parent.selected_control_file_content, re.DOTALL).group()
+        # Parse controlDict once (cached while the file is unchanged) and stage every edited keyword
+        control_dict = FoamDictionary.load(self.parent.control_dict_file_path)
 
-        # Split the file content into header, FoamFile, and body
-        controlDict_end_position = self.parent.selected_control_file_content.find(controlDict_end, self.parent.selected_control_file_content.find(controlDict_start)) + len(controlDict_end)
-        controlDict_content = self.parent.selected_control_file_content[self.parent.selected_control_file_content.find(controlDict_start):controlDict_end_position]
-        body_content = self.parent.selected_control_file_content[controlDict_end_position:]
-
-        # Replace old values with new ones in the body content for control file parameters
         for param, entry in self.new_values.items():
             value = new_values[param]  # gets the new values from the user 
             if value != "":
-                old_pattern = f'{param}\\s*([^;]+)'
-                new_pattern = f'{param} {value}'
-
                 # Access the entry widget directly from the dictionary
                 entry_widget = self.entry_widgets[param]
                 if isinstance(entry_widget, ttk.Entry):
-                    body_content = re.sub(old_pattern, new_pattern, body_content)
-
-        # Combine the header, FoamFile, and updated body content
-        file_content = f'{self.parent.header}{controlDict_content}{body_content}'
+                    # Exact keyword match only, so "maxCo" no longer touches "maxCoNumber"
+                    control_dict.set_all(param, value)
 
         # Show a confirmation popup
         confirmation = tk.messagebox.askyesno("Confirmation", "Are you sure you want to update the file?")
         if confirmation:
-            # Write the updated content to the file
-            with open(self.parent.control_dict_file_path, 'w') as file:
-                print(f"Selected OpenFOAM case: {self.parent.selected_file_path}")  # Debug print
-                file.write(file_content)
+            # Write the updated content to the file (comments and formatting are kept as they are)
+            print(f"Selected OpenFOAM case: {self.parent.selected_file_path}")  # Debug print
+            control_dict.save()
 
             # Show a confirmation popup after updating controlDict parameters
             tk.messagebox.showinfo("Update", "ControlDict parameters updated successfully.")
         else:
+            control_dict.discard()
             tk.messagebox.showinfo("Update Canceled", "No changes were made.")
@@ -1,10 +1,22 @@
 import tkinter as tk
-import re
 import os
 import shutil
 import subprocess
 from tkinter import ttk, simpledialog, filedialog, messagebox
 
+from FoamDictionary import FoamDictionary
+from foam_environment import foam_environment
+from MeshCache import MeshCache
+from MeshPipeline import DEFAULT_BASHRC, MESHERS, MPI_MESHERS, MPI_CELL_THRESHOLD, default_mesh_threads
+from MeshSweep import parse_range
+from CaseClone import clone_tree
+from CellEstimator import EstimateHistory, estimate_mesh, format_estimate
+from ParallelRun import physical_core_count
+from SurfaceGeometry import format_statistics, sizes_fit, suggest_cell_sizes
+
+# meshDict entries offered in the sweep dialog
+SWEEP_PARAMETERS = ["minCellSize", "maxCellSize", "boundaryCellSize", "nLayers"]
+
 class ReplaceMeshParameters:
     def __init__(self, parent, mesh_params, existing_values):
         self.parent = parent
@@ -64,6 +76,29 @@ class ReplaceMeshParameters:
             checkbutton = ttk.Checkbutton(self.frame, text="Disable", variable=comment_var, style="My.TCheckbutton")
             checkbutton.grid(row=index+9, column=3, padx=10)
             self.comment_vars[param] = comment_var
+
+        # Cell sizes derived from the imported geometry; filled in when the meshDict ones are out of scale
+        self.suggested_sizes = {}
+        self.estimate_history = None
+        if getattr(parent, "geometry_stats", None):
+            self.suggested_sizes = suggest_cell_sizes(parent.geometry_stats)
+            suggestion = ", ".join(f"{param} {value:g}" for param, value in self.suggested_sizes.items())
+            note = f"Geometry: {format_statistics(parent.geometry_stats)}\nSuggested: {suggestion}"
+            if not sizes_fit(parent.geometry_stats, existing_values):
+                self.use_suggested_sizes()
+                note += "\n(the meshDict cell sizes did not fit the geometry, the suggested ones are filled in)"
+            ttk.Label(self.frame, text=note, wraplength=450, foreground="darkblue").grid(row=3, column=1, columnspan=3, padx=10, sticky="w")
+            ttk.Button(self.frame, text="Use Suggested Sizes", command=self.use_suggested_sizes).grid(row=4, column=1, padx=10, pady=5, sticky="w")
+
+            # Live cell count / memory / runtime estimate, recomputed as the sizes are edited
+            self.estimate_history = EstimateHistory()
+            self.estimate_var = tk.StringVar()
+            ttk.Label(self.frame, textvariable=self.estimate_var, wraplength=450, foreground="darkgreen").grid(
+                row=5, column=1, columnspan=3, padx=10, sticky="w")
+            for param in ("minCellSize", "maxCellSize", "boundaryCellSize", "nLayers"):
+                if param in self.new_values:
+                    self.new_values[param].trace_add("write", lambda *args: self.update_estimate())
+                    self.comment_vars[param].trace_add("write", lambda *args: self.update_estimate())
         
         # Workflow Control Frame
         workflow_frame = ttk.LabelFrame(self.frame, text="Workflow Control", padding=10)
@@ -84,12 +119,46 @@ class ReplaceMeshParameters:
             self.selected_workflow.set(last_selected_choice)
 
         # Get the existing stopAfter value from the meshDict file
-        existing_stop_after_value = self.extract_stop_after_value(parent.selected_mesh_file_content)
+        existing_stop_after_value = self.extract_stop_after_value(parent.mesh_dict_file_path)
 
         # Set the selected workflow option based on the existing stopAfter value
         if existing_stop_after_value in self.workflow_options:
             self.selected_workflow.set(existing_stop_after_value)
 
+        # Exports run after checkMesh as part of the mesh pipeline
+        export_frame = ttk.LabelFrame(self.frame, text="Exports", padding=10)
+        export_frame.grid(row=25, column=1, padx=10, pady=(0, 20), sticky="ew", columnspan=3)
+        self.export_vtk_var = tk.BooleanVar(value=False)
+        self.export_fluent_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(export_frame, text="VTK (foamToVTK)", variable=self.export_vtk_var, style="My.TCheckbutton").pack(anchor='w')
+        ttk.Checkbutton(export_frame, text="Fluent (foamMeshToFluent)", variable=self.export_fluent_var, style="My.TCheckbutton").pack(anchor='w')
+
+        # Parallel meshing: OpenMP threads for every mesher, MPI for cartesianMesh on very large meshes
+        parallel_frame = ttk.LabelFrame(self.frame, text="Parallel Meshing", padding=10)
+        parallel_frame.grid(row=26, column=1, padx=10, pady=(0, 20), sticky="ew", columnspan=3)
+        ttk.Label(parallel_frame, text="Threads / MPI ranks").grid(row=0, column=0, sticky="w")
+        self.threads_var = tk.IntVar(value=default_mesh_threads())
+        ttk.Spinbox(parallel_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.threads_var, width=6).grid(row=0, column=1, padx=10, sticky="w")
+        self.mpi_var = tk.BooleanVar(value=self.suggest_mpi())
+        mpi_checkbutton = ttk.Checkbutton(parallel_frame, text="MPI (cartesianMesh -parallel)", variable=self.mpi_var, style="My.TCheckbutton")
+        mpi_checkbutton.grid(row=1, column=0, columnspan=2, sticky="w")
+        if MESHERS.get(self.parent.mesh_type, ("",))[0] not in MPI_MESHERS:
+            mpi_checkbutton.state(["disabled"])
+
+        # Mesh cache: an unchanged geometry + meshDict restores the earlier mesh instead of meshing again
+        cache_frame = ttk.LabelFrame(self.frame, text="Mesh Cache", padding=10)
+        cache_frame.grid(row=27, column=1, padx=10, pady=(0, 20), sticky="ew", columnspan=3)
+        self.cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(cache_frame, text="Reuse an identical earlier mesh", variable=self.cache_var, style="My.TCheckbutton").grid(
+            row=0, column=0, columnspan=2, sticky="w")
+        ttk.Label(cache_frame, text="Disk budget (GB)").grid(row=1, column=0, sticky="w")
+        self.cache_budget_var = tk.DoubleVar(value=MeshCache().budget_gb)
+        ttk.Spinbox(cache_frame, from_=0, to=1000, increment=1, textvariable=self.cache_budget_var, width=6).grid(row=1, column=1, padx=10, sticky="w")
+
+        if self.estimate_history is not None:
+            self.threads_var.trace_add("write", lambda *args: self.update_estimate())
+            self.update_estimate()
+
         # Stying the meshing buttons!
         style = ttk.Style()
         # Assuming you have already created a professional style for the buttons
@@ -122,7 +191,69 @@ class ReplaceMeshParameters:
 
         close_button = ttk.Button(self.frame, text="Close", command=self.close_replace_mesh_parameters, style="Professional.TButton")
         close_button.grid(row=93, column=2, pady=5, padx=7, sticky="w")
+
+        sweep_button = ttk.Button(self.frame, text="Sweep", command=self.open_sweep_dialog, style="Professional.TButton")
+        sweep_button.grid(row=94, column=1, pady=5, padx=7, sticky="nw")
         
+    def update_estimate(self):
+        values = {param: "" if self.comment_vars[param].get() else var.get() for param, var in self.new_values.items()}
+        try:
+            threads = max(1, int(self.threads_var.get()))
+        except (tk.TclError, ValueError):
+            threads = 1
+        try:
+            estimate = estimate_mesh(self.parent.geometry_stats, values, self.parent.mesh_type, threads, self.estimate_history)
+        except ValueError as e:
+            self.estimate_var.set(f"Estimate: {e}")
+            return
+        self.estimate_var.set(f"Estimate: {format_estimate(estimate)}")
+
+    def use_suggested_sizes(self):
+        for param, value in self.suggested_sizes.items():
+            if param in self.new_values:
+                self.new_values[param].set(f"{value:g}")
+
+    def suggest_mpi(self):
+        # Propose MPI meshing when the meshDict allows a very large number of cells
+        if MESHERS.get(self.parent.mesh_type, ("",))[0] not in MPI_MESHERS:
+            return False
+        try:
+            max_cell_no = FoamDictionary.load(self.parent.mesh_dict_file_path).get("maxCellNo")
+            return max_cell_no is not None and float(max_cell_no) >= MPI_CELL_THRESHOLD
+        except (OSError, ValueError):
+            return False
+
+    def open_sweep_dialog(self):
+        # Ranges for a mesh-independence study; every combination is meshed from the current meshDict
+        dialog = tk.Toplevel(self.parent.root)
+        dialog.title("Mesh Sweep")
+        ttk.Label(dialog, text="Values as 'a, b, c' or 'start:stop:step'; leave empty to keep the meshDict value").grid(
+            row=0, column=0, columnspan=2, padx=10, pady=(10, 5), sticky="w")
+
+        range_vars = {}
+        for index, param in enumerate(SWEEP_PARAMETERS):
+            ttk.Label(dialog, text=param, style="My.TLabel").grid(row=index + 1, column=0, padx=10, sticky="w")
+            range_vars[param] = tk.StringVar()
+            ttk.Entry(dialog, textvariable=range_vars[param], style="My.TEntry", width=30).grid(row=index + 1, column=1, padx=10, sticky="w")
+
+        row = len(SWEEP_PARAMETERS) + 1
+        ttk.Label(dialog, text="Threads per variant", style="My.TLabel").grid(row=row, column=0, padx=10, sticky="w")
+        threads_var = tk.IntVar(value=1)
+        ttk.Spinbox(dialog, from_=1, to=physical_core_count(), textvariable=threads_var, width=6).grid(row=row, column=1, padx=10, sticky="w")
+
+        def start():
+            try:
+                ranges = {param: parse_range(var.get()) for param, var in range_vars.items()}
+                threads = max(1, int(threads_var.get()))
+            except (tk.TclError, ValueError) as e:
+                tk.messagebox.showerror("Mesh Sweep", f"Invalid range: {e}", parent=dialog)
+                return
+            dialog.destroy()
+            self.parent.start_mesh_sweep(ranges, threads_per_job=threads)
+
+        ttk.Button(dialog, text="Start", command=start, style="Professional.TButton").grid(row=row + 1, column=0, padx=10, pady=10, sticky="w")
+        ttk.Button(dialog, text="Cancel", command=dialog.destroy, style="Professional.TButton").grid(row=row + 1, column=1, padx=10, pady=10, sticky="w")
+
     # ...............................................................................
     # Saving the created mesh (polyMesh dir) to a specific location 
     def save_mesh(self):
@@ -138,13 +269,11 @@ class ReplaceMeshParameters:
                 # Define the destination path including the polyMesh folder name
                 destination_path = os.path.join(target_directory, "polyMesh")
                 
-                # Check if destination path already exists to avoid shutil.copytree error
-                if os.path.exists(destination_path):
-                    shutil.rmtree(destination_path)  # Remove the existing directory to replace it
-                
-                # Copy the entire polyMesh folder to the new location
-                shutil.copytree(source_directory, destination_path)
-                messagebox.showinfo("Success", "Mesh saved successfully!")
+                # Clone the polyMesh folder (replacing an existing one): reflinks where the filesystem allows,
+                # a parallel copy otherwise. No hard links: tools such as renumberMesh -overwrite rewrite the
+                # mesh files in place, which would change the Meshing copy too.
+                report = clone_tree(source_directory, destination_path, replace=True)
+                messagebox.showinfo("Success", f"Mesh saved successfully!\n{report.summary()}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save mesh: {e}")
 
@@ -154,19 +283,20 @@ class ReplaceMeshParameters:
         try:
             working_directory = self.parent.geometry_dest_path
             
-            # Combine the source and command in a single call
-            command = ['bash', '-c', 'source /usr/lib/openfoam/openfoam2306/etc/bashrc && foamMeshToFluent']
+            # Run in the selected OpenFOAM environment (captured once and cached), not through a sourcing shell
+            env = foam_environment(self.parent.selected_openfoam_path or DEFAULT_BASHRC)
             
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=working_directory)
+            process = subprocess.Popen(['foamMeshToFluent'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                       cwd=working_directory, env=env)
             output, error = process.communicate()
             
             # Display the command's output and error in the text_box
             if output:
-                self.parent.text_box.insert(tk.END, "Output:\n" + output)
+                self.parent.console.write("Output:\n" + output)
             if error:
-                self.parent.text_box.insert(tk.END, "\nError:\n" + error)
+                self.parent.console.write("\nError:\n" + error)
         except Exception as e:
-            self.parent.text_box.insert(tk.END, "Failed to run foamMeshToFluent: " + str(e))
+            self.parent.console.write("Failed to run foamMeshToFluent: " + str(e) + "\n")
     # ...............................................................................
     
     # ........................Remove Mesh.................................
@@ -207,12 +337,10 @@ class ReplaceMeshParameters:
             messagebox.showinfo("Cancelled", "Mesh deletion cancelled.")
     # ........................Remove Mesh.................................
                         
-    def extract_stop_after_value(self, mesh_file_content):
+    def extract_stop_after_value(self, mesh_dict_file_path):
         # Extract the stopAfter value from the workflowControl block in the meshDict file
-        match = re.search(r'workflowControl\s*{[^}]*stopAfter\s+(\w+);', mesh_file_content, re.DOTALL)
-        if match:
-            return match.group(1)
-        return ""
+        mesh_dict = FoamDictionary.load(mesh_dict_file_path)
+        return mesh_dict.get("workflowControl/stopAfter", "")
 
     def load_last_selected_choice(self):
         # Check if a configuration file with the last selected choice exists
@@ -234,9 +362,6 @@ class ReplaceMeshParameters:
             config_file.write(choice)
 
     def update_mesh_parameters(self):
-    
-        # Initialize body_content
-        body_content = self.parent.selected_mesh_file_content
 
         # Get the new values from the entry fields
         new_values = {param: entry.get() for param, entry in self.new_values.items()}
@@ -247,95 +372,71 @@ class ReplaceMeshParameters:
         # Save the selected choice as the last selected choice
         self.save_last_selected_choice(selected_workflow_step)
 
+        # Parse meshDict once; every change below is staged on the same tree and written in one go
+        mesh_dict = FoamDictionary.load(self.parent.mesh_dict_file_path)
+
         # Update the stopAfter value in the meshDict file
-        self.replace_stop_after_value(selected_workflow_step)
-        
-        # Update mesh parameters (you need to implement this part based on your application's needs)
-        self.replace_mesh_parameters(new_values)
+        self.replace_stop_after_value(mesh_dict, selected_workflow_step)
         
-        # Initialize body_content with the latest file content
-        with open(self.parent.mesh_dict_file_path, 'r') as file:
-            body_content = file.read()
-
-        # Get the new values from the entry fields and apply them
-        for param, entry_var in self.new_values.items():
-            value = entry_var.get()  # gets the new values from the user 
-            if value != "":
-                old_pattern = f'{param}\\s*([^;]+);'
-                new_pattern = f'{param} {value};'
-                body_content = re.sub(old_pattern, new_pattern, body_content)
-
-        # Apply commenting logic
-        for param, var in self.comment_vars.items():
-            if var.get():
-                # If the checkbutton is checked, comment out the parameter in the file content
-                pattern = f'(?m)^\s*{param}\s+[^;]+;'
-                replacement = f'// {param} {self.new_values[param].get()};'
-                body_content = re.sub(pattern, replacement, body_content)
+        # Update mesh parameters (and comment out the disabled ones)
+        self.replace_mesh_parameters(mesh_dict, new_values)
 
         # Write the updated content to the file
-        with open(self.parent.mesh_dict_file_path, 'w') as file:
-            file.write(body_content)
+        mesh_dict.save()
+        self.parent.selected_mesh_file_content = mesh_dict.text
             
         # Maybe give a hint something was updated 
         self.parent.status_label.config(text="Mesh parameters' values are updated successfully!")
 
-    def replace_mesh_parameters(self, new_values):
-        meshdict_start = 'FoamFile\n{'
-        meshdict_end = '}'
-        
-        # Extract the FoamFile block content
-        meshdict_content = re.search(f'{meshdict_start}(.*?){meshdict_end}', self.parent.selected_mesh_file_content, re.DOTALL).group()
-
-        # Split the file content into header, FoamFile, and body
-        meshdict_end_position = self.parent.selected_mesh_file_content.find(meshdict_end, self.parent.selected_mesh_file_content.find(meshdict_start)) + len(meshdict_end)
-        meshdict_content = self.parent.selected_mesh_file_content[self.parent.selected_mesh_file_content.find(meshdict_start):meshdict_end_position]
-        body_content = self.parent.selected_mesh_file_content[meshdict_end_position:]
+        # Show a confirmation popup after ReplaceMeshParameters finishes
+        confirmation = tk.messagebox.askyesno("Confirmation", "Do you want to start meshing?")
+        if confirmation:
+            # Start meshing!
+            try:
+                threads = max(1, int(self.threads_var.get()))
+            except (tk.TclError, ValueError):
+                threads = default_mesh_threads()
+            try:
+                cache = MeshCache()
+                if float(self.cache_budget_var.get()) != cache.budget_gb:
+                    cache.set_budget(self.cache_budget_var.get())
+            except (tk.TclError, ValueError, OSError):
+                pass
+            self.parent.start_meshing(export_vtk=self.export_vtk_var.get(), export_fluent=self.export_fluent_var.get(),
+                                      threads=threads, mpi_ranks=threads if self.mpi_var.get() else None,
+                                      use_cache=self.cache_var.get())   # Start the meshing process
+        else:
+            tk.messagebox.showinfo("Meshing Canceled", "No mesh will be created.")
 
-        # Replace old values with new ones in the body content for mesh parameters
+    def replace_mesh_parameters(self, mesh_dict, new_values):
+        # Replace old values with new ones for mesh parameters (exact keyword matches at any depth)
         for param, entry in self.new_values.items():
             value = new_values[param]  # gets the new values from the user 
             if value != "":
-                old_pattern = f'{param}\\s*([^;]+)'
-                new_pattern = f'{param} {value}'
-
                 # Access the entry widget directly from the dictionary
                 entry_widget = self.entry_widgets[param]
                 if isinstance(entry_widget, ttk.Entry):
-                    body_content = re.sub(old_pattern, new_pattern, body_content)
-
-        # Combine the header, FoamFile, and updated body content
-        file_content = f'{self.parent.header}{meshdict_content}{body_content}'
-
-        # Write the updated content to the file
-        with open(self.parent.mesh_dict_file_path, 'w') as file:
-            file.write(file_content)
+                    mesh_dict.set_all(param, value)
 
-    def replace_stop_after_value(self, selected_workflow_step):
-        # Read the content of the meshDict file
-        with open(self.parent.mesh_dict_file_path, 'r') as file:
-            file_content = file.read()
+        # Apply commenting logic
+        for param, var in self.comment_vars.items():
+            if var.get():
+                # If the checkbutton is checked, comment out the parameter in the file content
+                for entry in mesh_dict.find_all(param):
+                    if entry.kind == "value":
+                        mesh_dict.comment_out(entry, new_values[param])
 
+    def replace_stop_after_value(self, mesh_dict, selected_workflow_step):
         # Replace the old stopAfter value with the new one
-        updated_content = re.sub(r'workflowControl\s*{[^}]*stopAfter\s+\w+;', f'workflowControl\n{{\n    stopAfter {selected_workflow_step};', file_content, flags=re.DOTALL)
-
-        # Write the updated content back to the file
-        with open(self.parent.mesh_dict_file_path, 'w') as file:
-            file.write(updated_content)
-
-        self.parent.status_label.config(text="Mesh parameters' values are updated successfully!")
-
-        # Show a confirmation popup after ReplaceMeshParameters finishes
-        confirmation = tk.messagebox.askyesno("Confirmation", "Do you want to start meshing?")
-        if confirmation:
-            # Start meshing!
-            self.parent.start_meshing()   # Start the meshing process
-        else:
-            tk.messagebox.showinfo("Meshing Canceled", "No mesh will be created.")
+        if selected_workflow_step:
+            mesh_dict.set("workflowControl/stopAfter", selected_workflow_step)
             
     def close_replace_mesh_parameters(self):
         # Functionality to close/hide the ReplaceMeshParameters frame
         # This could be simply hiding the frame, resetting its state, etc.
+        if self.estimate_history is not None:
+            self.estimate_history.close()
+            self.estimate_history = None
         self.canvas.grid_forget()  # Hide the canvas
         self.v_scrollbar.grid_forget()  # Hide the vertical scrollbar
         self.h_scrollbar.grid_forget()  # Hide the horizontal scrollbar
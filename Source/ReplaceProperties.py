@@ -1,8 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
-import re
 from tkinter import simpledialog, messagebox
 
+from FoamDictionary import FoamDictionary
+
 class ReplacePropertiesPopup:
     def __init__(self, parent, thermo_type_params, mixture_params, old_values_thermo_type, old_values_mixture):
         self.parent = parent
@@ -50,60 +51,49 @@ class ReplacePropertiesPopup:
 
         
     def replace_mixture_values(self):
-        file_content = self.parent.selected_file_content
-
-        # Define the lines to be preserved
-        foamfile_start = 'FoamFile\n{'
-        foamfile_end = '}'
-
-        # Extract the FoamFile block content
-        foamfile_content = re.search(f'{foamfile_start}(.*?){foamfile_end}', file_content, re.DOTALL).group()
-
-        # Split the file content into header, FoamFile, and body
-        foamfile_end_position = file_content.find(foamfile_end, file_content.find(foamfile_start)) + len(foamfile_end)
-        foamfile_content = file_content[file_content.find(foamfile_start):foamfile_end_position]
-        body_content = file_content[foamfile_end_position:]
+        # Parse the physicalProperties file once (cached while the file is unchanged)
+        properties_dict = FoamDictionary.load(self.parent.selected_file_path)
 
-        # Replace old values with new ones in the body content for the mixture block
+        # Replace old values with new ones for the mixture block (exact keywords, so "rho" leaves "rho0" alone)
         for param, entry in self.new_values_mixture.items():
             value = entry.get() # gets the new values from the user 
             if value != "":
-                old_pattern = f'{param}\\s*([^;]+)'
-                new_pattern = f'{param} {value}'
-                body_content = re.sub(old_pattern, new_pattern, body_content)
+                properties_dict.set_all(param, value)
 
-        # Combine the header, FoamFile, and updated body content
-        file_content = f'{self.parent.header}{foamfile_content}{body_content}'
-        
         # Show a confirmation popup
         confirmation = tk.messagebox.askyesno("Confirmation", "Are you sure you want to update the file?")
         if confirmation:
             # Write the updated content to the file
-            with open(self.parent.selected_file_path, 'w') as file:
-                file.write(file_content)
+            properties_dict.save()
+            self.parent.selected_file_content = properties_dict.text
 
             self.parent.status_label.config(text="Values replaced successfully")
             tk.messagebox.showinfo("Update", "Mixture block updated successfully.")
             self.popup.destroy()
         else:
+            properties_dict.discard()
             tk.messagebox.showinfo("Update Canceled", "No changes were made.")
             
     def add_missing_parameters(self):
+        properties_dict = FoamDictionary.load(self.parent.selected_file_path)
+
         added_values = {}
         for prop in self.mixture_params:
+            if properties_dict.find_all(prop):
+                continue  # Already defined in the file
             value = simpledialog.askstring("Add Missing Parameter", f"Enter value for {prop}:")
             if value is not None:
                 added_values[prop] = value
 
         if added_values:
-            file_content = self.selected_file_content
+            # New keywords go at the end of the mixture block when there is one
+            scope = "mixture/" if "mixture" in properties_dict else ""
             for prop, value in added_values.items():
-                file_content += f'\n{prop} {value};'
-
-            with open(self.selected_file_path, 'a') as file:
-                file.write(file_content)
+                properties_dict.set(f"{scope}{prop}", value)
+            properties_dict.save()
+            self.parent.selected_file_content = properties_dict.text
 
-            self.status_label.config(text="Parameters added successfully")
+            self.parent.status_label.config(text="Parameters added successfully")
 
 if __name__ == "__main__":
     # Code to instantiate and run the ReplacePropertiesPopup class if this script is run 
@@ -1,8 +1,9 @@
 import tkinter as tk
 import os
-import re
 from tkinter import ttk, simpledialog, messagebox
 
+from FoamDictionary import FoamDictionary
+
 class ReplaceSimulationSetupParameters:
     def __init__(self, parent, constant_params, system_params, existing_values):
         self.parent = parent
@@ -112,32 +113,14 @@ class ReplaceSimulationSetupParameters:
                 for file_name, param_list in file_params.items():
                     file_path = os.path.join(self.parent.selected_file_path, directory, file_name)
                     if os.path.exists(file_path):
-                        with open(file_path, 'r') as file:
-                            # Read the existing content
-                            file_content = file.read()
-
-                        # Define the lines to be preserved
-                        foamfile_start = 'FoamFile\n{'
-                        foamfile_end = '}'
-
-                        # Extract the FoamFile block content
-                        foamfile_content = re.search(f'{foamfile_start}(.*?){foamfile_end}', file_content, re.DOTALL).group()
+                        # One parse per file; all of its parameters are staged on the same tree
+                        foam_dict = FoamDictionary.load(file_path)
 
-                        # Split the file content into header, FoamFile, and body
-                        foamfile_end_position = file_content.find(foamfile_end, file_content.find(foamfile_start)) + len(foamfile_end)
-                        foamfile_content = file_content[file_content.find(foamfile_start):foamfile_end_position]
-                        body_content = file_content[foamfile_end_position:]
-
-                        # Replace old values with new ones in the body content
+                        # Replace old values with new ones (exact keywords, so "nu" leaves "nuTilda" alone)
                         for param_name in param_list:
-                            old_pattern = f'{param_name}\\s*([^;]+)'
-                            new_pattern = f'{param_name} {new_values.get(param_name, "")}'
-                            body_content = re.sub(old_pattern, new_pattern, body_content)
-
-                        # Combine the header, FoamFile, and updated body content
-                        file_content = f'{self.parent.header}{foamfile_content}{body_content}'
-
-                        # Write the updated content back to the file
-                        with open(file_path, 'w') as file:
-                            file.write(file_content)
+                            value = new_values.get(param_name, "")
+                            if value != "":
+                                foam_dict.set_all(param_name, value)
 
+                        # Write the updated content back to the file (only if something changed)
+                        foam_dict.save()
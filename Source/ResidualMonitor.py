@@ -0,0 +1,223 @@
+import os
+import glob
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+
+def find_residual_files(case_dir):
+    """Residual files of a case, oldest start time first (solverInfo.dat on ESI, residuals.dat on Foundation)."""
+    residuals_dir = os.path.join(case_dir, "postProcessing", "residuals")
+    files = []
+    for name in ("solverInfo*.dat", "residuals*.dat"):
+        files.extend(glob.glob(os.path.join(residuals_dir, "*", name)))
+
+    def start_time(path):
+        try:
+            return float(os.path.basename(os.path.dirname(path)))
+        except ValueError:
+            return 0.0
+    return sorted(files, key=lambda path: (start_time(path), os.path.getmtime(path)))
+
+
+class ResidualTail:
+    """Incremental reader for an OpenFOAM residuals table.
+
+    Only the bytes appended since the last read are parsed; rows go into
+    preallocated NumPy columns that grow by doubling, so a refresh costs the
+    same after ten iterations as after a million.
+    """
+
+    def __init__(self, path, capacity=4096):
+        self.path = path
+        self.offset = 0
+        self.keys = []
+        self.columns = []  # Indices of the table columns that are plotted
+        self.names = []
+        self.data = np.empty((capacity, 0))
+        self.rows = 0
+
+    def _set_header(self, line):
+        self.keys = line.lstrip("#").split()
+        # solverInfo.dat mixes solver names, iteration counts and flags; only the initial residuals are plotted
+        initial = [i for i, key in enumerate(self.keys) if key.endswith("_initial")]
+        self.columns = initial or list(range(1, len(self.keys)))
+        self.names = [self.keys[i].replace("_initial", "") for i in self.columns]
+        self.data = np.empty((self.data.shape[0], 1 + len(self.columns)))
+        self.rows = 0
+
+    def _append(self, rows):
+        needed = self.rows + len(rows)
+        if needed > self.data.shape[0]:
+            capacity = max(needed, 2 * self.data.shape[0])
+            grown = np.empty((capacity, self.data.shape[1]))
+            grown[:self.rows] = self.data[:self.rows]
+            self.data = grown
+        self.data[self.rows:needed] = rows
+        self.rows = needed
+
+    def switch_to(self, path):
+        # A restart writes into a new start-time directory; keep appending to the same columns
+        self.path = path
+        self.offset = 0
+
+    def read(self):
+        """Parse new complete lines; returns the number of rows added."""
+        try:
+            with open(self.path, "rb") as file:
+                file.seek(self.offset)
+                chunk = file.read()
+        except OSError:
+            return 0
+
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+        self.offset += end
+
+        rows = []
+        for line in chunk[:end].decode("utf-8", errors="replace").splitlines():
+            if line.startswith("#"):
+                if "Time" in line:
+                    if rows:
+                        self._append(rows)
+                        rows = []
+                    if not self.keys:
+                        self._set_header(line)
+                continue
+            values = line.split()
+            if not values or not self.keys:
+                continue
+            row = [float(values[0]) if _is_number(values[0]) else np.nan]
+            row.extend(float(values[i]) if i < len(values) and _is_number(values[i]) else np.nan for i in self.columns)
+            rows.append(row)
+        if rows:
+            self._append(rows)
+        return len(rows)
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+class ResidualMonitor:
+    """Live residual plot embedded in a Tk window.
+
+    Polls the residual file every refresh_interval ms and redraws only the
+    curves (blitting) unless the axes have to be rescaled.
+    """
+
+    def __init__(self, root, case_dir, refresh_interval=1000, max_points=2000):
+        self.root = root
+        self.case_dir = case_dir
+        self.refresh_interval = refresh_interval
+        self.max_points = max_points
+        self.tail = None
+        self.lines = []
+        self.background = None
+        self._after_id = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Residuals - {os.path.basename(os.path.normpath(case_dir))}")
+        self.window.geometry("900x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.figure = Figure(figsize=(9, 6), dpi=100)
+        self.axes = self.figure.add_subplot(111)
+        self.axes.set_yscale("log")
+        self.axes.set_xlabel("Time")
+        self.axes.set_ylabel("Initial residual")
+        self.axes.set_title("Data Monitoring")
+        self.axes.grid(True, which="both", alpha=0.3)
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        NavigationToolbar2Tk(self.canvas, self.window)
+        self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+        self.status_label = ttk.Label(self.window, text="Waiting for residuals...")
+        self.status_label.pack(side="bottom", fill="x")
+
+        # A resize or a toolbar zoom invalidates the cached background
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.refresh()
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.axes.bbox)
+        for line in self.lines:
+            self.axes.draw_artist(line)
+
+    def _create_lines(self):
+        self.lines = [self.axes.plot([], [], label=name, animated=True)[0] for name in self.tail.names]
+        self.axes.legend(loc="upper right", fontsize="small")
+        self.background = None  # The legend changes the static part of the figure
+
+    def _visible_data(self):
+        # Draw at most max_points per curve so redraw cost stays flat on long runs
+        stride = max(1, -(-self.tail.rows // self.max_points))
+        return self.tail.data[:self.tail.rows:stride]
+
+    def _needs_rescale(self, data):
+        x_min, x_max = self.axes.get_xlim()
+        y_min, y_max = self.axes.get_ylim()
+        times = data[:, 0]
+        values = data[:, 1:]
+        values = values[np.isfinite(values) & (values > 0)]
+        if values.size == 0:
+            return False
+        return (np.nanmax(times) > x_max or np.nanmin(times) < x_min
+                or values.min() < y_min or values.max() > y_max)
+
+    def _rescale(self, data):
+        times = data[:, 0]
+        values = data[:, 1:]
+        values = values[np.isfinite(values) & (values > 0)]
+        t_min, t_max = np.nanmin(times), np.nanmax(times)
+        # Leave head room so the axes are not rescaled on every new row
+        self.axes.set_xlim(t_min, t_min + 2 * max(t_max - t_min, 1e-12))
+        if values.size:
+            self.axes.set_ylim(values.min() / 10, values.max() * 10)
+
+    def update_plot(self):
+        data = self._visible_data()
+        for i, line in enumerate(self.lines):
+            line.set_data(data[:, 0], data[:, i + 1])
+
+        if self.background is None or self._needs_rescale(data):
+            self._rescale(data)
+            self.canvas.draw()  # Full draw; _on_draw caches the new background
+        else:
+            self.canvas.restore_region(self.background)
+            for line in self.lines:
+                self.axes.draw_artist(line)
+            self.canvas.blit(self.axes.bbox)
+        self.canvas.flush_events()
+
+        last = self.tail.data[self.tail.rows - 1]
+        self.status_label.config(text=f"Time = {last[0]:g}    " + "    ".join(
+            f"{name}: {value:.3e}" for name, value in zip(self.tail.names, last[1:])))
+
+    def refresh(self):
+        files = find_residual_files(self.case_dir)
+        if files:
+            if self.tail is None:
+                self.tail = ResidualTail(files[-1])
+            elif files[-1] != self.tail.path:
+                self.tail.switch_to(files[-1])
+
+            if self.tail.read():
+                if not self.lines and self.tail.names:
+                    self._create_lines()
+                if self.lines:
+                    self.update_plot()
+        self._after_id = self.window.after(self.refresh_interval, self.refresh)
+
+    def close(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self.window.destroy()
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    name        TEXT NOT NULL,
+    command     TEXT NOT NULL,
+    cwd         TEXT,
+    state       TEXT NOT NULL,
+    returncode  INTEGER,
+    started     REAL NOT NULL,
+    finished    REAL,
+    wall_time   REAL,
+    cpu_time    REAL,
+    peak_rss_kb INTEGER,
+    log_path    TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+"""
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "splashfoam", "run_history.sqlite")
+
+COLUMNS = ["id", "name", "command", "cwd", "state", "returncode", "started", "finished", "wall_time", "cpu_time",
+           "peak_rss_kb", "log_path"]
+
+
+class RunHistory:
+    """Persistent record of every job the JobManager ran, in a small SQLite database.
+
+    Only the Tk thread touches the connection: jobs are recorded when they
+    start and when their on_exit arrives.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_PATH
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        # Jobs still "running" from an earlier session were lost when the application exited
+        self.connection.execute("UPDATE runs SET state = 'lost' WHERE state = 'running'")
+        self.connection.commit()
+
+    def record_start(self, name, command, cwd=None):
+        cursor = self.connection.execute(
+            "INSERT INTO runs (name, command, cwd, state, started) VALUES (?, ?, ?, 'running', ?)",
+            (name, command, cwd, time.time()))
+        self.connection.commit()
+        return cursor.lastrowid
+
+    def set_log_path(self, run_id, log_path):
+        self.connection.execute("UPDATE runs SET log_path = ? WHERE id = ?", (log_path, run_id))
+        self.connection.commit()
+
+    def record_finish(self, run_id, state, returncode=None, wall_time=None, cpu_time=None, peak_rss_kb=None):
+        self.connection.execute(
+            "UPDATE runs SET state = ?, returncode = ?, finished = ?, wall_time = ?, cpu_time = ?, peak_rss_kb = ? WHERE id = ?",
+            (state, returncode, time.time(), wall_time, cpu_time, peak_rss_kb, run_id))
+        self.connection.commit()
+
+    def query(self, state=None, text=None, limit=500):
+        """Most recent runs first, optionally only those in a state or whose name, command or directory contain text."""
+        conditions, parameters = [], []
+        if state:
+            conditions.append("state = ?")
+            parameters.append(state)
+        if text:
+            conditions.append("(name LIKE ? OR command LIKE ? OR cwd LIKE ?)")
+            parameters += [f"%{text}%"] * 3
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(f"SELECT * FROM runs {where} ORDER BY started DESC LIMIT ?", (*parameters, limit))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.connection.close()
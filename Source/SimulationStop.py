@@ -0,0 +1,117 @@
+import os
+import signal
+
+from FoamDictionary import FoamDictionary
+from SolverLogMetrics import SolverLogMetrics
+
+# Stop modes: controlDict stopAt value for the graceful ones, None for kill
+STOP_MODES = {
+    "write and stop": "writeNow",
+    "stop at next write": "nextWrite",
+    "kill": None,
+}
+
+# Seconds between SIGTERM and SIGKILL for the process group
+KILL_GRACE = 3
+
+
+class SimulationStop:
+    """Stops the solver running on a ProcessRunner (started with new_session) and confirms it from the log.
+
+    The graceful modes set stopAt in system/controlDict, which the solver
+    re-reads at the start of the next time step (runTimeModifiable). If the
+    case configures OptimisationSwitches/stopAtWriteNowSignal, "write and
+    stop" sends that signal to the solver processes instead; only to them,
+    as the Allrun shell or mpirun would die of it. "kill" sends SIGTERM,
+    then SIGKILL, to the whole group. The original stopAt is put back by
+    restore().
+    """
+
+    def __init__(self, root, runner, case_dir, metrics=None, on_status=None):
+        self.root = root
+        self.runner = runner
+        self.case_dir = case_dir
+        self.control_dict_path = os.path.join(case_dir, "system", "controlDict")
+        self.metrics = metrics or SolverLogMetrics()
+        self.on_status = on_status
+        self.original_stop_at = None
+        self.mode = None
+        self._steps_at_request = None
+
+    def _status(self, text):
+        if self.on_status is not None:
+            self.on_status(text)
+
+    def request(self, mode):
+        stop_at = STOP_MODES[mode]
+        self.mode = mode
+        if stop_at is None:
+            self._kill()
+            return
+        self._follow_log()
+        self._steps_at_request = self.metrics.steps
+
+        control_dict = FoamDictionary.load(self.control_dict_path)
+        signal_number = control_dict.lookup("OptimisationSwitches/stopAtWriteNowSignal")
+        solver_pids = []
+        if stop_at == "writeNow" and signal_number and signal_number.isdigit() and int(signal_number) > 0:
+            solver_pids = self._solver_pids(control_dict.get("application"))
+        if solver_pids:
+            for pid in solver_pids:
+                try:
+                    os.kill(pid, int(signal_number))
+                except ProcessLookupError:
+                    pass
+            self._status(f"Sent signal {signal_number} to {len(solver_pids)} solver process(es); they write and stop now.")
+        else:
+            if str(control_dict.get("runTimeModifiable", "true")).strip() in ("false", "no", "off"):
+                raise ValueError("runTimeModifiable is off, so the solver will not see a controlDict change; use kill instead.")
+            if self.original_stop_at is None:
+                self.original_stop_at = control_dict.get("stopAt", "endTime")
+            control_dict.set("stopAt", stop_at)
+            control_dict.save()
+            self._status(f"stopAt set to {stop_at}; waiting for the solver to pick it up...")
+        self.root.after(500, self._confirm)
+
+    def _solver_pids(self, application):
+        # The solver itself (every rank under mpirun); the kernel keeps 15 characters of the command name
+        if not application:
+            return []
+        name = application.strip().strip('"')[:15]
+        return [pid for pid, command in self.runner.group_processes() if command == name]
+
+    def _follow_log(self):
+        log_path = self.metrics.find_log(self.case_dir)
+        if log_path:
+            self.metrics.feed_file(log_path)
+
+    def _confirm(self):
+        if not self.runner.is_running:
+            self._status(f"Simulation stopped ({self.mode}).")
+            return
+        self._follow_log()
+        steps = self.metrics.steps - self._steps_at_request
+        if self.mode == "write and stop" and steps > 2:
+            self._status("The solver has not stopped after two time steps; is runTimeModifiable on? Use kill to force it.")
+            return
+        if steps:
+            self._status(f"Stop requested ({self.mode}); {steps} time step(s) since, at Time = {self.metrics.columns['time'][-1]:g}")
+        self.root.after(500, self._confirm)
+
+    def _kill(self):
+        if self.runner.signal_group(signal.SIGTERM):
+            self._status("Sent SIGTERM to the simulation...")
+            self.root.after(KILL_GRACE * 1000, self._force_kill)
+
+    def _force_kill(self):
+        if self.runner.is_running and self.runner.signal_group(signal.SIGKILL):
+            self._status("Simulation killed.")
+
+    def restore(self):
+        """Put back the stopAt the case had before the stop request."""
+        if self.original_stop_at is None or not os.path.exists(self.control_dict_path):
+            return
+        control_dict = FoamDictionary.load(self.control_dict_path)
+        control_dict.set("stopAt", self.original_stop_at)
+        control_dict.save()
+        self.original_stop_at = None
@@ -0,0 +1,185 @@
+import os
+import re
+import csv
+import math
+import time
+import threading
+from array import array
+
+
+class SolverLogMetrics:
+    """Streaming extractor for the structured parts of an OpenFOAM solver log.
+
+    Lines are fed one at a time (from the Allrun output stream, or tailed from
+    log.<solver> when runApplication redirects the solver) and land in compact
+    per-time-step columns, so throughput can be read at any moment without
+    going back to the log.
+    """
+
+    # Identifiable "solver" names of log.<solver> files; add more solver names...
+    SOLVER_NAMES = ["simpleFoam", "pimpleFoam", "icoFoam", "sonicFoam", "compressibleInterFoam", "foamRun"]
+
+    STEP_COLUMNS = ["time", "deltaT", "courant_mean", "courant_max", "continuity_local", "continuity_global",
+                    "continuity_cumulative", "execution_time", "clock_time"]
+
+    NUMBER = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+    TIME_RE = re.compile(rf"^Time = {NUMBER}")
+    DELTA_T_RE = re.compile(rf"^deltaT = {NUMBER}")
+    COURANT_RE = re.compile(rf"^Courant Number mean: {NUMBER} max: {NUMBER}")
+    CONTINUITY_RE = re.compile(rf"continuity errors : sum local = {NUMBER}, global = {NUMBER}, cumulative = {NUMBER}")
+    SOLVING_RE = re.compile(rf"Solving for (\w+), Initial residual = {NUMBER}, Final residual = {NUMBER}, No Iterations (\d+)")
+    EXECUTION_RE = re.compile(rf"^ExecutionTime = {NUMBER} s\s+ClockTime = {NUMBER} s")
+
+    def __init__(self, end_time=None):
+        self.end_time = end_time
+        self.columns = {name: array("d") for name in self.STEP_COLUMNS}
+        # Per field: step index, initial residual, final residual, iterations of every solve
+        self.fields = {}
+        self.source = "stream"
+        self.started = time.time()
+        self._offsets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def steps(self):
+        return len(self.columns["time"])
+
+    # -------------------------------------------------- feeding
+    def _set(self, name, value):
+        if self.steps:
+            self.columns[name][-1] = value
+
+    def feed(self, line):
+        # Cheap prefix checks first; the solver writes thousands of lines per second on small cases
+        line = line.strip()
+        if not line:
+            return
+        with self._lock:
+            if line.startswith("Time = "):
+                match = self.TIME_RE.match(line)
+                if match:
+                    for column in self.columns.values():
+                        column.append(math.nan)
+                    self._set("time", float(match.group(1)))
+            elif line.startswith("Courant Number"):
+                match = self.COURANT_RE.match(line)
+                if match:
+                    self._set("courant_mean", float(match.group(1)))
+                    self._set("courant_max", float(match.group(2)))
+            elif line.startswith("deltaT"):
+                match = self.DELTA_T_RE.match(line)
+                if match:
+                    self._set("deltaT", float(match.group(1)))
+            elif line.startswith("ExecutionTime"):
+                match = self.EXECUTION_RE.match(line)
+                if match:
+                    self._set("execution_time", float(match.group(1)))
+                    self._set("clock_time", float(match.group(2)))
+            elif "Solving for" in line:
+                match = self.SOLVING_RE.search(line)
+                if match and self.steps:
+                    field = self.fields.setdefault(match.group(1), (array("L"), array("d"), array("d"), array("L")))
+                    field[0].append(self.steps - 1)
+                    field[1].append(float(match.group(2)))
+                    field[2].append(float(match.group(3)))
+                    field[3].append(int(match.group(4)))
+            elif "continuity errors" in line:
+                match = self.CONTINUITY_RE.search(line)
+                if match:
+                    self._set("continuity_local", float(match.group(1)))
+                    self._set("continuity_global", float(match.group(2)))
+                    self._set("continuity_cumulative", float(match.group(3)))
+
+    def feed_stream(self, line):
+        # ProcessRunner on_line hook; ignored once the solver's own log file is being followed
+        if self.source == "stream":
+            self.feed(line)
+
+    def find_log(self, case_dir):
+        """log.<solver> written since this run started, if any."""
+        for solver_name in self.SOLVER_NAMES:
+            log_path = os.path.join(case_dir, f"log.{solver_name}")
+            if os.path.exists(log_path) and os.path.getmtime(log_path) >= self.started - 1:
+                return log_path
+        return None
+
+    def feed_file(self, log_path):
+        """Parse whatever was appended to log_path since the last call."""
+        if self.source == "stream":
+            # The log holds the whole run, including anything the stream already showed (an Allrun that tees
+            # the solver output): start over from it instead of counting those time steps twice
+            with self._lock:
+                self.source = "log"
+                self.columns = {name: array("d") for name in self.STEP_COLUMNS}
+                self.fields = {}
+        offset = self._offsets.get(log_path, 0)
+        try:
+            with open(log_path, "rb") as file:
+                file.seek(offset)
+                chunk = file.read()
+        except OSError:
+            return
+        end = chunk.rfind(b"\n") + 1
+        self._offsets[log_path] = offset + end
+        for line in chunk[:end].decode("utf-8", errors="replace").splitlines():
+            self.feed(line)
+
+    # -------------------------------------------------- reporting
+    def throughput(self, window=20):
+        """Live rates over the last `window` completed time steps, or None before there are two."""
+        with self._lock:
+            times = self.columns["time"]
+            execution = self.columns["execution_time"]
+            # The last row is still being filled; use steps that already reported ExecutionTime
+            rows = [i for i in range(max(0, self.steps - window - 1), self.steps) if not math.isnan(execution[i])]
+            if len(rows) < 2:
+                return None
+            first, last = rows[0], rows[-1]
+            wall = execution[last] - execution[first]
+            simulated = times[last] - times[first]
+
+        stats = {
+            "steps": self.steps,
+            "time": times[last],
+            "execution_time": execution[last],
+            "seconds_per_step": wall / (last - first),
+            "sim_per_wall": simulated / wall if wall > 0 else math.inf,
+            "eta": None,
+        }
+        if self.end_time is not None and simulated > 0:
+            stats["eta"] = max(0.0, (self.end_time - times[last]) * wall / simulated)
+        return stats
+
+    def summary(self):
+        stats = self.throughput()
+        if stats is None:
+            return "Waiting for solver output..."
+        text = (f"Time = {stats['time']:g}  |  {stats['seconds_per_step']:.3g} s/step  |  "
+                f"{stats['sim_per_wall']:.3g} sim s / wall s")
+        if stats["eta"] is not None:
+            text += f"  |  ETA {_format_duration(stats['eta'])}"
+        return text
+
+    def save_csv(self, path):
+        """One row per time step with the initial residual of the first solve of every field."""
+        with self._lock:
+            first_initial = {}
+            for name, (steps, initial, _, _) in self.fields.items():
+                values = {}
+                for step, value in zip(steps, initial):
+                    values.setdefault(step, value)
+                first_initial[name] = values
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(self.STEP_COLUMNS + [f"{name}_initial" for name in first_initial])
+                for row in range(self.steps):
+                    writer.writerow([self.columns[name][row] for name in self.STEP_COLUMNS] +
+                                    [values.get(row, "") for values in first_initial.values()])
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
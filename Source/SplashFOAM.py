@@ -2,19 +2,18 @@
 import os
 import re
 import signal
+import sys
 import time
+_import_started = time.perf_counter()  # Origin of the --profile-startup timings
 import datetime
 import glob
 import shutil # For file copying
 import threading # For running a process in a separate thread
 import tkinter as tk
-import webbrowser
 from tkinter import ttk, filedialog, font, messagebox, simpledialog, colorchooser
 import tkinter.simpledialog 
-from PIL import Image, ImageTk
 import subprocess
 from tkinter import scrolledtext
-import matplotlib.pyplot as plt
 from tkinter import Listbox
 from collections import defaultdict # Import defaultdict | for mesh parameters 
 from tkinter.colorchooser import askcolor
@@ -28,11 +27,18 @@ from tkinter.font import Font
 # -------------------------------------------------
 
 # Importing local classes
+# Only what the main window needs is imported here; popups, viewers and plotting (numpy/matplotlib)
+# are imported by the method that opens them, on first use.
 from SearchWidget import SearchWidget  # Import the SearchWidget class from the other file
-from ReplaceProperties import ReplacePropertiesPopup
-from ReplaceMeshParameters import ReplaceMeshParameters
-from ReplaceControlDictParameters import ReplaceControlDictParameters
-from ReplaceSimulationSetupParameters import ReplaceSimulationSetupParameters
+from FoamDictionary import FoamDictionary
+from foam_environment import apply_environment, foam_environment
+from ProcessRunner import ProcessRunner
+from BoundedConsole import BoundedConsole
+from SolverLogMetrics import SolverLogMetrics
+from ImageCache import ImageCache
+from StartupProfile import StartupProfile
+from CaseClone import clone_file, clone_tree
+from SimulationStop import STOP_MODES, SimulationStop
 
 # Define menu functions
 def file_new():
@@ -49,21 +55,31 @@ def view_status_bar():
 
 def view_toolbar():
     print("Toolbar View")
+
+def open_url(url, new_tab=False):
+    import webbrowser  # Deferred: only needed when a link is clicked
+    if new_tab:
+        webbrowser.open_new_tab(url)
+    else:
+        webbrowser.open_new(url)
 #______________
 #
 # TERMINAL APP 
 #______________           
 
 class SplashFOAM:  
-    def __init__(self, root):
+    def __init__(self, root, profile=None):
         self.root = root
         self.root.config(background="white") # black
         self.root.title("SplashFOAM - v0.1")
+        self.profile = profile or StartupProfile()
+        self.images = ImageCache(self.root)
         
-        # Set the window icon using a PhotoImage
+        # Set the window icon using a PhotoImage (a cached 125 px thumbnail, not the 1000 px original)
         icon_path = "../Resources/Logos/simulitica_icon_logo.png"  # Replace with the actual path to your icon file
-        icon_image = tk.PhotoImage(file=icon_path)
+        icon_image = self.images.photo(icon_path, 8)
         self.root.tk.call('wm', 'iconphoto', self.root._w, icon_image)
+        self.profile.mark("window icon")
         
         # ======================= Create a menubar ----------------------------->
         menubar = tk.Menu(root)
@@ -93,6 +109,8 @@ class SplashFOAM:
         
         # Add the submenu to the "View" menu
         view_menu.add_command(label="Results Panel", command=self.toggle_results_panel)
+        view_menu.add_command(label="Console Buffer Size", command=self.set_console_buffer_size)
+        view_menu.add_command(label="Run History", command=self.show_run_history)
 
         # Add the submenu to the "View" menu
         view_menu.add_cascade(label="Toolbar", menu=toolbar_submenu)
@@ -113,6 +131,7 @@ class SplashFOAM:
         
         # Display the menu bar
         root.config(menu=menubar)
+        self.profile.mark("menus")
         # ======================= Create a menubar -----------------------------<
         
         # ============= Time Recorder =============
@@ -124,18 +143,24 @@ class SplashFOAM:
         self.license_duration = 1 * 365 * 24 * 3600  # 1 year in seconds
         self.notice_period_before_end = 15 * 24 * 3600  # Notify 15 days before the license expires
         self.elapsed_time_file = ".elapsed_time.txt"  # Making the file name start with a dot to "hide" it in Unix/Linux
+        self.license_check_interval = 3600  # Seconds between license checks while far from the notice period
+        self.timer_after_id = None
         
         # Create a label for the "Elapsed time:" text
         self.elapsed_time_label = tk.Label(root, text="Elapsed Time", font=("Helvetica", 24), bg="white", fg="darkblue")
         self.elapsed_time_label.grid(row=2, column=10, sticky="ew")
 
         # Create a label for the timer
-        self.timer_label = tk.Label(root, text="00:00:00.0", font=("Helvetica", 36, "bold"), bg="white", fg="darkblue")
+        self.timer_label = tk.Label(root, text="00:00:00", font=("Helvetica", 36, "bold"), bg="white", fg="darkblue")
         self.timer_label.grid(row=3, column=10, sticky="ew")
 
+        # The clock ticks once per second while it is shown; hiding the results panel pauses it
+        self.timer_label.bind("<Map>", lambda event: self.update_timer())
         
-        # Start updating the timer
+        # Start updating the timer; the license start date is read once and checked on a coarse timer
+        self.license_start_date = self.load_license_start_date()
         self.update_timer()
+        self.check_license()
         
         # Initialize the vg color of the 3D stl CAD
         self.bg_color_counter = 1
@@ -144,20 +169,38 @@ class SplashFOAM:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # ============= Time Recorder ===============
+        self.profile.mark("timer")
+
         # Display a welcome message
         self.show_welcome_message()
+        self.profile.mark("welcome message")
         
         # Display the main text box widget
         self.setup_ui()
+        self.profile.mark("main UI")
+
+        # Ring-buffer console in front of the text box: keeps the last N lines, spills the rest to disk
+        self.console_max_lines = 5000
+        self.console = BoundedConsole(self.text_box, self.text_box_scrollbar, max_lines=self.console_max_lines)
+
+        # Background runners streaming child-process output into the console (meshing / case clean + run)
+        self.mesh_runner = ProcessRunner(self.root, self.console)
+        self.case_runner = ProcessRunner(self.root, self.console)
+        self.solver_metrics = None
+        self.parallel_run = None
+        self.simulation_stop = None
+        self.mesh_pipeline = None
+        self.mesh_sweep = None
+        self.job_manager = None  # Created on first use (opens the run history database)
+        self.job_history_window = None
+        self.case_sweep = None
+        self.profile.mark("console + runners")
         
         # Variable to track visibility state of the action bar
         self.show_first_column = True  
 
-        # Add logos
-        self.add_logos()
-  
-        # Add a background image
-        self.add_bgImage()
+        # Logos and background image are decoded once the first window is on screen
+        self.root.after_idle(self.on_first_idle)
         
         # A dictionary to define a help message for each mesh parameter 
         self.PARAMETER_HELP = {
@@ -370,6 +413,11 @@ class SplashFOAM:
         self.caseMeshLogFile = False
         self.solverLogFile = False 
         self.geometry_loaded = False
+        self.geometry_file_name = None  # The imported geometry in the Meshing folder (the meshDict surfaceFile)
+        self.geometry_stats = None  # SurfaceGeometry statistics of the imported geometry
+        self.geometry_check = None  # surface_check result of the imported geometry
+        self.mesh_estimate = None  # CellEstimator prediction for the running mesh
+        self.mesh_cache_key = None  # MeshCache address of the running mesh
         
         # Mesh parameters 
         self.mesh_params = ["minCellSize", "maxCellSize", "boundaryCellSize", "nLayers", "optimiseLayer", "untangleLayers", "thicknessRatio", "maxFirstLayerThickness", "nSmoothNormals", "maxNumIterations", "featureSizeFactor", "reCalculateNormals", "relThicknessTol", "restartFromLatestStep", "enforceGeometryConstraints"] # "stopAfter"
@@ -386,16 +434,26 @@ class SplashFOAM:
         self.mixture_params = ["molWeight", "rho", "rho0", "p0", "B", "gamma", "Cv", "Cp", "Hf", "mu", "Pr"]
 
 
+    # -------------- Deferred startup work --------------------------
+    def on_first_idle(self):
+        # Flush pending geometry and redraws so the window is really up before the artwork is decoded
+        self.root.update_idletasks()
+        self.profile.mark("first window")
+
+        # Add logos
+        self.add_logos()
+  
+        # Add a background image
+        self.add_bgImage()
+        self.profile.mark("logos + background image")
+        self.profile.report()
+
     # -------------- Main logos --------------------------    
     def add_logos(self):
 
-        # Create PhotoImage objects directly from image files
-        self.logo_openfoam = tk.PhotoImage(file="../Resources/Logos/openfoam_logo.png")
-        self.logo_simulitica = tk.PhotoImage(file="../Resources/Logos/simulitica_logo.png")
-
-        # Resize images if needed
-        self.logo_openfoam = self.logo_openfoam.subsample(2, 2)  # Adjust the subsample as needed
-        self.logo_simulitica = self.logo_simulitica.subsample(5, 5)  # Adjust the subsample as needed
+        # Pre-subsampled thumbnails, cached on disk after the first start
+        self.logo_openfoam = self.images.photo("../Resources/Logos/openfoam_logo.png", 2)  # Adjust the subsample as needed
+        self.logo_simulitica = self.images.photo("../Resources/Logos/simulitica_logo.png", 5)  # Adjust the subsample as needed
 
         style = ttk.Style()
         style.configure('White.TButton', background='white')
@@ -468,14 +526,11 @@ class SplashFOAM:
                         self.selected_fuel.set(fuel)
                         break
 
-            with open(selected_file, 'r') as file:
-                file_content = file.read()
-                self.selected_file_content = file_content
-                old_values_mixture = {param: match.group(1) for param in self.mixture_params
-                                      for match in re.finditer(f'{param}\s+(\S+)(;|;//.*)', file_content)}
-                old_values_thermo_type = {param: match.group(1) for param in self.thermo_type_params
-                                           for match in re.finditer(f'{param}\s+(\S+)(;|;//.*)', file_content)}
-                self.open_replace_properties_popup(old_values_mixture, old_values_thermo_type)
+            properties_dict = FoamDictionary.load(selected_file)
+            self.selected_file_content = properties_dict.text
+            old_values_mixture = properties_dict.values(self.mixture_params)
+            old_values_thermo_type = properties_dict.values(self.thermo_type_params)
+            self.open_replace_properties_popup(old_values_mixture, old_values_thermo_type)
         else:
             tk.messagebox.showerror("Error", "Selected file is not a physicalProperties file! Please look for the constant dir in your OF case!")
             
@@ -484,6 +539,7 @@ class SplashFOAM:
         selected_file = self.selected_file_path
         if selected_file:
             # Open a popup to replace the properties for the mixture and thermoType blocks
+            from ReplaceProperties import ReplacePropertiesPopup
             ReplacePropertiesPopup(self, self.thermo_type_params, self.mixture_params, old_values_thermo_type, old_values_mixture)
 
         else:
@@ -553,14 +609,11 @@ class SplashFOAM:
         welcome_label.grid(row=0, column=0, columnspan=3, pady=10, padx=10, sticky="nsew")
 
         # Create a PhotoImage object and set it to the Label
-        welcome_image = tk.PhotoImage(file="../Resources/Images/racing-car.png")
-        welcome_image = welcome_image.subsample(4, 4)
+        welcome_image = self.images.photo("../Resources/Images/racing-car.png", 4)
         welcome_label.config(image=welcome_image, compound="top")
 
-        # Update the main loop to display the image for 2 seconds
-        self.root.update()
-        time.sleep(3)  # Sleep for 2 seconds
-        welcome_label.destroy()  # Destroy the Label to collapse the popup
+        # Show the message for 3 seconds without holding up the rest of the startup
+        self.root.after(3000, welcome_label.destroy)  # Destroy the Label to collapse the popup
         
     def show_about_message(self):
         welcome_message = (
@@ -585,8 +638,7 @@ class SplashFOAM:
         welcome_label.pack(padx=10, pady=10)
 
         # Create a PhotoImage object and set it to the Label
-        welcome_image = tk.PhotoImage(file="../Resources/Images/racing-car.png")  # Adjust the path as needed
-        welcome_image = welcome_image.subsample(4, 4)  # Adjust subsampling as needed
+        welcome_image = self.images.photo("../Resources/Images/racing-car.png", 4)  # Adjust subsampling as needed
         welcome_label.config(image=welcome_image, compound="top")
         welcome_label.image = welcome_image  # Keep a reference
         
@@ -598,11 +650,8 @@ class SplashFOAM:
         # Specify the image path
         image_path = "../Resources/Images/racing-car.png"
 
-        # Create a tk.PhotoImage object directly from the file
-        self.splash_bgImage = tk.PhotoImage(file=image_path)
-
-        # Adjust the subsample as needed
-        self.splash_bgImage = self.splash_bgImage.subsample(6, 6)
+        # Pre-subsampled thumbnail (adjust the subsample as needed)
+        self.splash_bgImage = self.images.photo(image_path, 6)
 
         # Create a label to display the image, initially without the frame effect
         self.splash_bgImage_label = tk.Label(self.root, image=self.splash_bgImage, bg="white", cursor="hand2")
@@ -614,7 +663,7 @@ class SplashFOAM:
 
         # Make the image clickable
         ##self.splash_bgImage_label.bind("<Button-1>", lambda e: webbrowser.open_new_tab("https://www.buymeacoffee.com/simulitica/membership"))
-        self.splash_bgImage_label.bind("<Button-1>", lambda e: webbrowser.open_new_tab("https://www.skool.com/cfd-dose-5227/about"))
+        self.splash_bgImage_label.bind("<Button-1>", lambda e: open_url("https://www.skool.com/cfd-dose-5227/about", new_tab=True))
 
     def on_hover(self, event):
         # Change the label appearance to simulate a frame around it on hover
@@ -765,11 +814,26 @@ class SplashFOAM:
             # Initiate the text_box with a simple CAD representation! 
             self.generate_cad_visual()
 
-            # Copy and rename the geometry file
+            # Copy and rename the geometry file; text STL / OBJ can be converted to cfMesh's compact CAD.fms instead
+            from SurfaceConversion import needs_conversion  # numpy, deferred
+
             geometry_filename = f"CAD.{file_path.split('.')[-1].lower()}"
+            convert = needs_conversion(file_path) and messagebox.askyesno(
+                "Convert Geometry", "Convert the geometry to cfMesh's FMS format (welded vertices, named patches kept)?\n"
+                "The mesher reads it much faster than text STL or OBJ.")
+            if convert:
+                geometry_filename = "CAD.fms"
             geometry_dest = os.path.join(meshing_folder, geometry_filename)
             self.geometry_dest_path = os.path.join(geometry_dest.split('CAD')[0])
-            shutil.copyfile(self.selected_file_path, geometry_dest)
+            self.geometry_file_name = geometry_filename
+            if convert:
+                self.convert_geometry(file_path, geometry_dest)
+                # CAD viewers cannot open .fms; they get the geometry as imported
+                geometry_dest = file_path
+            else:
+                shutil.copyfile(self.selected_file_path, geometry_dest)
+                # Bounding box, area and edge lengths for sensible cell sizes, read off the Tk thread
+                self.analyze_geometry(file_path)
 
             # Find the path to the directory just before "Resources"
             current_path = os.getcwd()
@@ -831,10 +895,10 @@ class SplashFOAM:
                 paraview_thread.start()
 
             # Load logos
-            freecad_logo = tk.PhotoImage(file=freecad_logo_path).subsample(4, 4)
-            gmsh_logo = tk.PhotoImage(file=gmsh_logo_path).subsample(9, 9)
-            blender_logo = tk.PhotoImage(file=blender_logo_path).subsample(9, 9)
-            paraview_logo = tk.PhotoImage(file=paraview_logo_path).subsample(9, 9)
+            freecad_logo = self.images.photo(freecad_logo_path, 4)
+            gmsh_logo = self.images.photo(gmsh_logo_path, 9)
+            blender_logo = self.images.photo(blender_logo_path, 9)
+            paraview_logo = self.images.photo(paraview_logo_path, 9)
 
             # Create buttons with logos for the CAD viewers
             freecad_button = ttk.Button(popup, text="Open in FreeCAD", command=open_freecad, image=freecad_logo, compound="top")
@@ -860,6 +924,85 @@ class SplashFOAM:
         
         # -------------- importing the geometry --------------------------------------------------------------------    
 
+    def convert_geometry(self, source, destination):
+        from SurfaceConversion import convert_to_fms  # numpy, deferred
+
+        result = {}
+
+        def convert():
+            try:
+                result["report"] = convert_to_fms(source, destination)
+            except (OSError, ValueError) as e:
+                result["error"] = e
+
+        self.status_label.config(text="Converting the geometry to FMS...")
+        thread = threading.Thread(target=convert, daemon=True)
+        thread.start()
+        self.root.after(200, self.poll_geometry_conversion, thread, result, source, destination)
+
+    def poll_geometry_conversion(self, thread, result, source, destination):
+        from SurfaceConversion import format_conversion_report
+
+        if thread.is_alive():
+            self.root.after(200, self.poll_geometry_conversion, thread, result, source, destination)
+            return
+        if "error" in result:
+            # The mesher still gets the geometry, as it was
+            destination = os.path.join(os.path.dirname(destination), f"CAD.{source.split('.')[-1].lower()}")
+            shutil.copyfile(source, destination)
+            self.geometry_file_name = os.path.basename(destination)
+            self.console.write(f"\nThe geometry could not be converted, it was copied as is: {result['error']}\n")
+        else:
+            self.console.write(f"\nGeometry converted to {os.path.basename(destination)}:\n{format_conversion_report(result['report'])}\n")
+        self.status_label.config(text="The geometry file is successfully imported!")
+        self.analyze_geometry(destination)
+
+    def analyze_geometry(self, path):
+        self.geometry_stats = None
+        self.geometry_check = None
+        if not path.lower().endswith((".stl", ".obj", ".fms", ".stl.gz", ".obj.gz")):
+            return
+        from surface_check import analyze_surface_file  # numpy, deferred
+
+        result = {}
+
+        def analyze():
+            # Statistics and the surface health check share one read; both are cached by the file's hash
+            try:
+                result["stats"], result["check"] = analyze_surface_file(path)
+            except (OSError, ValueError) as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=analyze, daemon=True)
+        thread.start()
+        self.root.after(200, self.poll_geometry_analysis, thread, result)
+
+    def poll_geometry_analysis(self, thread, result):
+        from surface_check import blocking_problems, format_check
+        from SurfaceGeometry import format_statistics
+
+        if thread.is_alive():
+            self.root.after(200, self.poll_geometry_analysis, thread, result)
+            return
+        if "error" in result:
+            self.console.write(f"\nThe geometry could not be analysed: {result['error']}\n")
+            return
+        self.geometry_stats = result["stats"]
+        self.geometry_check = result["check"]
+        self.console.write(f"\nGeometry: {format_statistics(self.geometry_stats)}\n{format_check(self.geometry_check)}\n")
+        if blocking_problems(self.geometry_check):
+            tk.messagebox.showwarning("Surface Check", f"{format_check(self.geometry_check)}\n\n"
+                                      "cartesianMesh needs a closed, manifold surface; repair the geometry before meshing.")
+
+    def confirm_surface_check(self):
+        # Fails fast: a surface with holes or non-manifold edges only breaks the mesher minutes into the run
+        from surface_check import blocking_problems, format_check
+
+        if not self.geometry_check or not blocking_problems(self.geometry_check):
+            return True
+        return tk.messagebox.askyesno("Surface Check", f"{format_check(self.geometry_check)}\n\n"
+                                      "The mesher will most likely fail on this surface. Mesh anyway?", default="no")
+        
 # -------------------------------- MESH CREATION ------------------------------
     def create_mesh(self):
         # Check if geometry is loaded
@@ -883,7 +1026,7 @@ class SplashFOAM:
                 for file_path in all_mesh_files:
                     try:
                         # Copy each Allmesh* file to the geometry destination path
-                        shutil.copy(file_path, self.geometry_dest_path)
+                        clone_file(file_path, os.path.join(self.geometry_dest_path, os.path.basename(file_path)))
                     except Exception as e:
                         messagebox.showerror("Error", f"Failed to copy {file_path}: {e}")
                 
@@ -891,13 +1034,10 @@ class SplashFOAM:
                 source_system_directory = os.path.join(meshing_directory, "system")
                 dest_system_directory = os.path.join(self.geometry_dest_path, "system")
                 
-                # Remove the existing "system" directory in the destination if it exists
-                if os.path.exists(dest_system_directory):
-                    shutil.rmtree(dest_system_directory)
-                
                 try:
-                    # Copy the "system" directory to the geometry destination path
-                    shutil.copytree(source_system_directory, dest_system_directory)
+                    # Clone the "system" directory to the geometry destination path (replacing an existing one);
+                    # reflinked where the filesystem supports it, so it costs no space until meshDict is edited
+                    clone_tree(source_system_directory, dest_system_directory, replace=True)
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to copy 'system' directory: {e}")
 
@@ -905,12 +1045,10 @@ class SplashFOAM:
             self.mesh_dict_file_path = os.path.join(self.geometry_dest_path, "system", "meshDict")
 
             try:
-                with open(self.mesh_dict_file_path, "r") as mesh_dict_file:
-                    file_content = mesh_dict_file.read()
-                    self.selected_mesh_file_content = file_content
-
-                old_values_mesh = {param: match.group(1) for param in self.mesh_params
-                                   for match in re.finditer(f'{param}\s+(\S+)(;|;//.*)', file_content)}
+                self.set_surface_file()
+                mesh_dict = FoamDictionary.load(self.mesh_dict_file_path)
+                self.selected_mesh_file_content = mesh_dict.text
+                old_values_mesh = mesh_dict.values(self.mesh_params)
 
                 # Open a popup to replace mesh parameters
                 self.open_replace_mesh_parameters_popup(old_values_mesh)
@@ -920,80 +1058,256 @@ class SplashFOAM:
             except Exception as e:
                 tk.messagebox.showerror("Error", f"Error reading mesh parameters: {e}")  
                              
+    def set_surface_file(self):
+        # The template meshDict names CAD.stl; point it at the geometry as imported (CAD.fms after a conversion)
+        if not self.geometry_file_name:
+            return
+        mesh_dict = FoamDictionary.load(self.mesh_dict_file_path)
+        if (mesh_dict.get("surfaceFile") or "").strip().strip('"') != self.geometry_file_name:
+            mesh_dict.set("surfaceFile", f'"{self.geometry_file_name}"')
+            mesh_dict.save()
+
     def open_replace_mesh_parameters_popup(self, old_values_mesh):
         if old_values_mesh:
             # Open a popup to replace mesh parameters
+            from ReplaceMeshParameters import ReplaceMeshParameters
             ReplaceMeshParameters(self, self.mesh_params, old_values_mesh)
         else:
             tk.messagebox.showerror("Error", "No mesh parameters found in the 'meshDict' file!")
 
-    def start_meshing(self):
+    def start_meshing(self, export_vtk=False, export_fluent=False, threads=None, mpi_ranks=None, use_cache=True):
+        from MeshPipeline import MESHERS, DEFAULT_BASHRC, MeshPipeline, default_mesh_threads
     
-        # Choosing the right script based on the selected mesh type
-        if self.mesh_type == "Cartesian":
-            script_name = "AllmeshCartesian"
-        elif self.mesh_type == "Polyhedral":
-            script_name = "AllmeshPolyhedral"
-        elif self.mesh_type == "Tetrahedral":
-            script_name = "AllmeshTetrahedral"
-        else:
+        # Choosing the right mesher based on the selected mesh type
+        if self.mesh_type not in MESHERS:
             tk.messagebox.showerror("Error", f"Unsupported mesh type: {self.mesh_type_var}")
             return
+        if not self.confirm_surface_check():
+            return
 
-        # Create the full path to the meshing script
-        cartMesh_script = os.path.join(self.geometry_dest_path, script_name)
+        # The uncorrected cell prediction is compared with checkMesh afterwards, to calibrate the estimator
+        self.mesh_estimate = None
+        if self.geometry_stats:
+            from CellEstimator import predict_cells
+            try:
+                values = FoamDictionary.load(self.mesh_dict_file_path).values(["minCellSize", "maxCellSize", "boundaryCellSize", "nLayers"])
+                self.mesh_estimate = {"predicted": predict_cells(self.geometry_stats, values, self.mesh_type),
+                                      "threads": mpi_ranks or threads or default_mesh_threads()}
+            except (OSError, ValueError):
+                pass
         
         # Initiate the text_box with a nice mesh representation! 
         self.generate_mesh_visual()
 
-        # Running mesh script 
-        if os.path.exists(cartMesh_script):
-            chmod_command = ["chmod", "+x", cartMesh_script]
-            subprocess.run(chmod_command, check=True)
+        # An identical geometry + meshDict + mesh type + OpenFOAM version was meshed before: restore that mesh
+        self.mesh_cache_key = None
+        restored = False
+        if use_cache:
+            self.mesh_cache_key = self.mesh_cache_lookup(mpi_ranks)
+            restored = self.mesh_cache_key is not None and self.restore_cached_mesh(self.mesh_cache_key)
+            if restored:
+                self.mesh_estimate = None
+
+        # Mesher -> checkMesh -> optional exports, each step started as soon as its predecessor exits
+        # (this replaces the Allmesh* scripts and their "sleep ClockTime" wait)
+        try:
+            self.mesh_pipeline = MeshPipeline.for_mesh_type([self.mesh_runner], self.geometry_dest_path, self.mesh_type,
+                                                            export_vtk=export_vtk, export_fluent=export_fluent,
+                                                            threads=threads, mpi_ranks=mpi_ranks, mesh=not restored,
+                                                            bashrc=self.selected_openfoam_path or DEFAULT_BASHRC,
+                                                            on_exit=self.on_meshing_finished)
+        except ValueError as e:
+            tk.messagebox.showerror("Error", str(e))
+            return
+
+        try:
+            # Activating the progress bar "again" - to be on the safe side
+            self.progress_bar_canvas_flag = True
+            self.start_progress_bar()
+            self.mesh_pipeline.start()
+        except OSError as e:
+            self.progress_bar_canvas_flag = False
+            tk.messagebox.showerror("Error", f"Error starting the {self.mesh_type} mesh: {e}")
+
+    def on_meshing_finished(self, returncode):
+        self.progress_bar_canvas_flag = False
+
+        # Enable the load_meshChecked function
+        self.separateMeshLogFile = True 
+        
+        # Update the status label 
+        self.status_label.config(text="Meshing process is finished!")
+
+        # Check the return code and display appropriate messages
+        if returncode == 0:
+            self.record_mesh_estimate()
+            self.store_cached_mesh()
+            tk.messagebox.showinfo("Mesh is ready", "Mesh is generated successfully!") # DEBUGGING
+        else:
+            tk.messagebox.showerror("Meshing Error", "There was an error during meshing. Check the console output.")
+
+    def mesh_cache_lookup(self, mpi_ranks=None):
+        # The cache key, or None when the mesh cannot be addressed (no surface file, no OpenFOAM)
+        from MeshCache import mesh_key
+        from MeshPipeline import DEFAULT_BASHRC
+
+        try:
+            bashrc = self.selected_openfoam_path or DEFAULT_BASHRC
+            version = (foam_environment(bashrc) or os.environ).get("WM_PROJECT_VERSION", bashrc)
+            return mesh_key(self.geometry_dest_path, self.mesh_type, version, mpi=bool(mpi_ranks and mpi_ranks > 1))
+        except (OSError, RuntimeError, ValueError) as e:
+            self.console.write(f"Mesh cache not used: {e}\n")
+            return None
+
+    def restore_cached_mesh(self, key):
+        from MeshCache import MeshCache
+
+        cache = MeshCache()
+        if cache.lookup(key) is None:
+            return False
+        try:
+            report = cache.restore(key, self.geometry_dest_path)
+        except (OSError, ValueError, KeyError) as e:
+            self.console.write(f"Could not restore the cached mesh: {e}\n")
+            return False
+        self.separateMeshLogFile = True
+        self.console.write(f"\nUnchanged geometry and meshDict: mesh restored from the cache ({report.summary()})\n")
+        self.status_label.config(text="Mesh restored from the cache!")
+        return True
+
+    def store_cached_mesh(self):
+        # Compressing a large polyMesh takes a while, so it happens on a worker thread
+        from MeshCache import MeshCache
+
+        key, self.mesh_cache_key = self.mesh_cache_key, None
+        pipeline = self.mesh_pipeline
+        if key is None or pipeline is None or pipeline.keep_mesh:
+            return
+        log_names = [step.log_name for step in pipeline.steps.values() if step.log_name and step.state == "done"]
+        # Linked on the Tk thread, so meshing again right away cannot change what the worker compresses
+        cache = MeshCache()
+        try:
+            snapshot_dir = cache.snapshot(self.geometry_dest_path, log_names)
+        except OSError as e:
+            self.console.write(f"Could not cache the mesh: {e}\n")
+            return
+        result = {}
 
+        def store():
             try:
-                # Activating the progress bar "again" - to be on the safe side
-                self.progress_bar_canvas_flag = True
-                self.start_progress_bar()
-                
-                # Clear previous content from the text box
-                ##self.text_box.delete(1.0, "end")  
-                
-                # Use Popen to capture real-time output
-                command = [f"./{os.path.basename(cartMesh_script)}"]
-                process = subprocess.Popen(command, cwd=self.geometry_dest_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-
-                # Continuously read and insert output into the Text widget
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break    
-                    self.text_box.insert("end", line)
-                    self.text_box.see("end")  # Scroll to the end to show real-time updates
-                    self.text_box.update_idletasks()  # Update the widget
-
-                # Wait for the process to complete
-                process.communicate()
-                
-                # Enable the load_meshChecked function
-                self.separateMeshLogFile = True 
-                
-                # Update the status label 
-                self.status_label.config(text="Meshing process is finished!")
+                result["size"] = cache.store(key, snapshot_dir)
+            except OSError as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=store, daemon=True)
+        thread.start()
+
+        def poll():
+            if thread.is_alive():
+                self.root.after(500, poll)
+            elif "error" in result:
+                self.console.write(f"Could not cache the mesh: {result['error']}\n")
+            else:
+                self.console.write(f"Mesh cached ({result['size'] / 1024 ** 2:.1f} MB compressed).\n")
 
-                # Check the return code and display appropriate messages
-                if process.returncode == 0:
-                    #pass
-                    tk.messagebox.showinfo("Mesh is ready", "Mesh is generated successfully!") # DEBUGGING
-                else:
-                    tk.messagebox.showerror("Meshing Error", "There was an error during meshing. Check the console output.")
+        self.root.after(500, poll)
 
-            except subprocess.CalledProcessError as e:
-                tk.messagebox.showerror("Error", f"Error running AllmeshCartesian script: {e.stderr}")
-            finally:
-                self.progress_bar_canvas_flag = False
-        else:
-            tk.messagebox.showerror("Error", "AllmeshCartesian script not found!")
+    def record_mesh_estimate(self):
+        from CellEstimator import EstimateHistory
+        from MeshPipeline import MESHERS
+        from MeshSweep import parse_check_mesh
+
+        if not self.mesh_estimate:
+            return
+        cells = parse_check_mesh(os.path.join(self.geometry_dest_path, "log.checkMesh"))["cells"]
+        if not cells:
+            return
+        mesher = self.mesh_pipeline.steps.get(MESHERS[self.mesh_type][0])
+        history = EstimateHistory()
+        try:
+            history.record(self.mesh_type, self.mesh_estimate["predicted"], cells, self.mesh_estimate["threads"],
+                           mesher.duration if mesher else None)
+        finally:
+            history.close()
+        self.console.write(f"\nCell estimate: {self.mesh_estimate['predicted']:,.0f} predicted (uncorrected), "
+                           f"{cells:,} counted by checkMesh\n")
+        self.mesh_estimate = None
+
+    def start_mesh_sweep(self, ranges, threads_per_job=1):
+        from MeshPipeline import DEFAULT_BASHRC
+        from MeshSweep import MeshSweep
+
+        if self.mesh_sweep is not None and self.mesh_sweep.is_running:
+            tk.messagebox.showinfo("Mesh Sweep", "A mesh sweep is already running.")
+            return
+        if not self.confirm_surface_check():
+            return
+        self.mesh_sweep = MeshSweep(self.root, self.console, self.geometry_dest_path, self.mesh_type, ranges,
+                                    threads_per_job=threads_per_job, bashrc=self.selected_openfoam_path or DEFAULT_BASHRC,
+                                    on_exit=self.on_mesh_sweep_finished)
+        if not self.mesh_sweep.variants:
+            tk.messagebox.showinfo("Mesh Sweep", "Enter at least one value range to sweep.")
+            return
+        self.progress_bar_canvas_flag = True
+        self.start_progress_bar()
+        self.status_label.config(text=f"Meshing {len(self.mesh_sweep.variants)} variants...")
+        self.mesh_sweep.start()
+
+    def on_mesh_sweep_finished(self, sweep):
+        from MeshSweep import RESULT_COLUMNS
+
+        self.progress_bar_canvas_flag = False
+        self.status_label.config(text="Mesh sweep is finished!")
+        self.show_results_table("Mesh Sweep Results", ["variant", *sweep.parameters, *RESULT_COLUMNS], sweep.rows(),
+                                os.path.join(sweep.sweep_dir, "sweep_results.csv"))
+
+    def start_case_sweep(self, parameters, cores_per_case=1, max_cores=None, retries=0):
+        from CaseSweep import CaseSweep
+
+        if self.case_sweep is not None and self.case_sweep.is_running:
+            tk.messagebox.showinfo("Case Sweep", "A case sweep is already running.")
+            return
+        try:
+            self.case_sweep = CaseSweep(self.root, self.console, self.selected_file_path, parameters,
+                                        cores_per_case=cores_per_case, max_cores=max_cores, retries=retries,
+                                        bashrc=self.selected_openfoam_path, on_exit=self.on_case_sweep_finished)
+        except (OSError, ValueError) as e:
+            tk.messagebox.showerror("Case Sweep", f"Cannot sweep this case: {e}")
+            return
+        if not self.case_sweep.variants:
+            tk.messagebox.showinfo("Case Sweep", "Enter at least one value range to sweep.")
+            return
+        self.start_progress_bar()
+        self.status_label.config(text=f"Running {len(self.case_sweep.variants)} case variants...")
+        self.case_sweep.start()
+
+    def on_case_sweep_finished(self, sweep):
+        from CaseSweep import RESULT_COLUMNS
+
+        self.stop_progress_bar()
+        self.status_label.config(text="Case sweep is finished!")
+        self.show_results_table("Case Sweep Results",
+                                ["variant", *(parameter.label for parameter in sweep.parameters), *RESULT_COLUMNS],
+                                sweep.rows(), os.path.join(sweep.sweep_dir, "sweep_results.csv"))
+
+    def show_results_table(self, title, columns, rows, saved_path=None):
+        # One row per variant, swept values first, then the collected figures
+        window = tk.Toplevel(self.root)
+        window.title(title)
+        table = ttk.Treeview(window, columns=columns, show="headings", height=min(max(len(rows), 1), 25))
+        for column in columns:
+            table.heading(column, text=column)
+            table.column(column, width=110, anchor="e")
+        for row in rows:
+            table.insert("", "end", values=["-" if value is None else value for value in row])
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=table.yview)
+        table.configure(yscrollcommand=scrollbar.set)
+        table.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        if saved_path:
+            ttk.Label(window, text=f"Saved to {saved_path}").grid(row=1, column=0, sticky="w", padx=5, pady=5)
+        window.grid_rowconfigure(0, weight=1)
+        window.grid_columnconfigure(0, weight=1)
 
     # ______Craft your own mesh with teh desired type _______
 
@@ -1150,35 +1464,14 @@ _____________________________________________________
             try:
                 self.start_progress_bar()
                 
-                # Use Popen to capture real-time output
-                process = subprocess.Popen(["./Allclean"], cwd=self.selected_file_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-                
                 # Clear previous content from the text box
                 self.text_box.delete(1.0, "end")
 
-                # Continuously read and insert output into the Text widget
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                    self.text_box.insert("end", line)
-                    self.text_box.see("end")  # Scroll to the end to show real-time updates
-                    self.text_box.update_idletasks()  # Update the widget
-                   
-                # Wait for the process to complete
-                process.communicate()
-
-                # Check the return code and display appropriate messages
-                if process.returncode == 0:
-                    tk.messagebox.showinfo("Simulation Initialized", "Simulation directory has been reset to default!")
-                    
-                else:
-                    pass # FLAG! must check what openfoam "returns" in case of a successful operation
-                    #tk.messagebox.showerror("Simulation Error", "There was an error during simulation. Check the console output.")
-            except subprocess.CalledProcessError as e:
-                tk.messagebox.showerror("Error", f"Error running Allclean script: {e.stderr}")
-            finally:
+                # Output is streamed into the Text widget by the runner
+                self.case_runner.start(["./Allclean"], cwd=self.selected_file_path, on_exit=self.on_initialization_finished)
+            except (OSError, RuntimeError) as e:
                 self.stop_progress_bar()
+                tk.messagebox.showerror("Error", f"Error running Allclean script: {e}")
         else:
         # tk.messagebox.showerror("Error", "Allclean script not found!")
             # Allclean script not found, creating a temporary script to clean the case
@@ -1186,9 +1479,8 @@ _____________________________________________________
             try:
                 with open(temp_clean_script_path, 'w') as temp_script:
                     temp_script.write("#!/bin/bash\n")
-                    if hasattr(self, 'selected_openfoam_path') and self.selected_openfoam_path:
-                        temp_script.write(f". {self.selected_openfoam_path}\n")  # Source the selected version
-                    else:
+                    # The OpenFOAM environment is passed in by the runner, the script does not source it again
+                    if not (hasattr(self, 'selected_openfoam_path') and self.selected_openfoam_path):
                         raise Exception("OpenFOAM path is not set. Please select an OpenFOAM version first.")
                     temp_script.write("cd ${0%/*} || exit 1\n")  # Go to the directory
                     temp_script.write(". ${WM_PROJECT_DIR:?}/bin/tools/CleanFunctions\n")  # Tutorial clean functions
@@ -1206,43 +1498,37 @@ _____________________________________________________
                 subprocess.run(chmod_command, check=True)
 
                 self.start_progress_bar()
-                # Use Popen to capture real-time output and run the temporary clean script
-                process = subprocess.Popen(["./temp_clean.sh"], cwd=self.selected_file_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                    self.text_box.insert("end", line)
-                    self.text_box.see("end")  # Scroll to the end to show real-time updates
-                    self.text_box.update_idletasks()  # Update the widget
-                   
-                process.communicate()
-
-                if process.returncode == 0:
-                    tk.messagebox.showinfo("Simulation Initialized", "Simulation directory has been reset to default!")
-                else:
-                    raise Exception("Temporary clean script failed to run successfully.")
+                # Run the temporary clean script; it is removed again once the runner reports back
+                self.case_runner.start(["./temp_clean.sh"], cwd=self.selected_file_path,
+                                       env=foam_environment(self.selected_openfoam_path),
+                                       on_exit=lambda returncode: self.on_initialization_finished(returncode, temp_clean_script_path))
             except Exception as e:
                 tk.messagebox.showerror("Error", f"Failed to initialize simulation: {e}")
-            finally:
                 self.stop_progress_bar()
                 if os.path.exists(temp_clean_script_path):
                     os.remove(temp_clean_script_path)
+
+    def on_initialization_finished(self, returncode, temp_clean_script_path=None):
+        self.stop_progress_bar()
+
+        # The temporary clean script is only needed for this one run
+        if temp_clean_script_path and os.path.exists(temp_clean_script_path):
+            os.remove(temp_clean_script_path)
+
+        # Check the return code and display appropriate messages
+        if returncode == 0:
+            tk.messagebox.showinfo("Simulation Initialized", "Simulation directory has been reset to default!")
+        elif temp_clean_script_path:
+            tk.messagebox.showerror("Error", "Failed to initialize simulation: Temporary clean script failed to run successfully.")
+        else:
+            pass # FLAG! must check what openfoam "returns" in case of a successful operation
                          
     #+++++++++++++++++++++++++++++++++ Sim Setup ++++++++++++++++++++++++++++++++++++++++           
     # Define this method to read existing parameter values
     def read_simulation_setup_existing_values(self, directory, file_name, param_list):
         file_path = os.path.join(self.selected_file_path, directory, file_name)
         try:
-            with open(file_path, "r") as file:
-                file_content = file.read()
-                existing_values = {
-                    param: match.group(1).strip() for param in param_list
-                    for match in re.finditer(f'{param}[ \\t]+([^;]+?)(;|[ \\t]*//.*)', file_content)
-                }
-            
-            return existing_values
+            return FoamDictionary.load(file_path).values(param_list)
         except FileNotFoundError:
             #tk.messagebox.showerror("Error", f"File not found - {file_path}")
             self.simulation_running = False  # Let the user try again
@@ -1286,6 +1572,7 @@ _____________________________________________________
         existing_values = {**existing_values_constant, **existing_values_system}
 
         # Open a popup to replace simulation setup parameters
+        from ReplaceSimulationSetupParameters import ReplaceSimulationSetupParameters
         ReplaceSimulationSetupParameters(self, constant_params, system_params, existing_values)
 
     # ++++++++++++++++++++++++++++++++ Sim Setup ++++++++++++++++++++++++++++++++++++++++
@@ -1296,13 +1583,9 @@ _____________________________________________________
         self.control_dict_file_path = os.path.join(self.selected_file_path, "system", "controlDict")
 
         try:
-            with open(self.control_dict_file_path, "r") as control_dict_file:
-                file_content = control_dict_file.read()
-                self.selected_control_file_content = file_content
-                existing_values_control_dict = {
-                    param: match.group(1) for param in self.control_dict_params
-                    for match in re.finditer(f'{param}\\s+([^;]+)(;|;//.*)', file_content)
-                }
+            control_dict = FoamDictionary.load(self.control_dict_file_path)
+            self.selected_control_file_content = control_dict.text
+            existing_values_control_dict = control_dict.values(self.control_dict_params)
 
             # Open a popup to replace controlDict parameters
             self.open_replace_control_dict_parameters_popup(existing_values_control_dict)
@@ -1316,6 +1599,7 @@ _____________________________________________________
     def open_replace_control_dict_parameters_popup(self, existing_values):
         if existing_values:
             # Open a popup to replace controlDict parameters
+            from ReplaceControlDictParameters import ReplaceControlDictParameters
             ReplaceControlDictParameters(self, self.control_dict_params, existing_values)
         else:
             tk.messagebox.showerror("Error", "No controlDict parameters found in the 'controlDict' file!")
@@ -1348,9 +1632,8 @@ _____________________________________________________
         if os.path.exists(allrun_script):
 
             #_____________________________________________________________________________
-            # Important! to run an existing script we need 2 things; 
-            # 1- header must be bin/bash
-            # 2- sourcing the openfoam version chosen by the user
+            # Important! to run an existing script its header must be bin/bash. The OpenFOAM version chosen
+            # by the user is passed in as the environment, so Allrun does not need to source it itself
             
             # Read the current content of the Allrun script
             print(f"Selected OpenFOAM path: {self.selected_openfoam_path}")  # Debug print
@@ -1361,13 +1644,9 @@ _____________________________________________________
             if not lines[0].startswith("#!/bin/bash"):
                 lines[0] = "#!/bin/bash\n"
 
-            source_command = f". {self.selected_openfoam_path}\n" if self.selected_openfoam_path else ""
-
-            # Insert or replace source command after the first line
-            if len(lines) > 1 and lines[1].strip().startswith('. '):
-                lines[1] = source_command  # Replace the existing source command
-            else:
-                lines.insert(1, source_command)  # Insert a new source command after the shebang line
+            # Drop the source command earlier versions inserted after the shebang line
+            if len(lines) > 1 and re.match(r"\.\s+\S*/etc/bashrc\s*$", lines[1]):
+                del lines[1]
 
             # Write the modified content back to the Allrun script
             with open(allrun_script, "w") as file:
@@ -1383,42 +1662,21 @@ _____________________________________________________
                 # Initiate the text_box with a nice mesh representation! 
                 self.generate_run_visual()
 
-                # Use Popen to capture real-time output
-                process = subprocess.Popen(["./Allrun"], cwd=self.selected_file_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-                
                 # Clear previous content from the text box
                 ###self.text_box.delete(1.0, "end")
 
-                # Continuously read and insert output into the Text widget
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                    self.text_box.insert("end", line)
-                    self.text_box.see("end")  # Scroll to the end to show real-time updates
-                    self.text_box.update_idletasks()  # Update the widget
-                   
-                # Wait for the process to complete
-                process.communicate()
-                
-                # Enable the load_meshChecked function (to allow checking the mesh stats; also while sim is running)
-                self.caseMeshLogFile = True
-                
-                # Enable the load_log_file function (even if the simulation was not terminated gracefully!)
-                self.solverLogFile = True 
-
-                # Check the return code and display appropriate messages
-                if process.returncode == 0:
-                    tk.messagebox.showinfo("Simulation Finished", "Simulation completed successfully.")
-                    
-                    # Giving the user the possibility to re-run the simulation
-                    self.simulation_running = False
-                else:
-                    pass # FLAG! must check what openfoam "returns" in case of a successful operation
-                    #tk.messagebox.showerror("Simulation Error", "There was an error during simulation. Check the console output.")
-            except subprocess.CalledProcessError as e:
-                tk.messagebox.showerror("Error", f"Error running Allrun script: {e.stderr}")
-            finally:
+                # Throughput is extracted from the solver output as it arrives
+                self.solver_metrics = SolverLogMetrics(end_time=self.read_end_time())
+
+                # Output is streamed into the Text widget by the runner; the GUI stays responsive
+                # Own process group, so a stop reaches the solver under Allrun (see SimulationStop)
+                self.simulation_stop = None
+                self.case_runner.start(["./Allrun"], cwd=self.selected_file_path, env=foam_environment(self.selected_openfoam_path),
+                                       on_exit=self.on_simulation_finished,
+                                       on_line=self.solver_metrics.feed_stream, new_session=True)
+                self.root.after(1000, self.update_solver_metrics)
+            except (OSError, RuntimeError) as e:
+                tk.messagebox.showerror("Error", f"Error running Allrun script: {e}")
                 self.stop_progress_bar()
                 self.stop_simulation_button["state"] = tk.DISABLED
         else:
@@ -1428,35 +1686,127 @@ _____________________________________________________
         ##subprocess.run(["touch", control_dict_path], check=True)  # Update file modification timestamp
         ##time.sleep(0.1)  # Add a 100ms delay if needed
         
-    # --------------------- running the simulation ---------------------------------------
-        
-    def stop_simulation(self): # FLAG! at the moment, the controlDict file needs to be open and saved and closed, for the function to work :/
-        if not self.simulation_running:
-            tk.messagebox.showinfo("Nothing to Stop", "There's no simulation currently running to stop.")
-            return
+    def read_end_time(self):
+        # endTime as a number, or None when it is missing or a macro / #calc expression
+        control_dict_path = os.path.join(self.selected_file_path, "system", "controlDict")
+        try:
+            return float(FoamDictionary.load(control_dict_path).get("endTime"))
+        except (OSError, TypeError, ValueError):
+            return None
 
-        control_dict_path = os.path.join(self.selected_file_path, "system", "controlDict")  # FLAG! Duplication..
-        if os.path.exists(control_dict_path):
+    def run_parallel_simulation(self, processors, method="scotch"):
+        from ParallelRun import ParallelRun
+
+        try:
+            self.parallel_run = ParallelRun(self.case_runner, self.selected_file_path, processors, method,
+                                            bashrc=self.selected_openfoam_path, on_exit=self.on_parallel_simulation_finished)
+
+            self.start_progress_bar()
+            self.generate_run_visual()
+
+            # The master rank's log is followed the same way as a serial log.<solver>
+            self.solver_metrics = SolverLogMetrics(end_time=self.read_end_time())
+
+            self.simulation_stop = None
+            self.parallel_run.start()
+            self.stop_simulation_button["state"] = tk.NORMAL
+            self.root.after(1000, self.update_solver_metrics)
+        except (OSError, RuntimeError, ValueError) as e:
+            tk.messagebox.showerror("Error", f"Error starting the parallel run: {e}")
+            self.stop_progress_bar()
+            self.stop_simulation_button["state"] = tk.DISABLED
+            self.simulation_running = False
+
+    def on_parallel_simulation_finished(self, returncode):
+        self.on_simulation_finished(returncode)
+        if returncode == 0 and tk.messagebox.askyesno("Reconstruct", "Reconstruct the decomposed results (reconstructPar) now?"):
             try:
-                subprocess.run(["sed", "-i", '0,/endTime/s//writeNow/', control_dict_path], check=True)
-                print(control_dict_path) # FLAG! DEBUGGING        
-                tk.messagebox.showinfo("Stop Simulation", "Simulation stopped successfully.")
-            except subprocess.CalledProcessError as e:
-                tk.messagebox.showerror("Error", f"Error stopping simulation: {e.stderr}")
+                self.parallel_run.reconstruct(on_exit=self.on_reconstruction_finished)
+            except (OSError, RuntimeError) as e:
+                tk.messagebox.showerror("Reconstruction Error", f"Error starting reconstructPar: {e}")
+
+    def on_reconstruction_finished(self, returncode):
+        if returncode == 0:
+            tk.messagebox.showinfo("Reconstruction Finished", "reconstructPar completed successfully.")
         else:
-            tk.messagebox.showerror("Error", "controlDict file not found!")
+            tk.messagebox.showerror("Reconstruction Error", "reconstructPar failed. Check log.reconstructPar.")
+
+    def update_solver_metrics(self):
+        if self.solver_metrics is None or not self.case_runner.is_running:
+            return
+
+        # runApplication sends the solver output to log.<solver>; follow it from the last read offset
+        log_path = self.solver_metrics.find_log(self.selected_file_path)
+        if log_path:
+            self.solver_metrics.feed_file(log_path)
+        self.status_label.config(text=self.solver_metrics.summary())
+        self.root.after(1000, self.update_solver_metrics)
+
+    def on_simulation_finished(self, returncode):
+        self.stop_progress_bar()
+        if self.simulation_stop is not None:
+            # Stopped on request (killed runs exit non-zero): the case can be run again
+            self.simulation_stop.restore()
+            self.simulation_running = False
+
+        # Keep the per-step metrics of this run next to the case for comparing runs later
+        if self.solver_metrics is not None:
+            log_path = self.solver_metrics.find_log(self.selected_file_path)
+            if log_path:
+                self.solver_metrics.feed_file(log_path)
+            if self.solver_metrics.steps:
+                self.solver_metrics.save_csv(os.path.join(self.selected_file_path, "postProcessing", "solverMetrics.csv"))
+            self.status_label.config(text=self.solver_metrics.summary())
+        self.stop_simulation_button["state"] = tk.DISABLED
 
-        self.stop_simulation_button["state"] = tk.DISABLED  # FLAG - is that really needed?! 
+        # Enable the load_meshChecked function (to allow checking the mesh stats; also while sim is running)
+        self.caseMeshLogFile = True
         
-        # Enable the user to user "run simulation" button again
-        self.simulation_running = False
+        # Enable the load_log_file function (even if the simulation was not terminated gracefully!)
+        self.solverLogFile = True 
+
+        # Check the return code and display appropriate messages
+        if returncode == 0:
+            tk.messagebox.showinfo("Simulation Finished", "Simulation completed successfully.")
+            
+            # Giving the user the possibility to re-run the simulation
+            self.simulation_running = False
+        else:
+            pass # FLAG! must check what openfoam "returns" in case of a successful operation
+            #tk.messagebox.showerror("Simulation Error", "There was an error during simulation. Check the console output.")
         
-        # Disable the button until a new sim is launched
-        self.stop_simulation_button["state"] = tk.DISABLED
+    # --------------------- running the simulation ---------------------------------------
+        
+    def stop_simulation(self):
+        if not self.case_runner.is_running:
+            tk.messagebox.showinfo("Nothing to Stop", "There's no simulation currently running to stop.")
+            return
+
+        # Three ways to stop: write the current time and stop, stop at the next scheduled write, or kill
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Stop Simulation")
+        ttk.Label(dialog, text="How should the simulation stop?").pack(padx=20, pady=(15, 5))
+        for mode in STOP_MODES:
+            ttk.Button(dialog, text=mode.capitalize(), command=lambda mode=mode: (dialog.destroy(), self.request_stop(mode))).pack(
+                fill="x", padx=20, pady=2)
+        ttk.Button(dialog, text="Cancel", command=dialog.destroy).pack(fill="x", padx=20, pady=(2, 15))
+
+    def request_stop(self, mode):
+        if self.simulation_stop is None:
+            self.simulation_stop = SimulationStop(self.root, self.case_runner, self.selected_file_path, self.solver_metrics,
+                                                  on_status=lambda text: self.status_label.config(text=text))
+        try:
+            self.simulation_stop.request(mode)
+        except (OSError, ValueError) as e:
+            tk.messagebox.showerror("Error", f"Error stopping simulation: {e}")
 
-    
     def replace_write_now_with_end_time(self, control_dict_path):
-        subprocess.run(["sed", "-i", 's/writeNow/endTime/g', control_dict_path], check=True)
+        # A stop request interrupted before restore() could leave stopAt on writeNow; only that entry is touched
+        if os.path.exists(control_dict_path):
+            control_dict = FoamDictionary.load(control_dict_path)
+            if control_dict.get("stopAt") == "writeNow":
+                control_dict.set("stopAt", "endTime")
+                control_dict.save()
                 
     def start_progress_bar(self):
         self.root.after(100, self.update_progress)
@@ -1482,31 +1832,16 @@ _____________________________________________________
         self.progress_bar_canvas["value"] = 0
 #______________________________________________________________________
     # FLAG: essentially intended to be dedicated for checkMesh script****
-    def load_meshChecked(self): # Important, implement an error handling mechanism where the it spits useful info in case no mesh was created yet!
+    def load_meshChecked(self):
+        from LogViewer import LogViewer  # Pulls in numpy; deferred until a log is opened
    
-        # Check if the file exists
-        if self.geometry_dest_path and os.path.exists(self.geometry_dest_path):  # If mesh was created stand alone 
-            # Specify the path to the "AllmeshCartesian" file
-            allmesh_cartesian_path1 = os.path.join(self.geometry_dest_path, "log.checkMesh")  # Meshing dir.
-
-            # Read the content of the file
-            with open(allmesh_cartesian_path1, "r") as file:
-                content = file.read()
-
-            # Insert the content into the Text widget
-            self.text_box.delete(1.0, "end")  # Clear previous content
-            self.text_box.insert("end", content)
-        elif self.selected_file_path and os.path.exists(self.selected_file_path):  # If mesh was created stand alone 
-            # Specify the path to the "Allrun" file
-            allmesh_cartesian_path2 = os.path.join(self.selected_file_path, "log.checkMesh")  # Case dir.
-
-            # Read the content of the file
-            with open(allmesh_cartesian_path2, "r") as file:
-                content = file.read()
-
-            # Insert the content into the Text widget
-            self.text_box.delete(1.0, "end")  # Clear previous content
-            self.text_box.insert("end", content)
+        # Look for log.checkMesh in the meshing directory first (stand-alone mesh), then in the case directory
+        candidate_dirs = [self.geometry_dest_path, self.selected_file_path]
+        for directory in candidate_dirs:
+            if directory and os.path.exists(os.path.join(directory, "log.checkMesh")):
+                # Logs are shown in an indexed viewer window, never read into memory as a whole
+                LogViewer(self.root, os.path.join(directory, "log.checkMesh"), title="checkMesh Log")
+                break
         else:
             # If the file doesn't exist, display a message in the Text widget
             self.text_box.delete(1.0, "end")  # Clear previous content
@@ -1514,27 +1849,20 @@ _____________________________________________________
             messagebox.showinfo("No Mesh Log-File Found!", "Please make sure a mesh is generated first then load its log file.")
 #__________________________________________________________________           
     def load_log_file(self):
+        from LogViewer import LogViewer  # Pulls in numpy; deferred until a log is opened
     
         if self.selected_file_path is None:
             tk.messagebox.showerror("Error", "No case was found to be tracked. Please make sure your case is loaded/run properly.")
             return
 
-        # List of identifiable "solver" names 
-        solver_names = ["simpleFoam", "pimpleFoam", "icoFoam", "sonicFoam", "compressibleInterFoam", "foamRun"]  # Add more solver names...
-
         # Check each solver log file
-        for solver_name in solver_names:
+        for solver_name in SolverLogMetrics.SOLVER_NAMES:
             log_file_path = os.path.join(self.selected_file_path, f"log.{solver_name}")
 
             # Check if the file exists
             if os.path.exists(log_file_path):
-                # Read the content of the file
-                with open(log_file_path, "r") as file:
-                    content = file.read()
-
-                # Insert the content into the Text widget
-                self.text_box.delete(1.0, "end")  # Clear previous content
-                self.text_box.insert("end", content)
+                # Open at the tail; follow the log while the solver is still writing to it
+                LogViewer(self.root, log_file_path, title=f"log.{solver_name}", follow=self.simulation_running)
 
                 # Break the loop once a log file is found
                 break
@@ -1559,43 +1887,36 @@ _____________________________________________________
 # -------------------------------- Plot results ------------------------------  
     #=============================================================================
     def execute_command(self):
-        #command = "source ~/.bashrc"; self.entry.get()
-        command = self.entry.get()
-
-        # Create a new terminal window and execute the command
-        self.terminal_process = subprocess.Popen(
-            #f"gnome-terminal -- bash -c 'source ~/.bashrc'",
-            f"gnome-terminal -- bash -c '{command}; exec bash'",
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            preexec_fn=os.setsid,  # Create a new process group
-        )
-        
-        # Disable the execute button
-        self.execute_button.config(state=tk.DISABLED)
+        command = self.entry.get().strip()
+        if not command:
+            return
 
-        # Monitor the terminal process and display the output
-        self.monitor_terminal()
+        # Run as a tracked job: output in the console and the job log, exit code and resources in the run history
+        cwd = self.selected_file_path if self.selected_file_path and os.path.isdir(self.selected_file_path) else os.getcwd()
+        self.console.write(f"\n$ {command}\n")
+        self.get_job_manager().submit(command, ["bash", "-c", command], cwd=cwd, output=self.console,
+                                      on_exit=lambda returncode: self.status_label.config(
+                                          text="Command executed successfully" if returncode == 0 else f"Command failed ({returncode})"))
+
+    def get_job_manager(self):
+        from JobManager import JobManager
+
+        if self.job_manager is None:
+            self.job_manager = JobManager(self.root, on_change=self.on_jobs_changed)
+        return self.job_manager
+
+    def on_jobs_changed(self):
+        if self.job_history_window is not None and self.job_history_window.window.winfo_exists():
+            self.job_history_window.refresh()
+
+    def show_run_history(self):
+        from JobHistoryWindow import JobHistoryWindow
+
+        if self.job_history_window is not None and self.job_history_window.window.winfo_exists():
+            self.job_history_window.window.lift()
+            return
+        self.job_history_window = JobHistoryWindow(self.root, self.get_job_manager())
 
-    def monitor_terminal(self):
-        if self.terminal_process:
-            try:
-                # Read the standard output and standard error of the terminal
-                output, _ = self.terminal_process.communicate(timeout=0.1)
-                if output:
-                    self.output_text.insert(tk.END, output)
-                    self.output_text.see(tk.END)
-            except subprocess.TimeoutExpired:
-                # The terminal process is still running
-                self.root.after(100, self.monitor_terminal)
-            else:
-                # The terminal process has completed
-                self.execute_button.config(state=tk.NORMAL)
-                self.status_label.config(text="Command executed successfully")
-                #self.status_label.delete(0, END)
-                
     # ===================Tool tip (hover over the button)=============================================
     def add_tooltip(self, widget, text):
         widget.bind("<Enter>", lambda event: self.show_tooltip_right(widget, text))
@@ -1663,6 +1984,15 @@ _____________________________________________________
         self.text_box_scrollbar.grid(row=0, column=8, columnspan=1, pady=1, sticky='nse', rowspan=13)
         self.text_box['yscrollcommand'] = self.text_box_scrollbar.set      
 
+    def set_console_buffer_size(self):
+        # 0 keeps every line in the widget (unbounded, the old behaviour)
+        max_lines = simpledialog.askinteger("Console Buffer Size", "Number of lines kept in the console (0 = unlimited):",
+                                            initialvalue=self.console_max_lines, minvalue=0, parent=self.root)
+        if max_lines is not None:
+            self.console_max_lines = max_lines
+            self.console.set_max_lines(max_lines)
+            self.status_label.config(text=f"Console keeps the last {max_lines} lines" if max_lines else "Console buffer is unlimited")
+
     def change_theme(self):
         # Ask for font
         current_font = self.text_box.cget("font")
@@ -1716,49 +2046,19 @@ _____________________________________________________
             pass
                     
     def monitor_simulation(self):
+        from ResidualMonitor import ResidualMonitor, find_residual_files  # numpy + matplotlib, deferred
     
         if self.selected_file_path is None:
             tk.messagebox.showerror("Error", "No case was found to be monitored. Please make sure your case is loaded properly.")
             return
             
-        # Get the path to solverInfo.dat
-        solver_info_file = os.path.join(self.selected_file_path, "postProcessing", "residuals", "0", "solverInfo.dat")
-        #solver_info_file = os.path.join(self.selected_file_path, "postProcessing", "residuals", "0", "residuals.dat")
-
-        # Check if the solverInfo file exists
-        if not os.path.exists(solver_info_file):
+        # Residuals are written to postProcessing/residuals/<startTime>/ (solverInfo.dat on ESI, residuals.dat on Foundation)
+        if not find_residual_files(self.selected_file_path):
             messagebox.showerror("Error", "SolverInfo file not found!")
             return
-        
-        # Get the absolute path to the SplashMonitor binary
-        splash_monitor_path = os.path.abspath("../Resources/Utilities/SplashMonitor")
-
-        # Construct the SplashMonitor command with the given arguments
-        splash_monitor_command = [splash_monitor_path, "-l", "-i", "2", "-r", "1", solver_info_file]
-
-        # Run SplashMonitor in a subprocess, capturing the standard output
-        process = subprocess.Popen(splash_monitor_command, stdout=subprocess.PIPE, universal_newlines=True)
-
-        # Check if Gnuplot is installed
-        try:
-            subprocess.run(["gnuplot", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        except subprocess.CalledProcessError:
-            messagebox.showerror("Error", "Gnuplot is not installed. Please install Gnuplot.")
-            return
-
-        # Run Gnuplot with the output stream
-        gnuplot_command = ["gnuplot", "-persist"]
-        gnuplot_process = subprocess.Popen(gnuplot_command, stdin=subprocess.PIPE, universal_newlines=True)
 
-        # Pass the data to Gnuplot
-        for line in process.stdout:
-            gnuplot_process.stdin.write(line)
-
-        # Close the stdin of the Gnuplot process
-        gnuplot_process.stdin.close()
-
-        # Wait for Gnuplot to finish
-        gnuplot_process.wait()
+        # Tails the residual file in-process and plots only what was appended since the last refresh
+        ResidualMonitor(self.root, self.selected_file_path)
         
     #____________________________________________ sourcing OF __________________________________________________    
     # Sourcing openfoam (version option)
@@ -1780,36 +2080,22 @@ _____________________________________________________
             popup.destroy()
             return  
 
-        command = f'source {bashrc_path}'
-        #command = f'source {bashrc_path} && env'
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, executable="/bin/bash")
-        output, errors = process.communicate()
-
-        if errors:
-            error_message = errors.decode()
-            #messagebox.showerror("Error Sourcing OpenFOAM", f"Failed to source OpenFOAM version {version}:\n{error_message}")
+        # Sourced once in a bash that prints its environment (cached per bashrc); the variables are applied to
+        # os.environ, so every tool, script and terminal started from here inherits OpenFOAM without re-sourcing it
+        try:
+            apply_environment(bashrc_path)
+        except (OSError, RuntimeError):
             messagebox.showerror("Error Sourcing OpenFOAM", f"Failed to source OpenFOAM version {version}. Please make sure the chosen version is pre-installed on your system!")
             self.openfoam_sourced = False
             popup.destroy()
             return
-        else: 
-            self.selected_openfoam_path = bashrc_path  # Update the path
-        
-        # Decode the output and split it into lines
-        env_vars = output.decode().split('\n')
-    
-        # Set each environment variable in the current Python process
-        for var in env_vars:
-            parts = var.split('=', 1)
-            if len(parts) == 2:
-                os.environ[parts[0]] = parts[1]
-                
+        self.selected_openfoam_path = bashrc_path  # Update the path
+
         # If you reach this point, sourcing was successful
         print(f"Sourced OpenFOAM version {version}!") 
         messagebox.showinfo("Success", f"Sourced OpenFOAM version {version} successfully!")
         self.openfoam_sourced = True
         return True
-        popup.destroy()
 
     def select_openfoam_version(self):
         popup = tk.Toplevel(self.root)
@@ -1849,13 +2135,13 @@ _____________________________________________________
     #____________________________________________ sourcing OF __________________________________________________    
              
     def open_contact_page(self, event=None):
-        webbrowser.open_new("https://www.simulitica.com/contact")
+        open_url("https://www.simulitica.com/contact")
     def support_SplashFOAM(self, event=None):
-        webbrowser.open_new("https://www.buymeacoffee.com/simulitica")
+        open_url("https://www.buymeacoffee.com/simulitica")
     def splash_GPT_page(self, event=None):
-        webbrowser.open_new("https://chat.openai.com/g/g-RGYvE3TsL-splash-gpt")
+        open_url("https://chat.openai.com/g/g-RGYvE3TsL-splash-gpt")
     def cloud_HPC(self, event=None):
-        webbrowser.open_new("https://cfddose.substack.com/p/cfd-free-from-complexity")
+        open_url("https://cfddose.substack.com/p/cfd-free-from-complexity")
 
 # ++++++++++++++++++++++++++++++++++++++++++++++++++
 # DONOT REMOVE: visualizing stl natively in Splash! 
@@ -2035,29 +2321,39 @@ _____________________________________________________
     # +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
     def update_timer(self):
-        current_time = time.time()
+        if self.timer_after_id is not None:
+            self.root.after_cancel(self.timer_after_id)
+            self.timer_after_id = None
+
+        # Nothing to draw while the results panel is hidden; the <Map> binding restarts the clock
+        if self.timer_label.winfo_manager() != "grid":
+            return
 
         # Calculate elapsed time since the app was opened
-        app_elapsed_time = current_time - self.start_time
+        app_elapsed_time = time.time() - self.start_time
         hours, remainder = divmod(int(app_elapsed_time), 3600)
         minutes, seconds = divmod(remainder, 60)
-        tenths_of_second = int((app_elapsed_time - int(app_elapsed_time)) * 10)
 
         # Update the elapsed time label
-        self.timer_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}.{tenths_of_second}")
-    
-        # Load or set the license start date
+        self.timer_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+
+        # Wake up on the next whole second of elapsed time
+        delay = int((1 - (app_elapsed_time % 1)) * 1000) + 1
+        self.timer_after_id = self.root.after(delay, self.update_timer)
+
+    def load_license_start_date(self):
+        # Load or set the license start date (once per session)
         if not os.path.exists(self.license_start_date_file):
+            license_start_date = time.time()
             with open(self.license_start_date_file, "w") as file:
-                file.write(str(current_time))
-            license_start_date = current_time
-        else:
-            with open(self.license_start_date_file, "r") as file:
-                license_start_date = float(file.read())
+                file.write(str(license_start_date))
+            return license_start_date
+        with open(self.license_start_date_file, "r") as file:
+            return float(file.read())
 
+    def check_license(self):
         # Calculate remaining license duration
-        elapsed_time_since_start = current_time - license_start_date
-        remaining_time = self.license_duration - elapsed_time_since_start
+        remaining_time = self.license_duration - (time.time() - self.license_start_date)
 
         # Check if it's time to notify about the license expiration
         if 0 < remaining_time <= self.notice_period_before_end:
@@ -2065,9 +2361,12 @@ _____________________________________________________
         elif remaining_time <= 0:
             self.notify_license_expiration(remaining_time, expiring_soon=False)
 
-        # Schedule the next update if license has not expired
+        # Schedule the next check if license has not expired: at the start of the notice period,
+        # at expiry, or after license_check_interval, whichever comes first
         if remaining_time > 0:
-            self.root.after(100, self.update_timer)
+            until_notice = remaining_time - self.notice_period_before_end
+            next_check = min(self.license_check_interval, until_notice if until_notice > 0 else remaining_time)
+            self.root.after(int(next_check * 1000) + 1, self.check_license)
         else:
             # Optionally delay closing to allow the user to read the message
             self.root.after(10000, self.root.destroy)  # Closes the app after 10 seconds
@@ -2111,13 +2410,12 @@ _____________________________________________________
             license_message_label.pack(padx=10, pady=10)
 
             # Create a PhotoImage object and set it to the Label
-            welcome_image = tk.PhotoImage(file="../Resources/Logos/simulitica_icon_logo.png")  # Adjust the path as needed
-            welcome_image = welcome_image.subsample(4, 4)  # Adjust subsampling as needed
+            welcome_image = self.images.photo("../Resources/Logos/simulitica_icon_logo.png", 4)  # Adjust subsampling as needed
             license_message_label.config(image=welcome_image, compound="top")
             license_message_label.image = welcome_image  # Keep a reference
 
             # Create a "Renew License Now" button inside the popup
-            renew_button = ttk.Button(popup, text="Renew License Now", command=lambda: webbrowser.open_new_tab("https://www.simulitica.com/splash-v1"))
+            renew_button = ttk.Button(popup, text="Renew License Now", command=lambda: open_url("https://www.simulitica.com/splash-v1", new_tab=True))
             renew_button.pack(pady=20)  # Adjust padding as needed
         
 # Hot links
@@ -2149,12 +2447,17 @@ _____________________________________________________
     # Saving elapsed time on closing the app (now ignored!)
     def on_closing(self):
         self.save_elapsed_time()
+        self.console.close()
         self.root.destroy()
         
 if __name__ == "__main__":
+    # --profile-startup prints how long each startup phase took once the first window is up
+    profile = StartupProfile(enabled="--profile-startup" in sys.argv[1:], origin=_import_started)
+    profile.mark("imports")
     root = tk.Tk()
     root.option_add('*tearOff', False)  # Disable menu tear-off
     root.title("SplashFOAM v0.1")
     root.wm_title("SplashFOAM v0.1")  # Window manager title
-    app = SplashFOAM(root)
+    profile.mark("Tk root")
+    app = SplashFOAM(root, profile=profile)
     root.mainloop()
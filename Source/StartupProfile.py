@@ -0,0 +1,33 @@
+import time
+
+
+class StartupProfile:
+    """Per-phase wall-clock timings of the application start (--profile-startup).
+
+    mark(phase) closes the phase that ran since the previous mark; report()
+    prints the breakdown once the first window is up. Both are no-ops unless
+    enabled, so the marks can stay in the startup path.
+    """
+
+    def __init__(self, enabled=False, origin=None):
+        self.enabled = enabled
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.last = self.origin
+        self.phases = []
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("SplashFOAM startup profile")
+        print(f"{'phase':<28}{'ms':>10}{'cumulative':>14}")
+        elapsed = 0.0
+        for phase, duration in self.phases:
+            elapsed += duration
+            print(f"{phase:<28}{duration * 1000:>10.1f}{elapsed * 1000:>14.1f}")
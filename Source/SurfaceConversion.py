@@ -0,0 +1,214 @@
+import os
+import re
+import gzip
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+from SurfaceGeometry import (BLOCK_SIZE, STL_HEADER_SIZE, is_binary_stl, iter_ascii_stl, iter_obj, open_surface_file,
+                             read_surface, surface_format)
+
+
+class SortedKeySet:
+    """Rows of integers numbered in order of first appearance; kept as a sorted array of byte keys, so a block of
+    rows is looked up and added with NumPy (unique, searchsorted, insert) instead of a Python dict."""
+
+    def __init__(self, width):
+        self.dtype = np.dtype((np.void, 8 * width))
+        self.keys = np.zeros(0, dtype=self.dtype)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.count = 0
+
+    def add(self, rows):
+        """(id per row, mask of the rows that were seen for the first time)."""
+        keys = np.ascontiguousarray(rows, dtype=np.int64).view(self.dtype).ravel()
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        position = np.searchsorted(self.keys, unique)
+        found = position < len(self.keys)
+        found[found] = self.keys[position[found]] == unique[found]
+
+        ids = np.empty(len(unique), dtype=np.int64)
+        ids[found] = self.ids[position[found]]
+        new = np.flatnonzero(~found)
+        # New rows are numbered in the order they appear in the block
+        order = np.argsort(first[new], kind="stable")
+        ids[new[order]] = np.arange(self.count, self.count + len(new))
+        self.count += len(new)
+        self.keys = np.insert(self.keys, position[new], unique[new])
+        self.ids = np.insert(self.ids, position[new], ids[new])
+
+        first_seen = np.zeros(len(keys), dtype=bool)
+        first_seen[first[new]] = True
+        return ids[inverse.ravel()], first_seen
+
+
+class VertexWelder:
+    """Hash grid weld: points in the same grid cell become one vertex.
+
+    Without a tolerance the grid is float32 itself, i.e. points that are identical in a binary STL are merged.
+    """
+
+    def __init__(self, tolerance=None):
+        self.tolerance = tolerance
+        self.cells = SortedKeySet(3)
+        self.points = np.zeros((0, 3), dtype=np.float32)
+
+    def add(self, points):
+        """Welded vertex index for each point."""
+        points = np.asarray(points, dtype=np.float32)
+        if self.tolerance:
+            cells = np.floor(points / self.tolerance).astype(np.int64)
+        else:
+            cells = (points + np.float32(0)).view(np.int32).astype(np.int64)  # + 0 turns -0.0 into 0.0
+        ids, first_seen = self.cells.add(cells)
+        self.points = np.concatenate([self.points, points[first_seen]])
+        return ids
+
+
+class FmsWriter:
+    """cfMesh's native surface format (.fms), which keeps the region names and shares the points between triangles.
+
+    The file lists the patches first and the points before the triangles, so triangles written block by block go
+    to a temporary file; close() writes the patches and points and appends them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.triangles = tempfile.TemporaryFile(mode="w+b", prefix="splash-fms-")
+        self.count = 0
+
+    def write(self, faces, region_ids):
+        np.savetxt(self.triangles, np.column_stack([faces, region_ids]), fmt="((%d %d %d) %d)")
+        self.count += len(faces)
+
+    def close(self, points, regions):
+        # Patch names are OpenFOAM words: no white space, brackets, quotes, slashes or semicolons
+        names = [re.sub(r"[\s(){}\"'/;]", "_", name) or f"patch{index}" for index, name in enumerate(regions or ["patch0"])]
+        with open(self.path, "wb") as file:
+            file.write(b"// Surface written by SplashFOAM: patches, points, triangles, feature edges, subsets\n\n")
+            file.write(f"{len(names)}\n(\n".encode() + "".join(f"{name} patch\n" for name in names).encode() + b")\n\n")
+            file.write(f"{len(points)}\n(\n".encode())
+            np.savetxt(file, points, fmt="(%.9g %.9g %.9g)")
+            file.write(f")\n\n{self.count}\n(\n".encode())
+            self.triangles.seek(0)
+            shutil.copyfileobj(self.triangles, file, 1024 * 1024)
+            # No feature edges, point subsets, facet subsets or feature edge subsets
+            file.write(b")\n\n" + b"0\n()\n\n" * 4)
+        self.triangles.close()
+
+    def discard(self):
+        self.triangles.close()
+
+
+def _text_blocks(path, regions, block_size):
+    # (points, faces into all points so far, region_ids) for either text format
+    with open_surface_file(path) as file:
+        if surface_format(path) == "obj":
+            yield from iter_obj(file, regions, block_size)
+            return
+        header = file.read(STL_HEADER_SIZE)
+        file.seek(0)
+        size = None if isinstance(file, gzip.GzipFile) else os.path.getsize(path)
+        if is_binary_stl(header, size):
+            surface = read_surface(path)
+            regions.extend(surface.regions)
+            yield surface.points, surface.faces, surface.region_ids
+            return
+        offset = 0
+        for points, region_ids in iter_ascii_stl(file, regions, block_size):
+            yield points, np.arange(offset, offset + len(points)).reshape(-1, 3), region_ids
+            offset += len(points)
+
+
+def convert_to_fms(source, destination, tolerance=None, block_size=BLOCK_SIZE):
+    """Stream ASCII STL, OBJ or gzipped versions of them into cfMesh's native .fms surface.
+
+    Duplicate vertices are welded, triangles that collapse when welded and triangles repeated within a region are
+    dropped, and named solids / groups are kept as named patches (a binary STL would only number them, and the
+    mesh patches would no longer match the case's boundary conditions).
+    Returns a report with the sizes, counts, the conversion time and the time a plain read_surface takes on the
+    source and on the result.
+    """
+    started = time.monotonic()
+    regions = []
+    welder = VertexWelder(tolerance)
+    seen_triangles = SortedKeySet(4)  # a triangle repeated in another region (a baffle, a shadow) is kept
+    vertex_map = np.zeros(0, dtype=np.int64)  # source point index -> welded vertex
+    report = {"triangles_in": 0, "points_in": 0, "degenerate": 0, "duplicates": 0}
+
+    directory = os.path.dirname(os.path.abspath(destination))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".splash-", suffix=".fms")
+    os.close(fd)
+    writer = FmsWriter(temp_path)
+    try:
+        for points, faces, region_ids in _text_blocks(source, regions, block_size):
+            report["points_in"] += len(points)
+            report["triangles_in"] += len(faces)
+            vertex_map = np.concatenate([vertex_map, welder.add(points)])
+            if len(faces) and faces.max() >= len(vertex_map):
+                raise ValueError("A face refers to a vertex that is defined after it")
+            welded = vertex_map[faces]
+
+            collapsed = (welded[:, 0] == welded[:, 1]) | (welded[:, 1] == welded[:, 2]) | (welded[:, 0] == welded[:, 2])
+            report["degenerate"] += int(collapsed.sum())
+            welded, region_ids = welded[~collapsed], region_ids[~collapsed]
+            _, first_seen = seen_triangles.add(np.column_stack([np.sort(welded, axis=1), region_ids]))
+            report["duplicates"] += int((~first_seen).sum())
+            welded, region_ids = welded[first_seen], region_ids[first_seen]
+            writer.write(welded, region_ids)
+        writer.close(welder.points, regions)
+    except BaseException:
+        writer.discard()
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, destination)
+    convert_time = time.monotonic() - started
+
+    # Both files are read the same way (and both are in the page cache by now), so the two times compare
+    read_times = []
+    for path in (source, destination):
+        started = time.monotonic()
+        read_surface(path)
+        read_times.append(time.monotonic() - started)
+    report.update({
+        "triangles_out": writer.count,
+        "vertices": len(welder.points),
+        "regions": regions,
+        "size_in": os.path.getsize(source),
+        "size_out": os.path.getsize(destination),
+        "convert_time": convert_time,
+        "read_time_in": read_times[0],
+        "read_time_out": read_times[1],
+    })
+    return report
+
+
+def format_conversion_report(report):
+    saved = 1 - report["size_out"] / max(report["size_in"], 1)
+    lines = [
+        f"{report['size_in'] / 1e6:.1f} MB -> {report['size_out'] / 1e6:.1f} MB FMS "
+        + (f"({100 * saved:.0f}% smaller)" if saved >= 0 else "(larger than the compressed source)"),
+        f"read time {report['read_time_in']:.2f} s -> {report['read_time_out']:.2f} s "
+        f"(conversion took {report['convert_time']:.2f} s)",
+        f"{report['points_in']:,} points welded to {report['vertices']:,} vertices; "
+        f"{report['triangles_out']:,} of {report['triangles_in']:,} triangles kept "
+        f"({report['degenerate']} collapsed, {report['duplicates']} repeated)",
+    ]
+    if len(report["regions"]) > 1:
+        lines.append(f"{len(report['regions'])} patches: " + ", ".join(report["regions"]))
+    return "\n".join(lines)
+
+
+def needs_conversion(path):
+    """True for text STL / OBJ and anything gzipped, i.e. what cfMesh would parse slowly."""
+    try:
+        if surface_format(path) == "fms":
+            return False
+    except ValueError:
+        return False
+    with open_surface_file(path) as file:
+        if isinstance(file, gzip.GzipFile) or surface_format(path) == "obj":
+            return True
+        return not is_binary_stl(file.read(STL_HEADER_SIZE), os.path.getsize(path))
@@ -0,0 +1,300 @@
+import os
+import re
+import gzip
+import math
+
+import numpy as np
+
+# Binary STL: 80 byte header, uint32 triangle count, then 50 bytes per triangle
+STL_HEADER_SIZE = 84
+STL_TRIANGLE = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+STL_COLOUR_BIT = 0x8000  # Set in the attribute when it holds a colour (VisCAM, SolidView)
+
+# Text formats are parsed in blocks of this many bytes, so large files are never held in memory as a whole
+BLOCK_SIZE = 16 * 1024 * 1024
+
+# cartesianMesh refines by halving, so boundaryCellSize is suggested as maxCellSize / 2**k
+MAX_CELLS_ACROSS = 20
+MAX_REFINEMENT_LEVELS = 8
+
+# Log-spaced triangle-size bins of the area distribution in surface_statistics
+SIZE_BINS = 32
+
+
+class Surface:
+    """Triangulated surface: points (n, 3), faces (m, 3) indices into points, and a region per face.
+
+    STL gives one point per triangle corner (a triangle soup); OBJ shares points between faces.
+    """
+
+    def __init__(self, points, faces, region_ids=None, regions=None):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        self.region_ids = np.zeros(len(self.faces), dtype=np.int32) if region_ids is None else np.asarray(region_ids, dtype=np.int32)
+        self.regions = list(regions) if regions else ["patch0"]
+
+    @property
+    def triangles(self):
+        return self.points[self.faces]
+
+
+def surface_format(path):
+    """'stl', 'obj' or 'fms', from the file name with any .gz removed."""
+    name = path[:-3] if path.lower().endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower().lstrip(".")
+    if extension not in ("stl", "obj", "fms"):
+        raise ValueError(f"Unsupported geometry format: {os.path.basename(path)} (STL, OBJ and FMS are read)")
+    return extension
+
+
+def open_surface_file(path):
+    # gzip is recognised by its magic bytes, so a gzipped CAD copy without .gz still opens
+    with open(path, "rb") as file:
+        magic = file.read(2)
+    return gzip.open(path, "rb") if magic == b"\x1f\x8b" else open(path, "rb")
+
+
+def read_surface(path):
+    if surface_format(path) == "obj":
+        return read_obj(path)
+    if surface_format(path) == "fms":
+        return read_fms(path)
+    with open_surface_file(path) as file:
+        header = file.read(STL_HEADER_SIZE)
+        file.seek(0)
+        if is_binary_stl(header, None if isinstance(file, gzip.GzipFile) else os.path.getsize(path)):
+            return _read_binary_stl(file.read())
+        regions = []
+        blocks = list(iter_ascii_stl(file, regions))
+    points = np.concatenate([points for points, _ in blocks]) if blocks else np.zeros((0, 3))
+    region_ids = np.concatenate([ids for _, ids in blocks]) if blocks else None
+    return Surface(points, np.arange(len(points)).reshape(-1, 3), region_ids, regions)
+
+
+def is_binary_stl(header, size=None):
+    """From the first 84 bytes and the file size (None if it is unknown, as for gzip)."""
+    if len(header) < STL_HEADER_SIZE:
+        return False
+    if size is None:
+        return not header.lstrip().startswith(b"solid")
+    # Some exporters write "solid" at the start of binary files, so the size decides
+    count = int(np.frombuffer(header, "<u4", 1, 80)[0])
+    return size == STL_HEADER_SIZE + count * STL_TRIANGLE.itemsize
+
+
+def _read_binary_stl(data):
+    count = int(np.frombuffer(data, "<u4", 1, 80)[0])
+    records = np.frombuffer(data, STL_TRIANGLE, count, STL_HEADER_SIZE)
+    # OpenFOAM reads the attribute as the region index. Exporters that store a colour there set bit 15;
+    # those triangles make one region, not one per colour. Only the values in use become regions.
+    attributes = records["attribute"].astype(np.int32)
+    attributes[attributes & STL_COLOUR_BIT != 0] = STL_COLOUR_BIT
+    values, region_ids = np.unique(attributes, return_inverse=True)
+    region_ids = region_ids.astype(np.int32)
+    if len(values) > 1:
+        regions = ["colour" if value == STL_COLOUR_BIT else f"patch{value}" for value in values.tolist()]
+    else:
+        region_ids = regions = None
+    return Surface(records["vertices"].reshape(-1, 3), np.arange(3 * count).reshape(-1, 3), region_ids, regions)
+
+
+def read_blocks(file, block_size=BLOCK_SIZE):
+    """The file in blocks of about block_size bytes, each ending at a line end."""
+    rest = b""
+    while True:
+        data = file.read(block_size)
+        if not data:
+            if rest:
+                yield rest
+            return
+        data = rest + data
+        cut = data.rfind(b"\n") + 1
+        if cut:
+            yield data[:cut]
+            rest = data[cut:]
+        else:
+            rest = data
+
+
+def iter_ascii_stl(file, regions, block_size=BLOCK_SIZE):
+    """(points, region_ids) per block of an ASCII STL: 3 points per triangle, one region per triangle.
+
+    Solid names are appended to regions as they are met; a name that comes again continues the same region,
+    as in OpenFOAM. Each block is converted with NumPy in one go.
+    """
+    pending = np.zeros((0, 3))
+    pending_regions = np.zeros(0, dtype=np.int32)
+    region = 0
+    for block in read_blocks(file, block_size):
+        tokens = np.array(block.split())
+        vertex_at = np.flatnonzero(tokens == b"vertex")
+        solid_at = np.flatnonzero(tokens == b"solid")
+        # Region of the vertices before the first solid of the block, then of those after each solid
+        block_regions = [region]
+        for position in solid_at:
+            # The region name is whatever follows "solid" on its line
+            name = tokens[position + 1].decode(errors="replace") if position + 1 < len(tokens) else ""
+            if name in ("", "facet", "endsolid"):
+                name = f"patch{len(regions)}"
+            if name not in regions:
+                regions.append(name)
+            block_regions.append(regions.index(name))
+        region = block_regions[-1]
+        points = np.concatenate([pending, tokens[vertex_at[:, None] + np.arange(1, 4)].astype(np.float64)])
+        vertex_regions = np.asarray(block_regions, dtype=np.int32)[np.searchsorted(solid_at, vertex_at)]
+        vertex_regions = np.concatenate([pending_regions, vertex_regions])
+        # A facet may straddle two blocks
+        complete = len(points) - len(points) % 3
+        pending, pending_regions = points[complete:], vertex_regions[complete:]
+        if complete:
+            yield points[:complete], vertex_regions[:complete:3]
+    if len(pending):
+        raise ValueError("Malformed ASCII STL: the number of vertices is not a multiple of three")
+
+
+def iter_obj(file, regions, block_size=BLOCK_SIZE):
+    """(points, faces, region_ids) per block of an OBJ; faces index all points read so far (0-based).
+
+    Polygons are fan-triangulated, v/vt/vn and negative indices are allowed, g/o groups become regions.
+    """
+    vertex_count = 0
+    region = 0
+    for block in read_blocks(file, block_size):
+        vertex_lines, face_lines, line_regions, vertices_before = [], [], [], []
+        for line in block.splitlines():
+            if line.startswith(b"v "):
+                vertex_lines.append(line[2:])
+            elif line.startswith(b"f "):
+                face_lines.append(line[2:])
+                line_regions.append(region)
+                vertices_before.append(vertex_count + len(vertex_lines))
+            elif line.startswith((b"g ", b"o ")):
+                name = line[2:].strip().decode(errors="replace") or f"patch{len(regions)}"
+                if name not in regions:
+                    regions.append(name)
+                region = regions.index(name)
+        points = np.array(b" ".join(vertex_lines).split(), dtype=np.float64).reshape(-1, 3)
+        vertex_count += len(points)
+
+        joined = b" ".join(face_lines)
+        tokens = joined.split()
+        if len(tokens) == 3 * len(face_lines) and b"/" not in joined and b"-" not in joined:
+            # Plain triangles (the common case): converted in one go
+            faces = np.array(tokens, dtype=np.int64).reshape(-1, 3) - 1
+            region_ids = line_regions
+        else:
+            rows, region_ids = [], []
+            for line, line_region, count in zip(face_lines, line_regions, vertices_before):
+                corners = [int(item.split(b"/", 1)[0]) for item in line.split()]
+                corners = [corner - 1 if corner > 0 else count + corner for corner in corners]
+                for second, third in zip(corners[1:-1], corners[2:]):
+                    rows.append((corners[0], second, third))
+                    region_ids.append(line_region)
+            faces = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        yield points, faces, np.asarray(region_ids, dtype=np.int32)
+
+
+def read_obj(path):
+    regions = []
+    with open_surface_file(path) as file:
+        blocks = list(iter_obj(file, regions))
+    points = np.concatenate([block[0] for block in blocks]) if blocks else np.zeros((0, 3))
+    faces = np.concatenate([block[1] for block in blocks]) if blocks else np.zeros((0, 3))
+    region_ids = np.concatenate([block[2] for block in blocks]) if blocks else None
+    return Surface(points, faces, region_ids, regions or None)
+
+
+def read_fms(path):
+    """cfMesh's native surface: patches (name type), points, triangles ((a b c) patch), then feature edges and
+    subsets, which are not needed here."""
+    with open_surface_file(path) as file:
+        data = file.read()
+    tokens = re.sub(rb"//[^\n]*", b"", data).translate(None, b"()").split()
+    count = int(tokens[0])
+    regions = [name.decode(errors="replace") for name in tokens[1:1 + 2 * count:2]]
+    position = 1 + 2 * count
+    count = int(tokens[position])
+    points = np.array(tokens[position + 1:position + 1 + 3 * count], dtype=np.float64).reshape(-1, 3)
+    position += 1 + 3 * count
+    count = int(tokens[position])
+    triangles = np.array(tokens[position + 1:position + 1 + 4 * count], dtype=np.int64).reshape(-1, 4)
+    return Surface(points, triangles[:, :3], triangles[:, 3], regions or None)
+
+
+def surface_statistics(surface):
+    """Bounding box, area, triangle count, edge-length distribution and a feature-size estimate, in one pass."""
+    triangles = surface.triangles
+    if not len(triangles):
+        raise ValueError("The geometry contains no triangles")
+    edges = np.roll(triangles, -1, axis=1) - triangles
+    edge_lengths = np.linalg.norm(edges, axis=2).ravel()
+    areas = 0.5 * np.linalg.norm(np.cross(edges[:, 0], -edges[:, 2]), axis=1)
+    bounds_min = triangles.reshape(-1, 3).min(axis=0)
+    bounds_max = triangles.reshape(-1, 3).max(axis=0)
+    size = bounds_max - bounds_min
+    diagonal = float(np.linalg.norm(size))
+    positive = edge_lengths[edge_lengths > 0]
+    percentiles = np.percentile(positive, [5, 50, 95]) if len(positive) else np.zeros(3)
+    # Dense tessellation marks curvature and small details; slivers below diagonal/10000 are ignored
+    feature_size = float(max(percentiles[0], diagonal * 1e-4))
+
+    # Surface area by local triangle size (log bins): how much of the surface has features below a cell size
+    triangle_sizes = np.maximum(edge_lengths.reshape(-1, 3).mean(axis=1), max(diagonal * 1e-9, 1e-30))
+    size_bins = np.geomspace(triangle_sizes.min(), triangle_sizes.max() * (1 + 1e-9), SIZE_BINS + 1)
+    area_by_size, _ = np.histogram(triangle_sizes, bins=size_bins, weights=areas)
+
+    # Enclosed volume (divergence theorem); only meaningful for a closed surface
+    volume = abs(float(np.einsum("ij,ij->i", triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])).sum()) / 6)
+    return {
+        "triangles": len(triangles),
+        "regions": len(surface.regions),
+        "bounds_min": bounds_min.tolist(),
+        "bounds_max": bounds_max.tolist(),
+        "size": size.tolist(),
+        "diagonal": diagonal,
+        "area": float(areas.sum()),
+        "edge_min": float(positive.min()) if len(positive) else 0.0,
+        "edge_p5": float(percentiles[0]),
+        "edge_median": float(percentiles[1]),
+        "edge_p95": float(percentiles[2]),
+        "edge_max": float(edge_lengths.max()),
+        "feature_size": feature_size,
+        "volume": volume,
+        "size_bins": size_bins.tolist(),
+        "area_by_size": area_by_size.tolist(),
+    }
+
+
+def _round(value):
+    # Three significant digits keep meshDict readable
+    return float(f"{value:.3g}")
+
+
+def suggest_cell_sizes(stats):
+    """minCellSize / maxCellSize / boundaryCellSize matched to the geometry, on cartesianMesh's halving levels."""
+    max_cell = max(stats["size"]) / MAX_CELLS_ACROSS
+    levels = 0
+    if stats["feature_size"] < max_cell:
+        levels = min(MAX_REFINEMENT_LEVELS, math.ceil(math.log2(max_cell / stats["feature_size"])))
+    # The surface itself is resolved at most three levels down; smaller features refine automatically to minCellSize
+    boundary_cell = max_cell / 2 ** min(levels, 3)
+    min_cell = max_cell / 2 ** max(levels, 1)
+    return {"maxCellSize": _round(max_cell), "boundaryCellSize": _round(boundary_cell), "minCellSize": _round(min_cell)}
+
+
+def sizes_fit(stats, values):
+    """False if the meshDict cell sizes are out of scale with the geometry (or missing)."""
+    try:
+        max_cell = float(values["maxCellSize"])
+        min_cell = float(values.get("minCellSize") or max_cell)
+    except (KeyError, TypeError, ValueError):
+        return False
+    extent = max(stats["size"])
+    return extent / 1000 <= max_cell <= extent and min_cell >= extent / 1e5
+
+
+def format_statistics(stats):
+    size = " x ".join(f"{value:.4g}" for value in stats["size"])
+    return (f"{stats['triangles']:,} triangles in {stats['regions']} region(s), bounding box {size}, "
+            f"area {stats['area']:.4g}, edges {stats['edge_min']:.3g} .. {stats['edge_max']:.3g} "
+            f"(median {stats['edge_median']:.3g}), feature size ~{stats['feature_size']:.3g}")
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+import tempfile
+import subprocess
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "splashfoam", "environments")
+
+# Set by bash itself, not by the bashrc
+SHELL_VARIABLES = {"_", "SHLVL", "PWD", "OLDPWD"}
+
+# Part of the cache key; bumped when the way the bashrc is sourced changes
+CAPTURE_VERSION = "2"
+
+_memory_cache = {}
+
+
+def _cache_key(bashrc, base):
+    # The captured PATH-like values embed the PATH the bashrc started from, so that is part of the key too
+    st = os.stat(bashrc)
+    fingerprint = "\0".join([CAPTURE_VERSION, os.path.abspath(bashrc), str(st.st_mtime_ns), base.get("PATH", ""), base.get("LD_LIBRARY_PATH", "")])
+    return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def capture_environment(bashrc, base=None):
+    """Variables the OpenFOAM bashrc sets or changes, as {name: value} (None for removed ones).
+
+    The bashrc is sourced once in a bash that then prints its environment with
+    env -0; the difference to the starting environment is cached in memory and
+    under ~/.cache/splashfoam/environments, keyed by the bashrc path and mtime.
+    """
+    base = dict(os.environ if base is None else base)
+    key = _cache_key(bashrc, base)
+    if key in _memory_cache:
+        return _memory_cache[key]
+
+    cache_path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(cache_path, "r") as file:
+            changes = json.load(file)["changes"]
+        _memory_cache[key] = changes
+        return changes
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # The path goes in as $0, so the bashrc runs with no arguments: OpenFOAM's bashrc stores "$@" in
+    # FOAM_SETTINGS and sources any file argument, which would be the bashrc itself again
+    result = subprocess.run(["bash", "-c", '. "$0" > /dev/null 2>&1; env -0', bashrc],
+                            env=base, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    captured = {}
+    for item in result.stdout.split(b"\0"):
+        name, separator, value = item.decode("utf-8", errors="replace").partition("=")
+        if separator and name not in SHELL_VARIABLES:
+            captured[name] = value
+    if result.returncode != 0 or "WM_PROJECT_DIR" not in captured:
+        raise RuntimeError(f"Sourcing {bashrc} did not set up OpenFOAM: {result.stderr.decode(errors='replace').strip()}")
+    if captured.get("FOAM_SETTINGS", "").strip() and captured.get("FOAM_SETTINGS") != base.get("FOAM_SETTINGS"):
+        raise RuntimeError(f"Sourcing {bashrc} picked up arguments (FOAM_SETTINGS={captured['FOAM_SETTINGS']!r})")
+
+    changes = {name: value for name, value in captured.items() if base.get(name) != value}
+    changes.update({name: None for name in base if name not in captured and name not in SHELL_VARIABLES})
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".splash-")
+    with os.fdopen(fd, "w") as file:
+        json.dump({"bashrc": os.path.abspath(bashrc), "changes": changes}, file)
+    os.replace(temp_path, cache_path)
+    _memory_cache[key] = changes
+    return changes
+
+
+def is_sourced(bashrc, environment=None):
+    """True if environment (default os.environ) already is the one the bashrc sets up."""
+    project_dir = (os.environ if environment is None else environment).get("WM_PROJECT_DIR")
+    etc_dir = os.path.dirname(bashrc)
+    return bool(project_dir) and os.path.realpath(project_dir) == os.path.realpath(os.path.dirname(etc_dir))
+
+
+def foam_environment(bashrc=None, base=None):
+    """Environment for launching OpenFOAM tools directly (no bash -c 'source ...'): base with the bashrc's changes applied.
+
+    Without a bashrc the base (or, if that is None too, the inherited environment) is returned unchanged.
+    """
+    if not bashrc:
+        return base
+    environment = dict(os.environ if base is None else base)
+    if is_sourced(bashrc, environment):
+        return environment
+    for name, value in capture_environment(bashrc, environment).items():
+        if value is None:
+            environment.pop(name, None)
+        else:
+            environment[name] = value
+    return environment
+
+
+def apply_environment(bashrc):
+    """Apply the bashrc's changes to os.environ, so every child process of the GUI inherits OpenFOAM."""
+    for name, value in capture_environment(bashrc).items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
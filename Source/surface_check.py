@@ -0,0 +1,101 @@
+import os
+import json
+import tempfile
+
+import numpy as np
+
+from CaseManifest import file_digest
+from SurfaceConversion import VertexWelder
+from SurfaceGeometry import read_surface, surface_statistics
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "splashfoam", "surface_checks")
+CACHE_VERSION = 4  # Bumped whenever the statistics or the check change
+
+# Faces smaller than this fraction of the bounding-box diagonal squared count as zero-area
+ZERO_AREA_FRACTION = 1e-14
+
+# Problems cartesianMesh cannot mesh through; the others only get a warning
+BLOCKING_PROBLEMS = ("open_edges", "non_manifold_edges")
+
+PROBLEM_LABELS = {
+    "open_edges": "open edges (holes)",
+    "non_manifold_edges": "non-manifold edges",
+    "zero_area_faces": "zero-area faces",
+    "inconsistent_edges": "edges between faces with inconsistent normals",
+    "duplicate_faces": "repeated faces (baffles, shadow patches)",
+}
+
+
+def check_surface(surface):
+    """Holes, non-manifold edges, zero-area faces and inconsistent normals, from an edge table sorted with NumPy.
+
+    Points are welded first (STL stores every triangle corner separately). A face repeated on the same vertices
+    (a baffle, or the -shadow copy convert_to_fms keeps in another region) is counted, then left out. Every other
+    face contributes its three directed edges; an undirected edge used once is open, more than twice
+    non-manifold. The two faces on a manifold edge must run along it in opposite directions, otherwise one of
+    them is flipped.
+    """
+    faces = VertexWelder().add(surface.points)[surface.faces]
+    triangles = surface.points[surface.faces]
+    areas = 0.5 * np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1)
+    diagonal = np.linalg.norm(np.ptp(surface.points, axis=0)) if len(surface.points) else 0.0
+    collapsed = (faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) | (faces[:, 0] == faces[:, 2])
+    zero_area = collapsed | (areas <= ZERO_AREA_FRACTION * diagonal ** 2)
+
+    # Collapsed faces have no proper edges, they are reported as zero-area only
+    proper = faces[~collapsed]
+    _, first = np.unique(np.sort(proper, axis=1), axis=0, return_index=True)
+    duplicates = len(proper) - len(first)
+    proper = proper[np.sort(first)]
+    directed = np.stack([proper, np.roll(proper, -1, axis=1)], axis=2).reshape(-1, 2)
+    undirected = np.sort(directed, axis=1)
+    order = np.lexsort((undirected[:, 1], undirected[:, 0]))
+    undirected, forward = undirected[order], (directed[order, 0] < directed[order, 1])
+    starts = np.flatnonzero(np.r_[True, np.any(undirected[1:] != undirected[:-1], axis=1)])
+    counts = np.diff(np.r_[starts, len(undirected)])
+
+    # On an edge used by two faces, both running the same way means one normal is flipped
+    pairs = starts[counts == 2]
+    inconsistent = int(np.count_nonzero(forward[pairs] == forward[pairs + 1]))
+    return {
+        "triangles": len(faces),
+        "vertices": int(faces.max()) + 1 if len(faces) else 0,
+        "edges": len(starts),
+        "open_edges": int(np.count_nonzero(counts == 1)),
+        "non_manifold_edges": int(np.count_nonzero(counts > 2)),
+        "zero_area_faces": int(np.count_nonzero(zero_area)),
+        "inconsistent_edges": inconsistent,
+        "duplicate_faces": duplicates,
+    }
+
+
+def blocking_problems(check):
+    return {name: check[name] for name in BLOCKING_PROBLEMS if check.get(name)}
+
+
+def format_check(check):
+    problems = [f"{check[name]:,} {label}" for name, label in PROBLEM_LABELS.items() if check.get(name)]
+    if not problems:
+        return f"Surface check: closed and consistently oriented ({check['triangles']:,} triangles)."
+    return "Surface check: " + ", ".join(problems) + "."
+
+
+def analyze_surface_file(path):
+    """(statistics, check) for a geometry file, cached under ~/.cache/splashfoam/surface_checks by its SHA-256."""
+    cache_path = os.path.join(CACHE_DIR, f"{file_digest(path)}.json")
+    try:
+        with open(cache_path, "r") as file:
+            cached = json.load(file)
+        if cached.get("version") == CACHE_VERSION:
+            return cached["statistics"], cached["check"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    surface = read_surface(path)
+    statistics, check = surface_statistics(surface), check_surface(surface)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".splash-")
+    with os.fdopen(fd, "w") as file:
+        json.dump({"version": CACHE_VERSION, "statistics": statistics, "check": check}, file)
+    os.replace(temp_path, cache_path)
+    return statistics, check